@@ -0,0 +1,122 @@
+# batch.py
+"""Replays a saved cleaning recipe over many CSV/Excel files without the GUI.
+
+    python batch.py recipe.json "exports/2024-*.csv" --output cleaned/
+
+Each file is streamed through the recipe chunk by chunk in its own worker
+process and written to OUTPUT/<name>.csv by that worker.
+"""
+
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import pandas as pd
+import streaming
+from recipe import Recipe
+
+INPUT_EXTENSIONS = (".csv", ".xlsx", ".xls")
+
+def find_inputs(pattern):
+    """Returns the CSV/Excel files in a directory or matching a glob, sorted."""
+    if os.path.isdir(pattern):
+        paths = [os.path.join(pattern, name) for name in os.listdir(pattern)]
+    else:
+        paths = glob.glob(pattern, recursive=True)
+    return sorted(path for path in paths if os.path.isfile(path) and path.lower().endswith(INPUT_EXTENSIONS))
+
+def output_path(filepath, output_dir):
+    return os.path.join(output_dir, os.path.splitext(os.path.basename(filepath))[0] + ".csv")
+
+def run_file(steps, filepath, output, chunk_rows=streaming.DEFAULT_CHUNK_ROWS):
+    """Streams one file through the recipe steps into `output`. Runs in a worker process.
+
+    The result is written to a temporary name first, so an interrupted run
+    never leaves a partial file under the final name.
+    """
+    started = time.perf_counter()
+    rows_in = 0
+
+    def count(chunk):
+        nonlocal rows_in
+        rows_in += len(chunk)
+
+    if filepath.lower().endswith(".csv"):
+        source = streaming.ChunkedSource(filepath, chunk_rows=chunk_rows)
+    else:
+        source = streaming.ChunkedSource(frame=pd.read_excel(filepath), chunk_rows=chunk_rows)
+    source = Recipe(steps).source(source)
+    partial = output + ".partial"
+    rows_out = source.to_csv(partial, on_read=count)
+    os.replace(partial, output)
+    return {"file": filepath, "output": output, "rows_in": rows_in, "rows_out": rows_out,
+            "seconds": round(time.perf_counter() - started, 3)}
+
+def run_batch(recipe, inputs, output_dir, workers=None, chunk_rows=streaming.DEFAULT_CHUNK_ROWS, on_result=None):
+    """Runs the recipe over every input on a process pool sized to the cores.
+
+    Returns one result dict per input, in input order; failed files get an
+    "error" entry instead of row counts. on_result(result) is called as each
+    file finishes.
+    """
+    outputs = [output_path(filepath, output_dir) for filepath in inputs]
+    if len(set(outputs)) != len(outputs):
+        raise ValueError("Several inputs would be written to the same output file.")
+    if any(os.path.abspath(o) == os.path.abspath(i) for i, o in zip(inputs, outputs)):
+        raise ValueError("The output directory must not overwrite the input files.")
+    os.makedirs(output_dir, exist_ok=True)
+
+    results = [None] * len(inputs)
+    workers = max(1, min(workers or os.cpu_count() or 1, len(inputs) or 1))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(run_file, recipe.steps, filepath, output, chunk_rows): i
+                   for i, (filepath, output) in enumerate(zip(inputs, outputs))}
+        for future in as_completed(futures):
+            i = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                result = {"file": inputs[i], "error": f"{type(e).__name__}: {e}"}
+            results[i] = result
+            if on_result is not None:
+                on_result(result)
+    return results
+
+def format_result(result):
+    name = os.path.basename(result["file"])
+    if "error" in result:
+        return f"{name}: FAILED ({result['error']})"
+    return f"{name}: {result['rows_in']:,} -> {result['rows_out']:,} rows in {result['seconds']:.2f}s"
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Apply a saved cleaning recipe to many CSV/Excel files.")
+    parser.add_argument("recipe", help="recipe JSON saved from the app")
+    parser.add_argument("inputs", help="a directory or a glob of CSV/Excel files")
+    parser.add_argument("-o", "--output", required=True, help="directory to write the cleaned CSV files to")
+    parser.add_argument("-j", "--workers", type=int, default=None, help="worker processes (default: one per core)")
+    parser.add_argument("--chunk-rows", type=int, default=streaming.DEFAULT_CHUNK_ROWS, help="rows per chunk")
+    parser.add_argument("--report", help="also write the per-file results to this JSON file")
+    args = parser.parse_args(argv)
+
+    recipe = Recipe.load(args.recipe)
+    inputs = find_inputs(args.inputs)
+    if not inputs:
+        parser.error(f"no CSV or Excel files found for {args.inputs!r}")
+
+    started = time.perf_counter()
+    results = run_batch(recipe, inputs, args.output, args.workers, args.chunk_rows,
+                        on_result=lambda result: print(format_result(result), flush=True))
+    failed = [result for result in results if "error" in result]
+    rows = sum(result.get("rows_out", 0) for result in results)
+    print(f"{len(results) - len(failed)} of {len(results)} file(s) done, {rows:,} rows written "
+          f"in {time.perf_counter() - started:.2f}s.")
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump(results, f, indent=2)
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
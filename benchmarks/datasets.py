@@ -0,0 +1,38 @@
+# benchmarks/datasets.py
+
+import numpy as np
+import pandas as pd
+
+SIZES = {"10k": 10_000, "1m": 1_000_000, "10m": 10_000_000}
+
+def parse_size(text):
+    """Accepts a SIZES name ('1m') or a plain row count ('250000')."""
+    return SIZES[text.lower()] if text.lower() in SIZES else int(text)
+
+def make_frame(rows, null_ratio=0.05, duplicate_ratio=0.1, cardinality=1_000, seed=0):
+    """Builds a synthetic frame shaped like our exports.
+
+    Columns: an id, a low-cardinality category, free text with `cardinality`
+    distinct values, an integer, a float, a bool and a timestamp. About
+    `null_ratio` of the cells in the nullable columns are missing and about
+    `duplicate_ratio` of the rows are exact copies of earlier rows.
+    """
+    rng = np.random.default_rng(seed)
+    unique_rows = max(1, int(rows * (1 - duplicate_ratio)))
+    df = pd.DataFrame({
+        "id": np.arange(unique_rows),
+        "status": rng.choice(["open", "closed", "pending", "on hold", "cancelled"], unique_rows),
+        "name": pd.Series([f"Customer {i:06d}" for i in range(cardinality)]).to_numpy()[
+            rng.integers(0, cardinality, unique_rows)],
+        "quantity": rng.integers(0, 500, unique_rows),
+        "price": rng.gamma(2.0, 25.0, unique_rows).round(2),
+        "active": rng.random(unique_rows) < 0.7,
+        "created": pd.Timestamp("2024-01-01") + pd.to_timedelta(rng.integers(0, 365 * 24 * 3600, unique_rows), unit="s"),
+    })
+    for column in ["status", "name", "price"]:
+        df[column] = df[column].mask(rng.random(unique_rows) < null_ratio)
+    if rows > unique_rows:
+        copies = df.iloc[rng.integers(0, unique_rows, rows - unique_rows)]
+        df = pd.concat([df, copies], ignore_index=True)
+        df = df.iloc[rng.permutation(rows)].reset_index(drop=True)
+    return df
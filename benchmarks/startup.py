@@ -0,0 +1,117 @@
+# benchmarks/startup.py
+"""Measures how fast the app starts, in fresh interpreter processes.
+
+    python -m benchmarks.startup --runs 5 --output startup.json
+    python -m benchmarks.startup --compare startup.json
+    python -m benchmarks.startup --importtime
+
+Reported from process launch: `import_main` (main.py imported),
+`first_window` (the window has been drawn) and `interactive` (the data
+libraries are loaded and actions run without waiting). Needs a display.
+"""
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import re
+import statistics
+import subprocess
+import sys
+import time
+from benchmarks.suite import compare
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHILD = r"""
+import json, sys, time
+launched = float(sys.argv[1])
+import main
+imported = time.time()
+app = main.App()
+app.update()
+window = time.time()
+
+def poll():
+    if not app.data_ready:
+        app.after(5, poll)
+        return
+    try:
+        import resource
+        peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # KB on Linux
+    except ImportError:
+        peak_mb = 0.0
+    print(json.dumps({"import_main": imported - launched, "first_window": window - launched,
+                      "interactive": time.time() - launched, "peak_mb": peak_mb}))
+    app.on_close()
+
+app.after(5, poll)
+app.mainloop()
+"""
+
+def run_once():
+    launched = time.time()
+    completed = subprocess.run([sys.executable, "-c", CHILD, repr(launched)], cwd=REPO_ROOT,
+                               capture_output=True, text=True)
+    if completed.returncode != 0:
+        raise RuntimeError(completed.stderr.strip().splitlines()[-1] if completed.stderr.strip() else "startup failed")
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+def run(runs=5):
+    """Starts the app `runs` times and returns the median of each milestone, suite-style."""
+    samples = [run_once() for _ in range(runs)]
+    peak_mb = round(statistics.median(sample["peak_mb"] for sample in samples), 3)
+    results = {name: {"seconds": round(statistics.median(sample[name] for sample in samples), 6), "peak_mb": peak_mb}
+               for name in ["import_main", "first_window", "interactive"]}
+    return {"meta": {"date": datetime.datetime.now().isoformat(timespec="seconds"),
+                     "python": platform.python_version(), "machine": platform.machine(), "runs": runs},
+            "results": {"startup": results}}
+
+def import_times(module="main", top=15):
+    """Returns the `top` slowest imports as (cumulative seconds, module), from python -X importtime."""
+    completed = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"], cwd=REPO_ROOT,
+                               capture_output=True, text=True, check=True)
+    rows = []
+    for line in completed.stderr.splitlines():
+        match = re.match(r"import time:\s+\d+ \|\s+(\d+) \|(\s*)(\S+)", line)
+        if match:
+            rows.append((int(match.group(1)) / 1e6, match.group(3)))
+    return sorted(rows, reverse=True)[:top]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure time-to-first-window and time-to-interactive.")
+    parser.add_argument("--runs", type=int, default=5, help="app launches to take the median of")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--compare", help="baseline JSON to check the results against")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed relative slowdown (default 0.25)")
+    parser.add_argument("--importtime", action="store_true", help="list the slowest imports of main.py and exit")
+    args = parser.parse_args(argv)
+
+    if args.importtime:
+        for seconds, module in import_times():
+            print(f"{seconds * 1000:8.1f} ms  {module}")
+        return 0
+
+    try:
+        results = run(args.runs)
+    except RuntimeError as e:
+        print(f"Could not start the app: {e}", file=sys.stderr)
+        return 2
+    for name, result in results["results"]["startup"].items():
+        print(f"{name:<14} {result['seconds'] * 1000:8.1f} ms")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(json.load(f), results, args.threshold, memory_threshold=args.threshold)
+        for message in regressions:
+            print(f"REGRESSION {message}")
+        if regressions:
+            return 1
+        print("No regressions.")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,222 @@
+# benchmarks/suite.py
+"""Times the data_logic operations and the grid refresh on synthetic frames.
+
+    python -m benchmarks.suite --sizes 10k,1m --output baseline.json
+    python -m benchmarks.suite --sizes 10k,1m --compare baseline.json --threshold 0.25
+
+Each operation is run once under tracemalloc for its peak memory, then
+`--repeat` times untraced; the fastest run is reported. With --compare the
+exit status is 1 when any operation is slower or uses more memory than the
+baseline by more than the threshold.
+"""
+
+import argparse
+import datetime
+import json
+import platform
+import sys
+import time
+import tracemalloc
+import numpy as np
+import pandas as pd
+import data_logic
+import dedupe
+from grid_view import VirtualGrid
+from stats_engine import StatsEngine
+from plotting import PlotEngine
+from export import frame_chunks
+from column_index import ColumnIndexes
+from benchmarks.datasets import make_frame, parse_size
+
+VISIBLE_ROWS = 40
+# Differences below these are noise, whatever the relative change.
+MIN_SECONDS = 0.005
+MIN_MB = 1.0
+
+
+class HeadlessTree:
+    """Stands in for a ttk.Treeview when there is no display: keeps items in a dict."""
+
+    def __init__(self):
+        self.options = {}
+        self.items = {}
+        self._next = 0
+
+    def __setitem__(self, key, value):
+        self.options[key] = value
+
+    def bind(self, *args):
+        pass
+
+    def heading(self, column, **options):
+        pass
+
+    def column(self, column, **options):
+        pass
+
+    def get_children(self):
+        return tuple(self.items)
+
+    def item(self, item, values):
+        self.items[item] = values
+
+    def insert(self, parent, index, values):
+        self._next += 1
+        self.items[self._next] = values
+        return self._next
+
+    def delete(self, *items):
+        for item in items:
+            del self.items[item]
+
+
+class HeadlessScrollbar:
+    def config(self, **options):
+        pass
+
+    def set(self, first, last):
+        self.position = (first, last)
+
+
+def make_grid():
+    """Returns (VirtualGrid, mode, Tk root or None): a withdrawn Tk window when one can
+    be opened, else headless stand-ins. The caller destroys the root."""
+    root = None
+    try:
+        import tkinter
+        from tkinter import ttk
+    except ImportError:
+        tkinter = None
+    if tkinter is not None:
+        try:
+            root = tkinter.Tk()
+            root.withdraw()
+            grid, mode = VirtualGrid(ttk.Treeview(root), ttk.Scrollbar(root)), "tk"
+        except Exception:
+            # No display (TclError), or a broken Tk install.
+            if root is not None:
+                root.destroy()
+            root = None
+    if root is None:
+        grid, mode = VirtualGrid(HeadlessTree(), HeadlessScrollbar()), "headless"
+    grid.visible_rows = VISIBLE_ROWS
+    return grid, mode, root
+
+def grid_scroll(grid, df, pages=50):
+    grid.set_frame(df)
+    for _ in range(pages):
+        grid.scroll(VISIBLE_ROWS)
+    grid.yview("moveto", "0.5")
+    grid.yview("moveto", "1.0")
+
+def operations(grid):
+    """Returns {name: fn(df)} for every benchmarked operation."""
+    # The *_indexed filters build their index in the traced first run; the timed runs reuse it.
+    indexed = data_logic.ColumnCache(indexes=ColumnIndexes())
+    return {
+        "remove_duplicates": data_logic.remove_duplicates_logic,
+        "dedupe_latest_by_key": lambda df: data_logic.remove_duplicates_logic(df, ["name"], "max", "created"),
+        "duplicate_stats": lambda df: dedupe.duplicate_stats(frame_chunks(df), ["name", "status"]),
+        "fill_mean": lambda df: data_logic.handle_missing_values_logic(df, "price", "Fill with Mean"),
+        "fill_median": lambda df: data_logic.handle_missing_values_logic(df, "price", "Fill with Median"),
+        "fill_mode_text": lambda df: data_logic.handle_missing_values_logic(df, "status", "Fill with Mode"),
+        "fill_batch": lambda df: data_logic.handle_missing_values_batch_logic(df, {
+            "price": data_logic.missing_value_strategy("Fill with Median", group_by="status"),
+            "name": "Fill with Mode", "status": "Forward Fill"}),
+        "drop_null_rows": lambda df: data_logic.handle_missing_values_logic(df, "name", "Drop Rows"),
+        "filter_numeric": lambda df: data_logic.filter_logic(df, "price", ">", "50"),
+        "filter_equals_text": lambda df: data_logic.filter_logic(df, "status", "==", "open"),
+        "filter_contains": lambda df: data_logic.filter_logic(df, "name", "contains", "0042"),
+        "filter_compound": lambda df: data_logic.filter_expression_logic(df, data_logic.Or(
+            data_logic.And(data_logic.Condition("price", ">", "50"), data_logic.Condition("status", "==", "open")),
+            data_logic.Condition("name", "contains", "99"))),
+        "filter_numeric_indexed": lambda df: data_logic.filter_logic(df, "price", "<", "1", indexed),
+        "filter_equals_indexed": lambda df: data_logic.filter_logic(df, "status", "==", "open", indexed),
+        "filter_contains_indexed": lambda df: data_logic.filter_logic(df, "name", "contains", "0042", indexed),
+        "describe": lambda df: StatsEngine().describe(df),
+        "describe_approximate": lambda df: StatsEngine().describe(df, approximate=True),
+        "optimize_dtypes": data_logic.optimize_dtypes_logic,
+        "plot_histogram": lambda df: PlotEngine().histogram(df["price"], 30),
+        "plot_category_counts": lambda df: PlotEngine().category_counts(df["name"]),
+        "grid_set_frame": grid.set_frame,
+        "grid_scroll": lambda df: grid_scroll(grid, df),
+    }
+
+def measure(fn, df, repeat=3):
+    tracemalloc.start()
+    fn(df)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn(df)
+        times.append(time.perf_counter() - started)
+    return {"seconds": round(min(times), 6), "peak_mb": round(peak / 1024 ** 2, 3)}
+
+def run(sizes, repeat=3, only=None, seed=0, on_result=None):
+    """Runs the suite and returns a JSON-ready dict of results by size and operation."""
+    grid, grid_mode, root = make_grid()
+    results = {}
+    try:
+        for size in sizes:
+            df = make_frame(parse_size(size), seed=seed)
+            results[size] = {}
+            for name, fn in operations(grid).items():
+                if only and not any(pattern in name for pattern in only):
+                    continue
+                results[size][name] = measure(fn, df, repeat)
+                if on_result is not None:
+                    on_result(size, name, results[size][name])
+    finally:
+        if root is not None:
+            root.destroy()
+    return {"meta": {"date": datetime.datetime.now().isoformat(timespec="seconds"),
+                     "python": platform.python_version(), "pandas": pd.__version__, "numpy": np.__version__,
+                     "machine": platform.machine(), "grid": grid_mode, "repeat": repeat},
+            "results": results}
+
+def compare(baseline, current, time_threshold=0.25, memory_threshold=0.25):
+    """Returns a message for every operation that regressed past a threshold (relative, e.g. 0.25 = 25%)."""
+    regressions = []
+    for size, operations_by_name in current["results"].items():
+        for name, result in operations_by_name.items():
+            before = baseline["results"].get(size, {}).get(name)
+            if before is None:
+                continue
+            for metric, threshold, floor in [("seconds", time_threshold, MIN_SECONDS), ("peak_mb", memory_threshold, MIN_MB)]:
+                old, new = before[metric], result[metric]
+                if new > old * (1 + threshold) and new - old > floor:
+                    regressions.append(f"{size} {name}: {metric} {old:g} -> {new:g} (+{(new / old - 1) * 100 if old else float('inf'):.0f}%)")
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark data_logic operations and the grid refresh.")
+    parser.add_argument("--sizes", default="10k,1m", help="comma-separated sizes: 10k, 1m, 10m or row counts")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per operation (the fastest is kept)")
+    parser.add_argument("--only", help="comma-separated substrings of the operations to run")
+    parser.add_argument("--output", help="write the results to this JSON file (e.g. a new baseline)")
+    parser.add_argument("--compare", help="baseline JSON to check the results against")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed relative slowdown (default 0.25)")
+    parser.add_argument("--memory-threshold", type=float, default=0.25, help="allowed relative peak memory growth")
+    args = parser.parse_args(argv)
+
+    def show(size, name, result):
+        print(f"{size:>6} {name:<22} {result['seconds'] * 1000:10.1f} ms {result['peak_mb']:10.1f} MB", flush=True)
+
+    results = run(args.sizes.split(","), args.repeat, args.only.split(",") if args.only else None, on_result=show)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(json.load(f), results, args.threshold, args.memory_threshold)
+        for message in regressions:
+            print(f"REGRESSION {message}")
+        if regressions:
+            return 1
+        print("No regressions.")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
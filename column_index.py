@@ -0,0 +1,478 @@
+# column_index.py
+"""Optional per-column indexes that answer repeated filters without scanning.
+
+    indexes = ColumnIndexes(max_bytes=256 * 1024 ** 2)
+    cache = data_logic.ColumnCache(indexes=indexes)
+    data_logic.filter_logic(df, "price", ">", "50", cache)   # builds the sorted index
+    data_logic.filter_logic(df, "price", "<", "10", cache)   # binary search, no scan
+
+Three kinds, each built the first time a filter needs it:
+
+- SortedIndex: row positions ordered by value; >, <, >= and <= are two binary searches.
+- ValueIndex: row positions grouped by distinct value; == and != look up one group.
+- NgramIndex: trigram postings over the distinct lower-cased values; `contains`
+  only tests the values that have every trigram of the needle.
+
+An index belongs to one version of a column, identified like ColumnCache
+entries by data_logic.column_token(). Filters and drops return frames that hold
+a subset of the rows, so after each change the app calls track() with the new
+frame: columns whose values did not change answer from the index through the
+kept rows' positions (found from the index labels) instead of being re-indexed.
+Columns whose values did change are passed to invalidate() and re-indexed on
+their next filter.
+"""
+
+import sys
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+from data_logic import NUMERIC_OPERATORS, column_token, _numeric_values
+
+DEFAULT_MAX_BYTES = 512 * 1024 ** 2
+# Smaller columns scan in well under a millisecond; an index would only cost memory.
+MIN_ROWS = 50_000
+# A needle needs this many characters for the trigram index; shorter ones test every distinct value.
+GRAM = 3
+# A range answered from the sorted index may select or leave out at most 1/WIDE of the rows.
+WIDE = 8
+# Object columns are measured from this many rows when counted against the cap.
+SAMPLE_ROWS = 10_000
+# Marks a column whose indexes tracking() found can't follow the new frame.
+_DROP = object()
+
+def _positions_dtype(n):
+    return np.int32 if n < 2 ** 31 else np.int64
+
+def _scatter(positions, n):
+    mask = np.zeros(n, dtype=bool)
+    mask[positions] = True
+    return mask
+
+
+class SortedIndex:
+    """Row positions ordered by numeric value, nulls (NaN) last."""
+
+    def __init__(self, values):
+        self.rows = len(values)
+        self.positions = np.argsort(values, kind="stable").astype(_positions_dtype(self.rows))
+        self.valid = self.rows - int(np.count_nonzero(np.isnan(values)))
+        self.values = values[self.positions[:self.valid]]
+
+    @staticmethod
+    def estimate(n):
+        return n * (8 + np.dtype(_positions_dtype(n)).itemsize)
+
+    @property
+    def nbytes(self):
+        return self.positions.nbytes + self.values.nbytes
+
+    def mask(self, operator, value):
+        """The mask for `values <operator> value`, or None when the range is too wide to be worth it."""
+        if np.isnan(value):
+            return np.zeros(self.rows, dtype=bool)
+        if operator in (">", "<="):
+            split = np.searchsorted(self.values, value, side="right")
+        else:
+            split = np.searchsorted(self.values, value, side="left")
+        low, high = (split, self.valid) if operator in (">", ">=") else (0, split)
+        matched = high - low
+        if matched <= self.rows // WIDE:
+            return _scatter(self.positions[low:high], self.rows)
+        if self.rows - matched > self.rows // WIDE:
+            # Writing millions of scattered positions is slower than comparing every value.
+            return None
+        # Nearly every row matches: clear the few that don't.
+        mask = np.ones(self.rows, dtype=bool)
+        mask[self.positions[:low]] = False
+        mask[self.positions[high:]] = False
+        return mask
+
+
+class ValueIndex:
+    """Row positions grouped by distinct value, from pd.factorize()."""
+
+    def __init__(self, series):
+        codes, uniques = pd.factorize(series)
+        self.rows = len(series)
+        # Nulls (code -1) sort first and are never looked up.
+        self.positions = np.argsort(codes, kind="stable").astype(_positions_dtype(self.rows))
+        counts = np.bincount(codes + 1, minlength=len(uniques) + 1)
+        self.offsets = np.concatenate([[0], np.cumsum(counts)])
+        self.uniques = pd.Index(uniques)
+        # How nulls read as text, for values the column's type can't take (see text_codes()).
+        self.null_texts = set(series[series.isna()].astype(str).unique())
+        self._texts = None
+        self._uniques_nbytes = self.uniques.memory_usage(deep=True)
+
+    @staticmethod
+    def estimate(n):
+        return n * (8 + np.dtype(_positions_dtype(n)).itemsize)
+
+    @property
+    def nbytes(self):
+        texts = self._texts.nbytes if self._texts is not None else 0
+        return self.positions.nbytes + self.offsets.nbytes + self._uniques_nbytes + texts
+
+    def rows_of(self, codes):
+        """Returns the row positions of the given distinct values."""
+        codes = np.asarray(codes, dtype=np.int64) + 1
+        if len(codes) == 1:
+            return self.positions[self.offsets[codes[0]]:self.offsets[codes[0] + 1]]
+        return np.concatenate([self.positions[self.offsets[code]:self.offsets[code + 1]] for code in codes])
+
+    def text_codes(self, value):
+        """Codes of the values whose text equals `value`, or None when a null would match too."""
+        if value in self.null_texts:
+            return None
+        if self._texts is None:
+            self._texts = np.asarray(self.uniques.astype(str), dtype=object)
+        return np.flatnonzero(self._texts == value)
+
+    def equal(self, dtype, value):
+        """The == mask, with the same conversions as data_logic.Condition, or None if it can't be answered here."""
+        try:
+            converted = dtype.type(value)
+        except (ValueError, TypeError, OverflowError):
+            codes = self.text_codes(value)
+            if codes is None:
+                return None
+        else:
+            if pd.isna(converted):
+                return np.zeros(self.rows, dtype=bool)
+            try:
+                codes = self.uniques.get_indexer([converted])
+            except (ValueError, TypeError, OverflowError):
+                return None
+            codes = codes[codes >= 0]
+        if not len(codes):
+            return np.zeros(self.rows, dtype=bool)
+        return _scatter(self.rows_of(codes), self.rows)
+
+
+class NgramIndex:
+    """Trigram postings over a list of distinct lower-cased values.
+
+    Every trigram maps to the sorted ids of the values containing it; a needle
+    can only occur in a value that has all of its trigrams.
+    """
+
+    def __init__(self, texts):
+        """Raises ValueError for texts it can't index: with a NUL (the separator) or a lone surrogate."""
+        if any("\x00" in text for text in texts):
+            raise ValueError("Text values containing NUL can't be indexed.")
+        self.texts = texts
+        joined = "\x00".join(texts)
+        chars = np.frombuffer(joined.encode("utf-32-le"), dtype=np.uint32)
+        self._texts_nbytes = sum(map(sys.getsizeof, texts)) + sys.getsizeof(texts)
+        value_ids = np.cumsum(chars == 0, dtype=np.int64)
+        if len(chars) < GRAM:
+            self.grams, self.starts, self.ids = (np.empty(0, dtype=np.uint64), np.zeros(1, dtype=np.int64),
+                                                 np.empty(0, dtype=np.int32))
+            self._texts_nbytes = 0
+            return
+        keys = self._keys(chars)
+        # Grams that span a separator belong to no value.
+        valid = (chars[:-2] != 0) & (chars[1:-1] != 0) & (chars[2:] != 0)
+        keys, ids = keys[valid], value_ids[:-2][valid].astype(np.int32)
+        order = np.lexsort((ids, keys))
+        keys, ids = keys[order], ids[order]
+        first = np.ones(len(keys), dtype=bool)
+        first[1:] = (keys[1:] != keys[:-1]) | (ids[1:] != ids[:-1])
+        keys, self.ids = keys[first], ids[first]
+        self.grams, starts = np.unique(keys, return_index=True)
+        self.starts = np.append(starts, len(keys))
+
+    @staticmethod
+    def _keys(chars):
+        # Code points fit in 21 bits, so a trigram packs into one uint64.
+        chars = chars.astype(np.uint64)
+        return (chars[:-2] << np.uint64(42)) | (chars[1:-1] << np.uint64(21)) | chars[2:]
+
+    @staticmethod
+    def estimate(texts_chars):
+        return texts_chars * 24
+
+    @property
+    def nbytes(self):
+        return self.grams.nbytes + self.starts.nbytes + self.ids.nbytes + self._texts_nbytes
+
+    def candidates(self, needle):
+        """Ids of the values that have every trigram of `needle`, or None if the needle can't be looked up."""
+        if len(needle) < GRAM or "\x00" in needle:
+            return None
+        try:
+            chars = np.frombuffer(needle.encode("utf-32-le"), dtype=np.uint32)
+        except UnicodeEncodeError:
+            return None
+        keys = np.unique(self._keys(chars))
+        at = np.searchsorted(self.grams, keys)
+        if (at >= len(self.grams)).any() or (self.grams[np.minimum(at, len(self.grams) - 1)] != keys).any():
+            return np.empty(0, dtype=np.int32)
+        postings = sorted((self.ids[self.starts[i]:self.starts[i + 1]] for i in at), key=len)
+        ids = postings[0]
+        for other in postings[1:]:
+            ids = np.intersect1d(ids, other, assume_unique=True)
+        return ids
+
+    def hits(self, needle):
+        """Ids of the values that contain `needle`, or None if the needle can't be looked up."""
+        ids = self.candidates(needle)
+        if ids is None:
+            return None
+        return np.array([i for i in ids.tolist() if needle in self.texts[i]], dtype=np.int64)
+
+
+class ColumnIndexes:
+    """Builds, keeps and looks up the indexes of a frame's columns under a memory cap.
+
+    Indexes are built the first time a filter needs them and evicted least
+    recently used first once together they would pass max_bytes; an index that
+    alone is larger than the cap is never built. Each indexed column version is
+    kept alive with its indexes, like ColumnCache entries, so its token stays
+    unique. Once the current frame only holds a subset of its rows, that pinned
+    column counts towards the cap as well. mask() returns None for whatever it can't answer, and the caller
+    scans instead.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES, min_rows=MIN_ROWS):
+        self.max_bytes = max_bytes
+        self.min_rows = min_rows
+        # column name -> {"token", "series", "indexes": {kind: index}, "unindexable": {kind},
+        #                 "view": (token, series, positions) or None, "pinned": bytes of series}
+        self._columns = {}
+        self._used = OrderedDict()
+        self._lock = threading.RLock()
+
+    @property
+    def nbytes(self):
+        with self._lock:
+            total = sum(index.nbytes for entry in self._columns.values() for index in entry["indexes"].values())
+            views = {id(entry["view"][2]): entry["view"][2].nbytes for entry in self._columns.values() if entry["view"]}
+            return total + sum(views.values()) + self.pinned_nbytes
+
+    @property
+    def pinned_nbytes(self):
+        """Memory of indexed column versions that only the indexes still hold."""
+        with self._lock:
+            return sum(self._pinned(entry) for entry in self._columns.values() if entry["view"])
+
+    def _pinned(self, entry):
+        if entry.get("pinned") is None:
+            entry["pinned"] = _column_nbytes(entry["series"])
+        return entry["pinned"]
+
+    def report(self):
+        """Returns a frame with one row per index: Column, Index, Rows and Memory (MB)."""
+        with self._lock:
+            rows = [(name, kind, len(entry["series"]), index.nbytes / 1024 ** 2)
+                    for name, entry in self._columns.items() for kind, index in entry["indexes"].items()]
+        return pd.DataFrame(rows, columns=["Column", "Index", "Rows", "Memory (MB)"])
+
+    def summary(self):
+        count = sum(len(entry["indexes"]) for entry in self._columns.values())
+        return (f"Filter indexes: {count}, {self.nbytes / 1024 ** 2:.1f} MB of {self.max_bytes / 1024 ** 2:.0f} MB "
+                f"(incl. {self.pinned_nbytes / 1024 ** 2:.1f} MB of earlier column versions)")
+
+    def clear(self):
+        with self._lock:
+            self._columns.clear()
+            self._used.clear()
+
+    def invalidate(self, columns):
+        """Drops the indexes of columns whose values changed."""
+        with self._lock:
+            for name in columns:
+                self._drop(name)
+
+    def track(self, df, changed=()):
+        """Registers `df` as the current frame: a subset of the rows of the frames its columns were indexed on.
+
+        Columns in `changed` (None for all of them) had their values changed and
+        lose their indexes. The other columns must hold the same values, row for
+        row by index label, as when they were indexed; columns whose rows can't
+        be matched up by label are dropped.
+        """
+        self.apply_tracking(self.tracking(df, changed))
+
+    def tracking(self, df, changed=()):
+        """Works out what track(df, changed) would do without doing it.
+
+        Matching the rows up by label is the slow part, so an action works this
+        out on the worker and calls apply_tracking() only once `df` is shown.
+        """
+        with self._lock:
+            plan = {}
+            positions_by_base = {}
+            for name, entry in self._columns.items():
+                if changed is None or name in changed or name not in df.columns:
+                    plan[name] = (entry["token"], _DROP)
+                    continue
+                series = df[name]
+                token = column_token(series)
+                if token == entry["token"]:
+                    plan[name] = (entry["token"], None)
+                    continue
+                labels = entry["series"].index
+                key = id(labels)
+                if key not in positions_by_base:
+                    positions_by_base[key] = _label_positions(labels, df.index)
+                positions = positions_by_base[key]
+                if positions is None:
+                    plan[name] = (entry["token"], _DROP)
+                else:
+                    # Measured now, so that counting it against the cap is cheap later.
+                    self._pinned(entry)
+                    plan[name] = (entry["token"], (token, series, positions))
+            return plan
+
+    def apply_tracking(self, plan):
+        """Applies a tracking() result. Columns re-indexed since it was worked out are left alone."""
+        with self._lock:
+            for name, (base_token, view) in plan.items():
+                entry = self._columns.get(name)
+                if entry is None or entry["token"] != base_token:
+                    continue
+                if view is _DROP:
+                    self._drop(name)
+                else:
+                    entry["view"] = view
+            # The columns now pinned may have taken the total over the cap.
+            self._shrink()
+
+    def mask(self, series, operator, value):
+        """Returns the boolean mask for `series <operator> value`, or None to scan instead."""
+        if len(series) < self.min_rows or self.max_bytes <= 0:
+            return None
+        with self._lock:
+            found = self._resolve(series)
+            if found is None:
+                return None
+            entry, positions = found
+            base = entry["series"]
+            if operator in NUMERIC_OPERATORS:
+                value = float(pd.to_numeric(value))
+                index = self._index(entry, "sorted", lambda: SortedIndex(_numeric_values(base)),
+                                    SortedIndex.estimate(len(base)))
+                mask = index.mask(operator, value) if index is not None else None
+            elif operator in ("==", "!="):
+                index = self._index(entry, "values", lambda: ValueIndex(base), ValueIndex.estimate(len(base)))
+                mask = index.equal(base.dtype, value) if index is not None else None
+                if mask is not None and operator == "!=":
+                    mask = ~mask
+            elif operator == "contains":
+                mask = self._contains(entry, str(value).lower())
+            else:
+                mask = None
+        if mask is None or positions is None:
+            return mask
+        return mask[positions]
+
+    def _contains(self, entry, needle):
+        values = self._index(entry, "values", lambda: ValueIndex(entry["series"]),
+                             ValueIndex.estimate(len(entry["series"])))
+        if values is None or "values" not in entry["indexes"] or len(needle) < GRAM or "ngrams" in entry["unindexable"]:
+            return None
+        ngrams = entry["indexes"].get("ngrams")
+        if ngrams is None:
+            texts = [str(value).lower() for value in values.uniques]
+            ngrams = self._index(entry, "ngrams", lambda: NgramIndex(texts),
+                                 NgramIndex.estimate(sum(len(text) for text in texts)))
+        else:
+            self._used.move_to_end((entry["series"].name, "ngrams"))
+        hits = ngrams.hits(needle) if ngrams is not None else None
+        if hits is None:
+            return None
+        if not len(hits):
+            return np.zeros(values.rows, dtype=bool)
+        return _scatter(values.rows_of(hits), values.rows)
+
+    def _resolve(self, series):
+        """Returns (entry, positions into the indexed column or None), indexing `series` itself if it's new."""
+        token = column_token(series)
+        entry = self._columns.get(series.name)
+        if entry is not None:
+            if token == entry["token"]:
+                return entry, None
+            if entry["view"] is not None and entry["view"][0] == token:
+                return entry, entry["view"][2]
+            self._drop(series.name)
+        entry = {"token": token, "series": series, "indexes": {}, "unindexable": set(), "view": None}
+        self._columns[series.name] = entry
+        return entry, None
+
+    def _index(self, entry, kind, build, estimate):
+        name = entry["series"].name
+        index = entry["indexes"].get(kind)
+        if index is not None:
+            self._used.move_to_end((name, kind))
+            return index
+        if estimate > self.max_bytes or kind in entry["unindexable"]:
+            return None
+        try:
+            index = build()
+        except ValueError:
+            # Values this kind of index can't hold; the column is scanned instead.
+            entry["unindexable"].add(kind)
+            return None
+        entry["indexes"][kind] = index
+        self._used[(name, kind)] = None
+        self._shrink(keep=name)
+        if self.nbytes > self.max_bytes:
+            # Still over: answer this filter with it, but don't keep it.
+            self._evict(name, kind)
+        return index
+
+    def _shrink(self, keep=None):
+        """Evicts least recently used indexes until under the cap, sparing column `keep`'s."""
+        for oldest in [key for key in self._used if key[0] != keep]:
+            if self.nbytes <= self.max_bytes:
+                break
+            self._evict(*oldest)
+
+    def _evict(self, name, kind):
+        entry = self._columns.get(name)
+        if entry is None or kind not in entry["indexes"]:
+            return
+        # The trigram index is read through the value index, so it goes with it.
+        for evicted in [kind, "ngrams"] if kind == "values" else [kind]:
+            if entry["indexes"].pop(evicted, None) is not None:
+                del self._used[(name, evicted)]
+        if not entry["indexes"]:
+            del self._columns[name]
+
+    def _drop(self, name):
+        entry = self._columns.pop(name, None)
+        if entry is not None:
+            for kind in entry["indexes"]:
+                self._used.pop((name, kind), None)
+
+
+def _column_nbytes(series, sample_rows=SAMPLE_ROWS):
+    """Memory of a column. Measuring every Python object of an object column takes
+    seconds on millions of rows, so those are estimated from a random sample of rows."""
+    if series.dtype != object or len(series) <= sample_rows:
+        return int(series.memory_usage(index=False, deep=True))
+    sample = series.iloc[np.random.default_rng(0).integers(0, len(series), sample_rows)]
+    objects = sample.memory_usage(index=False, deep=True) - sample.memory_usage(index=False)
+    return int(series.memory_usage(index=False) + objects * len(series) / len(sample))
+
+def _label_positions(labels, target):
+    """Positions of `target`'s labels in `labels`, or None if some are missing or labels repeat."""
+    if isinstance(labels, pd.RangeIndex) and labels.start == 0 and labels.step == 1:
+        if isinstance(target, pd.RangeIndex) and target.step == 1:
+            if target.start >= 0 and target.stop <= labels.stop:
+                return np.arange(target.start, target.stop, dtype=_positions_dtype(len(labels)))
+            return None
+        if pd.api.types.is_integer_dtype(target.dtype):
+            positions = target.to_numpy()
+            if len(positions) and (positions.min() < 0 or positions.max() >= labels.stop):
+                return None
+            return positions.astype(_positions_dtype(len(labels)), copy=False)
+        return None
+    if not labels.is_unique:
+        return None
+    positions = labels.get_indexer(target)
+    if (positions < 0).any():
+        return None
+    return positions.astype(_positions_dtype(len(labels)), copy=False)
@@ -1,31 +1,473 @@
 # data_logic.py
 
 import pandas as pd
+import numpy as np
+import dedupe
 
-def remove_duplicates_logic(df):
-    """Returns a new DataFrame with duplicate rows removed."""
+def remove_duplicates_logic(df, columns=None, keep="first", order_by=None):
+    """Returns a new DataFrame with duplicate rows removed.
+
+    With `columns`, rows count as duplicates when those columns match. `keep`
+    picks the row that stays (see dedupe.KEEP_POLICIES): "max"/"min" keep the
+    row with the highest/lowest `order_by`, e.g. the latest by timestamp.
+    """
     if df is None:
         return None
-    return df.drop_duplicates()
+    if keep in ("first", "last"):
+        # pandas' own hash-based drop_duplicates is exact and fastest for a frame in memory.
+        return df.drop_duplicates(subset=columns, keep=keep)
+    return dedupe.drop_duplicates(df, columns, keep, order_by)
+
+MISSING_VALUE_ACTIONS = ["Drop Rows", "Fill with Mean", "Fill with Median", "Fill with Mode", "Fill with Value:",
+                         "Forward Fill", "Backward Fill", "Interpolate"]
+# These can take their statistic per group of another column instead of over the whole column.
+GROUPED_ACTIONS = ["Fill with Mean", "Fill with Median", "Fill with Mode"]
+NUMERIC_ACTIONS = ["Fill with Mean", "Fill with Median", "Interpolate"]
+
+def missing_value_strategy(action, custom_value=None, group_by=None):
+    return {"action": action, "custom_value": custom_value, "group_by": group_by}
 
-def handle_missing_values_logic(df, column, action, custom_value=None):
+def handle_missing_values_logic(df, column, action, custom_value=None, group_by=None):
     """Returns a new DataFrame with missing values handled."""
-    if df is None or not column or not action:
+    if df is None or not column or action not in MISSING_VALUE_ACTIONS:
+        return df
+    return handle_missing_values_batch_logic(df, {column: missing_value_strategy(action, custom_value, group_by)})
+
+def handle_missing_values_batch_logic(df, strategies):
+    """Returns a new DataFrame with the missing values of several columns handled at once.
+
+    `strategies` maps each column to an action name or to a
+    missing_value_strategy() dict. Rows missing a "Drop Rows" column are
+    dropped first and every statistic is taken from the rows that remain.
+    Columns sharing an action (and group column) are computed together in one
+    vectorized call. Only columns that had missing values are copied; the
+    others share buffers with the input.
+    """
+    if df is None or not strategies:
+        return df
+    strategies = {column: normalize_strategy(spec) for column, spec in strategies.items()}
+    drop = [column for column, strategy in strategies.items() if strategy["action"] == "Drop Rows"]
+    if drop:
+        df = df.dropna(subset=drop)
+    filled = _filled_columns(df, {column: strategy for column, strategy in strategies.items()
+                                  if strategy["action"] != "Drop Rows"})
+    if not filled:
         return df
+    df_copy = df.copy(deep=False)
+    for column, values in filled.items():
+        df_copy[column] = values
+    return df_copy
+
+def normalize_strategy(spec):
+    """Returns the missing_value_strategy() dict for an action name or strategy dict, after checking it."""
+    strategy = missing_value_strategy(spec) if isinstance(spec, str) else missing_value_strategy(**spec)
+    if strategy["action"] not in MISSING_VALUE_ACTIONS:
+        raise ValueError(f"Unknown missing value action: {strategy['action']}")
+    if strategy["group_by"] is not None and strategy["action"] not in GROUPED_ACTIONS:
+        raise ValueError(f"{strategy['action']} can't be applied per group.")
+    return strategy
 
-    df_copy = df.copy()
+def _filled_columns(df, strategies):
+    """Returns {column: filled Series}, batching columns that share an action and group column."""
+    batches = {}
+    for column, strategy in strategies.items():
+        if strategy["action"] in NUMERIC_ACTIONS and not pd.api.types.is_numeric_dtype(df[column]):
+            raise TypeError(f"{strategy['action']} can only be used on numeric columns.")
+        if not df[column].hasnans:
+            continue
+        batches.setdefault((strategy["action"], strategy["group_by"]), []).append(column)
 
-    if action == "Drop Rows":
-        df_copy.dropna(subset=[column], inplace=True)
-    elif action in ["Fill with Mean", "Fill with Median"]:
-        if pd.api.types.is_numeric_dtype(df_copy[column]):
-            fill_value = df_copy[column].mean() if action == "Fill with Mean" else df_copy[column].median()
-            df_copy[column].fillna(fill_value, inplace=True)
+    filled = {}
+    for (action, group_by), columns in batches.items():
+        if group_by is not None:
+            values = _group_fill_values(df, columns, action, group_by)
+            for column in columns:
+                filled[column] = fill_from(df[column], values[column])
+        elif action in ["Fill with Mean", "Fill with Median"]:
+            stats = df[columns].mean() if action == "Fill with Mean" else df[columns].median()
+            for column in columns:
+                filled[column] = fill_column(df[column], stats[column])
+        elif action == "Fill with Mode":
+            for column in columns:
+                mode = df[column].mode()
+                if len(mode):
+                    filled[column] = fill_column(df[column], mode.iloc[0])
+        elif action == "Fill with Value:":
+            for column in columns:
+                filled[column] = fill_column(df[column], strategies[column]["custom_value"])
         else:
-            raise TypeError(f"{action} can only be used on numeric columns.")
-    elif action == "Fill with Mode":
-        df_copy[column].fillna(df_copy[column].mode()[0], inplace=True)
-    elif action == "Fill with Value:":
-        df_copy[column].fillna(custom_value, inplace=True)
+            if action == "Forward Fill":
+                result = df[columns].ffill()
+            elif action == "Backward Fill":
+                result = df[columns].bfill()
+            else:
+                # Linear between known values; leading and trailing gaps take the nearest one.
+                result = df[columns].interpolate(limit_direction="both")
+            filled.update(result.items())
+    return filled
+
+def _group_fill_values(df, columns, action, group_by):
+    """Returns each column's statistic within its row's `group_by` group, aligned with df."""
+    if action == "Fill with Mode":
+        return {column: df[group_by].map(group_modes(df[group_by], df[column])).to_numpy() for column in columns}
+    grouped = df.groupby(group_by, sort=False, observed=True)[columns]
+    values = grouped.transform("mean" if action == "Fill with Mean" else "median")
+    return {column: values[column].to_numpy() for column in columns}
+
+def group_modes(groups, values):
+    """Returns the most frequent value per group (the smallest one on ties), indexed by group."""
+    counts = pd.DataFrame({"group": groups.to_numpy(), "value": values.to_numpy()}) \
+        .groupby(["group", "value"], observed=True).size()
+    return modes_from_counts(counts)
+
+def modes_from_counts(counts):
+    """Like group_modes() but from (group, value)-indexed counts."""
+    # Counts come sorted by group and value, so a stable sort by count puts each
+    # group's most frequent, smallest value first.
+    top = counts.sort_values(ascending=False, kind="stable").reset_index()
+    top = top.drop_duplicates(top.columns[0])
+    return pd.Series(top.iloc[:, 1].to_numpy(), index=top.iloc[:, 0].to_numpy())
+
+def fill_from(series, values):
+    """Fills missing values from an aligned array of per-row fill values."""
+    return series.where(series.notna(), values)
+
+def fill_column(series, fill_value):
+    """Fills a column's missing values with one value."""
+    if isinstance(series.dtype, pd.CategoricalDtype) and pd.notna(fill_value) \
+            and fill_value not in series.cat.categories:
+        # Categoricals reject values outside their categories; add the fill value as one.
+        series = series.cat.add_categories([fill_value])
+    return series.fillna(fill_value)
+
+# --- Dtype optimization ---
+
+CATEGORY_MAX_RATIO = 0.5
+
+def has_arrow_strings():
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+def optimize_dtypes_logic(df, category_max_ratio=CATEGORY_MAX_RATIO, arrow_strings=True):
+    """Returns (optimized DataFrame, per-column memory report).
+
+    Integers are downcast to the smallest type that holds them and floats to
+    float32 when no value changes. Text columns with at most `category_max_ratio`
+    distinct values per row become categoricals; other text columns become
+    Arrow-backed strings when pyarrow is installed. Unchanged columns share
+    buffers with the input.
+    """
+    if df is None:
+        return None, None
+    arrow_strings = arrow_strings and has_arrow_strings()
+    optimized = df.copy(deep=False)
+    rows = []
+    for column in df.columns:
+        before = df[column]
+        after = _optimized_column(before, category_max_ratio, arrow_strings)
+        if after is not before:
+            optimized[column] = after
+        before_bytes = int(before.memory_usage(index=False, deep=True))
+        after_bytes = int(after.memory_usage(index=False, deep=True))
+        rows.append({"Column": column, "Before dtype": str(before.dtype), "After dtype": str(after.dtype),
+                     "Before (KB)": round(before_bytes / 1024, 1), "After (KB)": round(after_bytes / 1024, 1),
+                     "Saved (%)": round(100 * (1 - after_bytes / before_bytes), 1) if before_bytes else 0.0})
+    report = pd.DataFrame(rows, columns=["Column", "Before dtype", "After dtype",
+                                         "Before (KB)", "After (KB)", "Saved (%)"])
+    return optimized, report
+
+def _optimized_column(series, category_max_ratio, arrow_strings):
+    dtype = series.dtype
+    if not len(series) or pd.api.types.is_bool_dtype(dtype) or not isinstance(dtype, np.dtype):
+        return series
+    if pd.api.types.is_integer_dtype(dtype):
+        return pd.to_numeric(series, downcast="unsigned" if series.min() >= 0 else "integer")
+    if dtype == np.float64:
+        narrow = series.astype(np.float32)
+        # Only when lossless, so filters and fills see exactly the values that were loaded.
+        if np.array_equal(narrow.to_numpy(dtype=np.float64), series.to_numpy(), equal_nan=True):
+            return narrow
+        return series
+    if dtype == object and pd.api.types.infer_dtype(series, skipna=True) == "string":
+        if series.nunique() <= category_max_ratio * len(series):
+            return series.astype("category")
+        if arrow_strings:
+            return series.astype("string[pyarrow]")
+    return series
+
+# --- Filter engine ---
+# Filters are expression trees of Condition leaves combined with And / Or / Not.
+# compile_filter() validates a tree once and evaluates it as a single vectorized
+# boolean mask, reusing coerced copies of each column from a ColumnCache.
+
+FILTER_OPERATORS = ["==", "!=", ">", "<", ">=", "<=", "contains", "matches", "is null", "is not null"]
+NUMERIC_OPERATORS = [">", "<", ">=", "<="]
+UNARY_OPERATORS = ["is null", "is not null"]
+
+def column_token(series):
+    """Returns a token identifying the data behind a column; it changes whenever the column does.
+
+    Operations return new frames instead of modifying data in place, so a new
+    buffer (or extension array object) means new data.
+    """
+    array = series.array
+    if isinstance(array, pd.arrays.NumpyExtensionArray):
+        data = np.asarray(array)
+        return ("numpy", data.__array_interface__["data"][0], data.strides, len(series), str(series.dtype))
+    return ("extension", id(array), len(series), str(series.dtype))
+
+
+class ColumnCache:
+    """Per-column cache of values derived from a column (coerced copies and the like).
+
+    Entries are validated against column_token(), so they are recomputed as soon
+    as a column changes. The cached Series is kept with its entry, which keeps its
+    buffer alive and its token unique; sync() drops entries for columns that no
+    longer match the current frame so old data isn't pinned in memory.
+
+    `indexes` is an optional column_index.ColumnIndexes; filters evaluated with
+    this cache ask it first and only scan what it can't answer.
+    """
+
+    def __init__(self, indexes=None):
+        self._entries = {}
+        self.indexes = indexes
+
+    def get(self, series, kind, compute):
+        token = column_token(series)
+        entry = self._entries.get(series.name)
+        if entry is None or entry[0] != token:
+            entry = (token, series, {})
+            self._entries[series.name] = entry
+        values = entry[2]
+        if kind not in values:
+            values[kind] = compute(series)
+        return values[kind]
+
+    def peek(self, series, kind):
+        """Returns the cached value for this version of the column, or None."""
+        entry = self._entries.get(series.name)
+        if entry is None or entry[0] != column_token(series):
+            return None
+        return entry[2].get(kind)
+
+    def put(self, series, kind, value):
+        """Stores a value derived some other way, e.g. updated from an older version's."""
+        self.get(series, kind, lambda series: value)
+        self._entries[series.name][2][kind] = value
+
+    def sync(self, df):
+        for name in list(self._entries):
+            if name not in df.columns or column_token(df[name]) != self._entries[name][0]:
+                del self._entries[name]
+
+    def clear(self):
+        self._entries.clear()
+        if self.indexes is not None:
+            self.indexes.clear()
+
+
+def _numeric_values(series):
+    return pd.to_numeric(series, errors='coerce').to_numpy(dtype="float64", na_value=np.nan)
+
+def _string_values(series):
+    return series.astype(str)
+
+def _lower_string_codes(series):
+    # Factorized so substring tests run once per distinct value rather than once per row.
+    # Nulls get code -1 and never match; categoricals and Arrow strings factorize without a copy.
+    codes, uniques = pd.factorize(series)
+    return codes, [str(value).lower() for value in uniques]
+
+
+class Condition:
+    """A single-column test, e.g. Condition('price', '>', '10')."""
 
-    return df_copy
\ No newline at end of file
+    def __init__(self, column, operator, value=None):
+        if operator not in FILTER_OPERATORS:
+            raise ValueError(f"Unknown filter operator '{operator}'.")
+        self.column = column
+        self.operator = operator
+        self.value = value
+
+    @property
+    def columns(self):
+        return frozenset([self.column])
+
+    def to_dict(self):
+        return {"column": self.column, "operator": self.operator, "value": self.value}
+
+    def __str__(self):
+        if self.operator in UNARY_OPERATORS:
+            return f"'{self.column}' {self.operator}"
+        return f"'{self.column}' {self.operator} '{self.value}'"
+
+    def evaluate(self, df, cache):
+        series = df[self.column]
+        operator, value = self.operator, self.value
+        if cache.indexes is not None:
+            mask = cache.indexes.mask(series, operator, value)
+            if mask is not None:
+                return mask
+        if operator in NUMERIC_OPERATORS:
+            numeric = cache.get(series, "numeric", _numeric_values)
+            value = float(pd.to_numeric(value))
+            with np.errstate(invalid="ignore"):
+                if operator == ">": return numeric > value
+                elif operator == "<": return numeric < value
+                elif operator == ">=": return numeric >= value
+                else: return numeric <= value
+        elif operator == "contains":
+            # Literal, case-insensitive substring match against the cached distinct values.
+            codes, uniques = cache.get(series, "lower_codes", _lower_string_codes)
+            needle = str(value).lower()
+            hits = np.fromiter((needle in text for text in uniques), dtype=bool, count=len(uniques))
+            # The trailing False is what code -1 (a null) picks up.
+            return np.append(hits, False)[codes]
+        elif operator == "matches":
+            strings = cache.get(series, "string", _string_values)
+            return strings.str.contains(value, case=False, regex=True, na=False).to_numpy(dtype=bool)
+        elif operator == "is null":
+            return series.isnull().to_numpy()
+        elif operator == "is not null":
+            return series.notnull().to_numpy()
+        try:
+            converted_value = series.dtype.type(value)
+            matches = (series == converted_value).to_numpy(dtype=bool, na_value=False)
+        except (ValueError, TypeError, OverflowError):
+            matches = (cache.get(series, "string", _string_values) == value).to_numpy(dtype=bool)
+        return matches if operator == "==" else ~matches
+
+
+class And:
+    def __init__(self, *terms):
+        self.terms = terms
+
+    @property
+    def columns(self):
+        return frozenset().union(*(term.columns for term in self.terms))
+
+    def to_dict(self):
+        return {"and": [term.to_dict() for term in self.terms]}
+
+    def __str__(self):
+        return " AND ".join(_grouped(term) for term in self.terms)
+
+    def evaluate(self, df, cache):
+        mask = np.ones(len(df), dtype=bool)
+        for term in self.terms:
+            np.logical_and(mask, term.evaluate(df, cache), out=mask)
+        return mask
+
+
+class Or:
+    def __init__(self, *terms):
+        self.terms = terms
+
+    @property
+    def columns(self):
+        return frozenset().union(*(term.columns for term in self.terms))
+
+    def to_dict(self):
+        return {"or": [term.to_dict() for term in self.terms]}
+
+    def __str__(self):
+        return " OR ".join(_grouped(term) for term in self.terms)
+
+    def evaluate(self, df, cache):
+        mask = np.zeros(len(df), dtype=bool)
+        for term in self.terms:
+            np.logical_or(mask, term.evaluate(df, cache), out=mask)
+        return mask
+
+
+class Not:
+    def __init__(self, term):
+        self.term = term
+
+    @property
+    def columns(self):
+        return self.term.columns
+
+    def to_dict(self):
+        return {"not": self.term.to_dict()}
+
+    def __str__(self):
+        return f"NOT {_grouped(self.term)}"
+
+    def evaluate(self, df, cache):
+        return ~self.term.evaluate(df, cache)
+
+
+def expression_from_dict(data):
+    """Rebuilds a filter expression from the output of its to_dict()."""
+    if "and" in data:
+        return And(*map(expression_from_dict, data["and"]))
+    if "or" in data:
+        return Or(*map(expression_from_dict, data["or"]))
+    if "not" in data:
+        return Not(expression_from_dict(data["not"]))
+    return Condition(data["column"], data["operator"], data.get("value"))
+
+def _grouped(term):
+    return f"({term})" if isinstance(term, (And, Or)) else str(term)
+
+def _flatten(expression):
+    """Merges nested And/And and Or/Or nodes and removes double negation."""
+    if isinstance(expression, (And, Or)):
+        terms = []
+        for term in map(_flatten, expression.terms):
+            terms.extend(term.terms if type(term) is type(expression) else [term])
+        return terms[0] if len(terms) == 1 else type(expression)(*terms)
+    if isinstance(expression, Not):
+        inner = _flatten(expression.term)
+        return inner.term if isinstance(inner, Not) else Not(inner)
+    return expression
+
+
+class CompiledFilter:
+    """A validated filter expression, evaluated over a frame as one boolean mask."""
+
+    def __init__(self, expression, columns):
+        self.expression = expression
+        self.columns = columns
+
+    def __str__(self):
+        return str(self.expression)
+
+    def mask(self, df, cache=None):
+        missing = self.columns - set(df.columns)
+        if missing:
+            raise KeyError(f"Filter refers to missing column(s): {', '.join(map(str, sorted(missing)))}")
+        if cache is None:
+            cache = ColumnCache()
+        else:
+            cache.sync(df)
+        return self.expression.evaluate(df, cache)
+
+    def apply(self, df, cache=None):
+        return df[self.mask(df, cache)]
+
+def compile_filter(expression):
+    """Validates and flattens a filter expression so it can be evaluated in one pass."""
+    expression = _flatten(expression)
+    return CompiledFilter(expression, expression.columns)
+
+def filter_mask_logic(df, column, operator, value=None, cache=None):
+    """Returns a boolean array marking the rows where `column` matches the condition."""
+    return compile_filter(Condition(column, operator, value)).mask(df, cache)
+
+def filter_logic(df, column, operator, value=None, cache=None):
+    """Returns a new DataFrame with only the rows where `column` matches the condition."""
+    if df is None or not column or not operator:
+        return df
+    return df[filter_mask_logic(df, column, operator, value, cache)]
+
+def filter_expression_logic(df, expression, cache=None):
+    """Returns a new DataFrame with only the rows matching a compound filter expression."""
+    if df is None or expression is None:
+        return df
+    return compile_filter(expression).apply(df, cache)
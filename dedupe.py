@@ -0,0 +1,353 @@
+# dedupe.py
+
+import numpy as np
+import pandas as pd
+
+# Which row of each group of duplicates survives: the first or last in file
+# order, or the one with the highest ("max") or lowest ("min") value in an
+# ordering column, e.g. the latest record by timestamp.
+KEEP_POLICIES = ("first", "last", "max", "min")
+
+def key_frame(df, columns=None):
+    """Returns the columns duplicates are judged on: `columns`, or every column."""
+    return df if columns is None else df[list(columns)]
+
+def _numbers(series):
+    """Returns (whole numbers as int64, which rows hold one, float64 values) for a numeric column.
+
+    Integers stay int64, so large IDs keep every digit; a float counts as a
+    whole number when int64 holds it exactly. Comparing and hashing through
+    this makes 3 in an int64 chunk match 3.0 in a float64 one.
+    """
+    if pd.api.types.is_integer_dtype(series):
+        whole = ~series.isna().to_numpy()
+        return series.to_numpy(dtype="int64", na_value=0), whole, series.to_numpy(dtype="float64", na_value=np.nan)
+    floats = series.to_numpy(dtype="float64", na_value=np.nan)
+    with np.errstate(invalid="ignore"):
+        whole = np.isfinite(floats) & (floats == np.trunc(floats)) & (np.abs(floats) < 2.0 ** 63)
+    return np.where(whole, floats, 0).astype(np.int64), whole, floats
+
+def _is_number(series):
+    return pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series)
+
+def _number_hashes(series):
+    ints, whole, floats = _numbers(series)
+    hashes = pd.util.hash_array(ints)
+    if not whole.all():
+        hashes[~whole] = pd.util.hash_array(floats[~whole])
+    return hashes
+
+def row_hashes(keys):
+    """Returns a uint64 fingerprint of every row of `keys`, computed column by column.
+
+    Numbers are hashed through _numbers(), so a column read as int64 in one
+    chunk and float64 in another (because of a missing value) still hashes alike.
+    """
+    hashable = {}
+    for column in keys.columns:
+        values = keys[column]
+        hashable[column] = _number_hashes(values) if _is_number(values) else values.array
+    frame = pd.DataFrame(hashable, copy=False)
+    return pd.util.hash_pandas_object(frame, index=False).to_numpy()
+
+def same_values(a, b):
+    """Elementwise equality of two equally long Series, with missing equal to missing."""
+    if a.dtype == b.dtype and isinstance(a.dtype, np.dtype) and a.dtype != object:
+        x, y = a.to_numpy(), b.to_numpy()
+    elif _is_number(a) and _is_number(b):
+        # e.g. int64 in one chunk and float64 in another
+        (ints_a, whole_a, floats_a), (ints_b, whole_b, floats_b) = _numbers(a), _numbers(b)
+        same_floats = (floats_a == floats_b) | (np.isnan(floats_a) & np.isnan(floats_b))
+        return (whole_a == whole_b) & np.where(whole_a, ints_a == ints_b, same_floats)
+    else:
+        # Anything else is compared as Python objects.
+        x, y = _object_values(a), _object_values(b)
+    # Only the values that differ are checked for being missing on both sides.
+    equal = np.asarray(x == y, dtype=bool)
+    differ = np.flatnonzero(~equal)
+    equal[differ] = pd.isna(x[differ]) & pd.isna(y[differ])
+    return equal
+
+def _object_values(series):
+    if isinstance(series.dtype, pd.api.extensions.ExtensionDtype) and not isinstance(series.dtype, pd.CategoricalDtype):
+        # pd.NA can't be compared to anything, so missing values become None.
+        return series.to_numpy(dtype=object, na_value=None)
+    return series.to_numpy(dtype=object)
+
+def _same_rows(keys, representatives):
+    equal = np.ones(len(keys), dtype=bool)
+    for column in keys.columns:
+        equal &= same_values(keys[column], representatives[column])
+    return equal
+
+
+def _first_of_codes(codes):
+    """Positions of the first row of each code, for codes numbered in order of
+    appearance (as factorize() does): the rows whose code beats all before them."""
+    return np.flatnonzero(codes > np.maximum.accumulate(np.r_[-1, codes[:-1]]))
+
+def first_occurrences(values):
+    """Returns (distinct values, position of the first row of each), in linear time."""
+    codes, uniques = pd.factorize(values)
+    return uniques, _first_of_codes(codes)
+
+
+class KeyTable:
+    """Assigns every distinct key a group id, one chunk at a time.
+
+    Rows are matched by their 64-bit row hash. The hashes seen so far are kept
+    in a few sorted runs that are merged as they grow (so inserting n keys
+    costs O(n log n) overall) and looked up with a binary search, which takes
+    16 bytes per distinct key. With verify=True, the first row of every group
+    is also kept, and each row whose hash matched is compared value by value
+    with it, so a hash collision never merges two different keys; that costs
+    the memory of the distinct keys themselves.
+    """
+
+    def __init__(self, verify=True):
+        self.verify = verify
+        self.groups = 0
+        self._runs = []
+        # (first group id, rows) blocks of the first row of each group, in id order.
+        self._representatives = []
+        self._starts = []
+        # hash -> extra group ids for the (very rare) different keys sharing a hash.
+        self._collisions = {}
+
+    @property
+    def nbytes(self):
+        runs = sum(hashes.nbytes + ids.nbytes for hashes, ids in self._runs)
+        return runs + sum(int(block.memory_usage(deep=True).sum()) for block in self._representatives)
+
+    def assign(self, keys):
+        """Returns the group id of every row of `keys`, creating groups for new keys.
+
+        New groups are numbered in order of their first row.
+        """
+        hashes = row_hashes(keys)
+        codes, uniques = pd.factorize(hashes)
+        ids = self._lookup(uniques)
+        new = ids < 0
+        ids[new] = self.groups + np.arange(new.sum())
+        self._insert(uniques[new], ids[new])
+        self.groups += int(new.sum())
+        ids = ids[codes]
+        if not self.verify:
+            return ids
+        first_rows = _first_of_codes(codes)
+        self._add_representatives(keys.iloc[first_rows[new]])
+        # Every row except a new group's first one matched on hash alone; check its values.
+        check = np.ones(len(keys), dtype=bool)
+        check[first_rows[new]] = False
+        check = np.flatnonzero(check)
+        if len(check):
+            matched = _same_rows(keys.iloc[check].reset_index(drop=True), self.representatives(ids[check]))
+            for row in check[~matched]:
+                ids[row] = self._resolve_collision(keys.iloc[[row]], hashes[row])
+        return ids
+
+    def first_rows(self, keys):
+        """Returns a mask of the rows whose key was not seen in this chunk or any before."""
+        before = self.groups
+        ids = self.assign(keys)
+        mask = np.zeros(len(ids), dtype=bool)
+        mask[first_occurrences(ids)[1]] = True
+        return mask & (ids >= before)
+
+    def representatives(self, ids):
+        """Returns the first row of each group in `ids` (requires verify=True)."""
+        blocks = np.searchsorted(self._starts, ids, side="right") - 1
+        pieces, order = [], []
+        for block in np.unique(blocks):
+            rows = np.flatnonzero(blocks == block)
+            pieces.append(self._representatives[block].iloc[ids[rows] - self._starts[block]])
+            order.append(rows)
+        if not pieces:
+            return self._representatives[0].iloc[:0] if self._representatives else pd.DataFrame()
+        combined = pd.concat(pieces, ignore_index=True)
+        return combined.iloc[np.argsort(np.concatenate(order), kind="stable")].reset_index(drop=True)
+
+    def _lookup(self, hashes):
+        ids = np.full(len(hashes), -1, dtype=np.int64)
+        for run_hashes, run_ids in self._runs:
+            positions = np.minimum(np.searchsorted(run_hashes, hashes), len(run_hashes) - 1)
+            found = run_hashes[positions] == hashes
+            ids[found] = run_ids[positions[found]]
+        return ids
+
+    def _insert(self, hashes, ids):
+        if not len(hashes):
+            return
+        order = np.argsort(hashes, kind="stable")
+        self._runs.append((hashes[order], ids[order]))
+        # Merge while a run is no more than twice the size of the one after it,
+        # which keeps the number of runs logarithmic in the number of keys.
+        while len(self._runs) > 1 and len(self._runs[-2][0]) <= 2 * len(self._runs[-1][0]):
+            (h1, i1), (h2, i2) = self._runs.pop(), self._runs.pop()
+            merged = np.concatenate([h2, h1])
+            order = np.argsort(merged, kind="stable")
+            self._runs.append((merged[order], np.concatenate([i2, i1])[order]))
+
+    def _add_representatives(self, rows):
+        if len(rows):
+            self._starts.append(self.groups - len(rows))
+            self._representatives.append(rows.reset_index(drop=True))
+
+    def _resolve_collision(self, row, row_hash):
+        """Finds or creates the group of a row whose hash belongs to a different key."""
+        extra = self._collisions.setdefault(row_hash, [])
+        for group in extra:
+            if _same_rows(row.reset_index(drop=True), self.representatives(np.array([group]))).all():
+                return group
+        group = self.groups
+        self.groups += 1
+        self._add_representatives(row)
+        extra.append(group)
+        return group
+
+
+def _order_codes(values, keep):
+    """Ranks an ordering column so that missing values always lose."""
+    codes, uniques = pd.factorize(values, sort=True)
+    if keep == "min":
+        codes = np.where(codes < 0, len(uniques), codes)
+    return codes
+
+def chunk_winners(ids, keep, order=None):
+    """Returns (group ids, row positions) of the row each group keeps within one frame.
+
+    Ties in the ordering column go to the first row for "min" and the last for "max".
+    """
+    positions = np.arange(len(ids))
+    if keep == "first":
+        return first_occurrences(ids)
+    if keep == "last":
+        groups, rows = first_occurrences(ids[::-1])
+        return groups, len(ids) - 1 - rows
+    sort = np.lexsort((positions, _order_codes(order, keep), ids))
+    ids = ids[sort]
+    boundaries = np.flatnonzero(np.r_[True, ids[1:] != ids[:-1]])
+    if keep == "max":
+        boundaries = np.r_[boundaries[1:], len(ids)] - 1
+    return ids[boundaries], sort[boundaries]
+
+def _check_policy(keep, order_by):
+    if keep not in KEEP_POLICIES:
+        raise ValueError(f"Unknown keep policy: {keep}")
+    if keep in ("max", "min") and order_by is None:
+        raise ValueError(f"Keeping the {keep} row needs an ordering column.")
+
+def keep_mask(df, columns=None, keep="first", order_by=None, verify=True):
+    """Returns a boolean mask of the rows of df to keep, one per distinct key."""
+    _check_policy(keep, order_by)
+    ids = KeyTable(verify).assign(key_frame(df, columns))
+    _, rows = chunk_winners(ids, keep, None if order_by is None else df[order_by])
+    mask = np.zeros(len(df), dtype=bool)
+    mask[rows] = True
+    return mask
+
+def drop_duplicates(df, columns=None, keep="first", order_by=None, verify=True):
+    """Returns df without duplicate rows (or rows repeating the key `columns`), in file order."""
+    if not len(df):
+        return df
+    return df[keep_mask(df, columns, keep, order_by, verify)]
+
+
+def _grow(array, size, fill):
+    if size <= len(array):
+        return array
+    grown = np.full(max(size, 2 * len(array)), fill, dtype=array.dtype)
+    grown[:len(array)] = array
+    return grown
+
+def _ordering_values(order):
+    if pd.api.types.is_numeric_dtype(order) and not pd.api.types.is_bool_dtype(order):
+        return order.to_numpy(dtype="float64", na_value=np.nan)
+    return order.to_numpy(dtype=object)
+
+def _is_better(new, old, keep):
+    """Whether new ordering values beat the old ones; missing values always lose."""
+    new_missing, old_missing = pd.isna(new), pd.isna(old)
+    better = old_missing & ~new_missing
+    both = ~new_missing & ~old_missing
+    try:
+        if keep == "max":
+            better[both] = new[both] >= old[both]
+        else:
+            better[both] = new[both] < old[both]
+    except TypeError as e:
+        raise ValueError(f"The ordering column mixes values that can't be compared: {e}") from e
+    return better
+
+def winning_rows(chunks, columns=None, keep="last", order_by=None, verify=True, job=None):
+    """Returns the sorted row numbers, across all chunks, of the rows to keep.
+
+    For the keep policies that depend on rows further down ("last", "max",
+    "min") a stream has to be read once before anything can be dropped. Only
+    the winning row number (and ordering value) per distinct key is held.
+    """
+    _check_policy(keep, order_by)
+    table = KeyTable(verify)
+    best_rows = np.empty(0, dtype=np.int64)
+    best_values = None
+    offset = 0
+    for chunk in chunks:
+        if job is not None:
+            job.check_cancelled()
+        ids = table.assign(key_frame(chunk, columns))
+        order = None if order_by is None else chunk[order_by]
+        groups, rows = chunk_winners(ids, keep, order)
+        best_rows = _grow(best_rows, table.groups, -1)
+        if order is None:
+            best_rows[groups] = offset + rows
+        else:
+            values = _ordering_values(order)
+            if best_values is None:
+                best_values = np.empty(0, dtype=values.dtype)
+            elif values.dtype != best_values.dtype:
+                best_values, values = best_values.astype(object), values.astype(object)
+            best_values = _grow(best_values, table.groups, np.nan)
+            new = best_rows[groups] < 0
+            better = new | _is_better(values[rows], best_values[groups], keep)
+            best_rows[groups[better]] = offset + rows[better]
+            best_values[groups[better]] = values[rows[better]]
+        offset += len(chunk)
+        if job is not None:
+            job.report(f"{offset:,} rows scanned for duplicates")
+    return np.sort(best_rows[:table.groups])
+
+
+def duplicate_stats(chunks, columns=None, top=10, job=None):
+    """Summarizes the duplicate groups of a frame or stream without collecting the duplicates.
+
+    Only a count and the first row per distinct key are kept. Returns a dict
+    with the row, distinct-key and duplicate counts, `group_sizes` (number of
+    groups of each size, for sizes above one) and `top`, the keys of the
+    largest groups with their row counts.
+    """
+    table = KeyTable(verify=True)
+    counts = np.zeros(0, dtype=np.int64)
+    rows = 0
+    for chunk in chunks:
+        if job is not None:
+            job.check_cancelled()
+        ids = table.assign(key_frame(chunk, columns))
+        counts = _grow(counts, table.groups, 0)
+        counts[:table.groups] += np.bincount(ids, minlength=table.groups)
+        rows += len(chunk)
+        if job is not None:
+            job.report(f"{rows:,} rows scanned for duplicates")
+    counts = counts[:table.groups]
+    repeated = np.flatnonzero(counts > 1)
+    largest = repeated[np.argsort(-counts[repeated], kind="stable")[:top]]
+    top_groups = table.representatives(largest)
+    top_groups.insert(len(top_groups.columns), "Rows", counts[largest])
+    return {
+        "rows": rows,
+        "distinct": table.groups,
+        "duplicate_rows": rows - table.groups,
+        "duplicate_groups": len(repeated),
+        "largest_group": int(counts.max()) if len(counts) else 0,
+        "group_sizes": pd.Series(counts[repeated]).value_counts().sort_index(),
+        "top": top_groups,
+    }
@@ -0,0 +1,151 @@
+# export.py
+
+import os
+import tempfile
+import pandas as pd
+
+EXPORT_CHUNK_ROWS = 250_000
+# (file dialog label, extension) pairs; the extension picks the format.
+EXPORT_FILETYPES = [
+    ("CSV files", "*.csv"),
+    ("Gzip-compressed CSV", "*.csv.gz"),
+    ("Zstandard-compressed CSV", "*.csv.zst"),
+    ("Parquet files", "*.parquet"),
+    ("Feather files", "*.feather"),
+]
+FORMATS = {".csv": ("csv", None), ".csv.gz": ("csv", "gzip"), ".csv.zst": ("csv", "zstd"),
+           ".parquet": ("parquet", None), ".feather": ("feather", None)}
+
+def detect_format(filepath):
+    """Returns (format, compression) for a path from its extension."""
+    name = filepath.lower()
+    for extension in sorted(FORMATS, key=len, reverse=True):
+        if name.endswith(extension):
+            return FORMATS[extension]
+    raise ValueError(f"Unsupported export format: {os.path.basename(filepath)}")
+
+def frame_chunks(df, chunk_rows=EXPORT_CHUNK_ROWS):
+    """Yields row slices of an in-memory frame; slices are views, not copies."""
+    for start in range(0, len(df), chunk_rows):
+        yield df.iloc[start:start + chunk_rows]
+
+def export_chunks(chunks, filepath, columns, job=None, total_rows=None, schema_from=None, reread=None):
+    """Writes a stream of chunks to filepath in the format its extension names.
+
+    Output goes to a temporary file next to the target, renamed over it only
+    once everything is written, so a failed or cancelled export never leaves a
+    partial file behind. `columns` is used when there are no chunks at all.
+    Returns the number of rows written.
+
+    Parquet and Feather need one schema for the whole file. It is taken from
+    `schema_from` (the whole in-memory frame) when given, else from the first
+    chunk; later chunks are cast to it, e.g. an all-null column to strings or
+    whole floats to int64. When a chunk doesn't fit, e.g. 2.5 after a column
+    of ints, the types are widened and the file is written again from
+    `reread()`, a fresh iterator over the same chunks.
+    """
+    fmt, compression = detect_format(filepath)
+    directory = os.path.dirname(os.path.abspath(filepath))
+    fd, tmp_path = tempfile.mkstemp(prefix=".dw_export_", suffix=".tmp", dir=directory)
+    os.close(fd)
+    try:
+        writer = {"csv": _write_csv, "parquet": _write_parquet, "feather": _write_feather}[fmt]
+        schema = _arrow_schema(schema_from) if schema_from is not None and fmt != "csv" else None
+        rows = writer(_progress(chunks, job, total_rows), tmp_path, compression, columns,
+                      schema=schema, reread=None if reread is None else lambda: _progress(reread(), job, total_rows))
+        if job is not None:
+            job.check_cancelled()
+        os.replace(tmp_path, filepath)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+    return rows
+
+def _progress(chunks, job, total_rows):
+    rows = 0
+    for chunk in chunks:
+        if job is not None:
+            job.check_cancelled()
+        yield chunk
+        rows += len(chunk)
+        if job is not None:
+            job.report(f"{rows:,} of {total_rows:,} rows written" if total_rows else f"{rows:,} rows written")
+
+def _write_csv(chunks, path, compression, columns, **unused):
+    if compression is None:
+        stream = open(path, "wb")
+    else:
+        import pyarrow as pa
+        stream = pa.CompressedOutputStream(path, compression)
+    rows, header = 0, True
+    with stream:
+        for chunk in chunks:
+            stream.write(chunk.to_csv(index=False, header=header).encode("utf-8"))
+            header = False
+            rows += len(chunk)
+        if header:
+            stream.write(pd.DataFrame(columns=columns).to_csv(index=False).encode("utf-8"))
+    return rows
+
+class _SchemaDrift(Exception):
+    """A chunk's columns don't fit the schema the file was started with; `schema` fits both."""
+
+    def __init__(self, schema):
+        super().__init__()
+        self.schema = schema
+
+def _arrow_schema(df):
+    import pyarrow as pa
+    return pa.Schema.from_pandas(df, preserve_index=False)
+
+def _arrow_table(chunk, schema):
+    import pyarrow as pa
+    table = pa.Table.from_pandas(chunk, preserve_index=False)
+    if schema is None or table.schema.equals(schema):
+        return table
+    try:
+        return table.cast(schema)
+    except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError) as e:
+        try:
+            widened = pa.unify_schemas([schema, table.schema], promote_options="permissive")
+        except (pa.ArrowInvalid, pa.ArrowTypeError) as unify_error:
+            raise ValueError(f"A column changed type between chunks and can't be written to one file: {e}") from unify_error
+        raise _SchemaDrift(widened) from e
+
+def _write_arrow(chunks, columns, open_writer, schema=None, reread=None):
+    while True:
+        try:
+            return _write_arrow_pass(chunks, columns, open_writer, schema)
+        except _SchemaDrift as drift:
+            if reread is None:
+                raise ValueError(f"A column changed type between chunks and can't be written to one file "
+                                 f"(it would need {drift.schema})") from drift
+            # Types only ever widen, so this ends after a few passes at most.
+            schema, chunks = drift.schema, reread()
+
+def _write_arrow_pass(chunks, columns, open_writer, schema):
+    writer, rows = None, 0
+    try:
+        for chunk in chunks:
+            table = _arrow_table(chunk, schema)
+            if writer is None:
+                schema = table.schema
+                writer = open_writer(schema)
+            writer.write_table(table)
+            rows += len(chunk)
+        if writer is None:
+            writer = open_writer(schema if schema is not None else _arrow_table(pd.DataFrame(columns=columns), None).schema)
+    finally:
+        if writer is not None:
+            writer.close()
+    return rows
+
+def _write_parquet(chunks, path, compression, columns, schema=None, reread=None):
+    import pyarrow.parquet as pq
+    # Each chunk becomes a row group, so memory stays at one chunk however large the output.
+    return _write_arrow(chunks, columns, lambda schema: pq.ParquetWriter(path, schema), schema, reread)
+
+def _write_feather(chunks, path, compression, columns, schema=None, reread=None):
+    import pyarrow as pa
+    # Feather v2 is the Arrow IPC file format, which can be written one record batch at a time.
+    return _write_arrow(chunks, columns, lambda schema: pa.ipc.new_file(path, schema), schema, reread)
@@ -0,0 +1,140 @@
+# grid_view.py
+
+from tkinter import TclError, ttk
+import pandas as pd
+
+NULL_TEXT = "NULL"
+DEFAULT_ROW_HEIGHT = 20
+
+def format_cell(value):
+    """Returns the display value for a single cell, showing missing values as NULL."""
+    if pd.api.types.is_scalar(value) and pd.isna(value):
+        return NULL_TEXT
+    return value
+
+def fetch_rows(df, start, stop):
+    """Returns display rows for positions [start, stop) of the DataFrame."""
+    block = df.iloc[start:stop]
+    return [[format_cell(value) for value in row] for row in block.itertuples(index=False, name=None)]
+
+def clamp_offset(offset, visible, total):
+    """Keeps the first visible row inside the frame so the last page stays full."""
+    return max(0, min(offset, total - visible))
+
+
+class VirtualGrid:
+    """Shows a DataFrame in a Treeview without inserting every row.
+
+    The Treeview only ever holds one item per visible line. Rows are read from
+    the DataFrame by position as the user scrolls, a block at a time (the
+    visible rows plus ``buffer_rows`` on either side), and NULL formatting is
+    done per cell on that block only. Refreshing therefore costs the same
+    whether the frame has a hundred rows or millions.
+    """
+
+    def __init__(self, tree, scrollbar, buffer_rows=200):
+        self.tree = tree
+        self.scrollbar = scrollbar
+        self.buffer_rows = buffer_rows
+        self.df = None
+        self.offset = 0
+        self.visible_rows = 1
+        self._block_start = 0
+        self._block = []
+
+        self.scrollbar.config(command=self.yview)
+        self.tree.bind("<Configure>", self._on_configure)
+        self.tree.bind("<MouseWheel>", self._on_mousewheel)
+        # Returning "break" stops the Treeview's own bindings from scrolling its items.
+        self.tree.bind("<Button-4>", lambda event: self.scroll(-3) or "break")
+        self.tree.bind("<Button-5>", lambda event: self.scroll(3) or "break")
+        self.tree.bind("<Prior>", lambda event: self.scroll(-self.visible_rows) or "break")
+        self.tree.bind("<Next>", lambda event: self.scroll(self.visible_rows) or "break")
+
+    def set_frame(self, df):
+        """Points the grid at a new DataFrame and redraws the visible rows."""
+        columns = list(df.columns)
+        if self.df is None or list(self.df.columns) != columns:
+            self.tree["column"] = columns
+            self.tree["show"] = "headings"
+            for column in columns:
+                self.tree.heading(column, text=column)
+                self.tree.column(column, width=100)
+        self.df = df
+        self._block = []
+        self.offset = 0
+        self.refresh()
+
+    def clear(self):
+        """Empties the grid, headings included, as before any frame was shown."""
+        self.df = None
+        self._block = []
+        self.offset = 0
+        self.tree.delete(*self.tree.get_children())
+        self.tree["column"] = ()
+        self.scrollbar.set(0, 1)
+
+    def refresh(self):
+        if self.df is None:
+            return
+        total = len(self.df)
+        self.offset = clamp_offset(self.offset, self.visible_rows, total)
+        stop = min(self.offset + self.visible_rows, total)
+        rows = self._rows(self.offset, stop)
+
+        # Reuse the existing items so scrolling only updates their values.
+        items = self.tree.get_children()
+        for item, row in zip(items, rows):
+            self.tree.item(item, values=row)
+        for row in rows[len(items):]:
+            self.tree.insert("", "end", values=row)
+        if len(items) > len(rows):
+            self.tree.delete(*items[len(rows):])
+
+        if total:
+            self.scrollbar.set(self.offset / total, stop / total)
+        else:
+            self.scrollbar.set(0, 1)
+
+    def scroll(self, rows):
+        self.offset += rows
+        self.refresh()
+
+    def yview(self, *args):
+        """Scrollbar command: translates scrollbar moves into a row offset."""
+        if self.df is None:
+            return
+        if args[0] == "moveto":
+            self.offset = int(float(args[1]) * len(self.df))
+            self.refresh()
+        elif args[0] == "scroll":
+            amount = int(args[1])
+            self.scroll(amount * self.visible_rows if args[2] == "pages" else amount)
+
+    def _rows(self, start, stop):
+        block_stop = self._block_start + len(self._block)
+        if not (self._block_start <= start and stop <= block_stop):
+            self._block_start = max(0, start - self.buffer_rows)
+            self._block = fetch_rows(self.df, self._block_start, stop + self.buffer_rows)
+        return self._block[start - self._block_start:stop - self._block_start]
+
+    def _on_configure(self, event):
+        row_height = self._row_height()
+        # One row's worth of height goes to the column headings.
+        visible = max(1, event.height // row_height - 1)
+        if visible != self.visible_rows:
+            self.visible_rows = visible
+            self.tree.config(height=visible)
+            self.refresh()
+
+    def _on_mousewheel(self, event):
+        step = -1 if event.delta > 0 else 1
+        self.scroll(step * max(1, abs(event.delta) // 120) * 3)
+        return "break"
+
+    def _row_height(self):
+        style_name = self.tree.cget("style") or "Treeview"
+        try:
+            return int(ttk.Style(self.tree).lookup(style_name, "rowheight")) or DEFAULT_ROW_HEIGHT
+        except (TclError, ValueError):
+            return DEFAULT_ROW_HEIGHT
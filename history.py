@@ -0,0 +1,293 @@
+# history.py
+
+import os
+import pickle
+import tempfile
+import numpy as np
+import pandas as pd
+
+DEFAULT_BUDGET_BYTES = 512 * 1024 ** 2
+
+def payload_nbytes(payload):
+    """Returns the approximate in-memory size of a history payload."""
+    if isinstance(payload, (pd.DataFrame, pd.Series)):
+        return int(np.sum(payload.memory_usage(index=True, deep=True)))
+    if isinstance(payload, dict):
+        return sum(payload_nbytes(value) for value in payload.values())
+    if isinstance(payload, (tuple, list)):
+        return sum(payload_nbytes(value) for value in payload)
+    if isinstance(payload, np.ndarray):
+        return payload.nbytes
+    return 0
+
+
+class Delta:
+    """One undoable action. Subclasses turn the current state into the previous one and back.
+
+    The data needed to do that is kept in ``payload``, which can be spilled to a
+    temporary file when the history runs over its memory budget.
+    """
+
+    def __init__(self, payload):
+        self._payload = payload
+        self._path = None
+        self.nbytes = payload_nbytes(payload)
+
+    @property
+    def spilled(self):
+        return self._path is not None
+
+    @property
+    def payload(self):
+        if self._path is not None:
+            with open(self._path, "rb") as f:
+                self._payload = pickle.load(f)
+            os.remove(self._path)
+            self._path = None
+        return self._payload
+
+    def spill(self, directory=None):
+        fd, path = tempfile.mkstemp(prefix="dw_history_", suffix=".pkl", dir=directory)
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump(self._payload, f, protocol=pickle.HIGHEST_PROTOCOL)
+        self._payload = None
+        self._path = path
+
+    def discard(self):
+        if self._path is not None and os.path.exists(self._path):
+            os.remove(self._path)
+        self._payload = None
+        self._path = None
+
+    def undo(self, current):
+        raise NotImplementedError
+
+    def redo(self, current):
+        raise NotImplementedError
+
+
+class Snapshot(Delta):
+    """Keeps a reference to the whole previous state, for actions with no cheaper delta.
+
+    Actions return new frames rather than modifying the old one, so the
+    previous frame is shared, not copied.
+    """
+
+    def undo(self, current):
+        previous = self.payload
+        self._payload = current
+        self.nbytes = payload_nbytes(current)
+        return previous
+
+    redo = undo
+
+
+class RowDelta(Delta):
+    """Filters and drops: keeps only the removed rows and their original positions."""
+
+    def __init__(self, removed, positions):
+        super().__init__((removed, np.asarray(positions, dtype=np.int64)))
+
+    def undo(self, current):
+        removed, positions = self.payload
+        total = len(current) + len(removed)
+        kept = np.ones(total, dtype=bool)
+        kept[positions] = False
+        source = np.empty(total, dtype=np.int64)
+        source[kept] = np.arange(len(current))
+        source[positions] = np.arange(len(current), total)
+        return pd.concat([current, removed]).iloc[source]
+
+    def redo(self, current):
+        _, positions = self.payload
+        kept = np.ones(len(current), dtype=bool)
+        kept[positions] = False
+        return current.iloc[kept]
+
+
+class CellPatch(Delta):
+    """Fills: keeps the old and new values of only the changed cells, per column."""
+
+    def __init__(self, patches):
+        # patches maps column -> (positions, old values, new values, old dtype, new dtype)
+        super().__init__(patches)
+        self.columns = list(patches)
+
+    def undo(self, current):
+        return self._apply(current, old=True)
+
+    def redo(self, current):
+        return self._apply(current, old=False)
+
+    def _apply(self, current, old):
+        # Only the patched columns are copied; the rest share buffers with `current`.
+        result = current.copy(deep=False)
+        for column, (positions, old_values, new_values, old_dtype, new_dtype) in self.payload.items():
+            values, dtype = (old_values, old_dtype) if old else (new_values, new_dtype)
+            if current[column].dtype == dtype:
+                patched = current[column].copy()
+                patched.iloc[positions] = values.to_numpy()
+            else:
+                # The action changed the dtype (e.g. a text fill on a numeric column).
+                patched = current[column].astype(object)
+                patched.iloc[positions] = values.to_numpy(dtype=object)
+                patched = patched.astype(dtype)
+            result[column] = patched
+        return result
+
+
+class CompositeDelta(Delta):
+    """Several deltas undone as one step, e.g. a batch that drops rows and fills others.
+
+    ``payload`` is the list of deltas in the order the action applied them.
+    """
+
+    def __init__(self, deltas):
+        super().__init__(list(deltas))
+        self.nbytes = sum(delta.nbytes for delta in deltas)
+        # The columns whose values changed, for those who need to know without loading the payload.
+        self.columns = [column for delta in deltas if isinstance(delta, CellPatch) for column in delta.columns]
+
+    def undo(self, current):
+        for delta in reversed(self.payload):
+            current = delta.undo(current)
+        return current
+
+    def redo(self, current):
+        for delta in self.payload:
+            current = delta.redo(current)
+        return current
+
+
+def changed_positions(old, new):
+    """Returns the positions where two aligned Series differ, treating NULL == NULL."""
+    both_null = old.isna().to_numpy() & new.isna().to_numpy()
+    try:
+        differs = old.ne(new).fillna(True).to_numpy(dtype=bool)
+    except TypeError:
+        differs = old.to_numpy(dtype=object) != new.to_numpy(dtype=object)
+    return np.flatnonzero(differs & ~both_null)
+
+def make_delta(before, after, changed_columns=None):
+    """Picks the cheapest delta that turns `after` back into `before`.
+
+    With ``changed_columns=None`` the action is assumed to only remove rows
+    (filters, drops); otherwise only the listed columns are assumed to change,
+    possibly after some rows were removed, which gives a CompositeDelta of a
+    RowDelta and a CellPatch. Anything that doesn't fit falls back to a Snapshot.
+    """
+    if not isinstance(before, pd.DataFrame) or not isinstance(after, pd.DataFrame):
+        return Snapshot(before)
+    if list(before.columns) != list(after.columns):
+        return Snapshot(before)
+
+    if changed_columns is not None and before.index.equals(after.index):
+        return _cell_patch(before, after, changed_columns)
+    kept = _kept_rows(before, after)
+    if kept is None:
+        return Snapshot(before)
+    removed_positions = np.flatnonzero(~kept)
+    rows = RowDelta(before.iloc[removed_positions], removed_positions)
+    if changed_columns is None:
+        return rows
+    # Rows were dropped, then columns filled: the patch is taken against the kept rows' old values.
+    return CompositeDelta([rows, _cell_patch(before[list(changed_columns)][kept], after, changed_columns)])
+
+def _kept_rows(before, after):
+    """Boolean mask of the rows of `before` still in `after`, or None if `after` isn't a subset of them."""
+    if not before.index.is_unique or len(after) > len(before):
+        return None
+    kept = before.index.isin(after.index)
+    return kept if kept.sum() == len(after) else None
+
+def _cell_patch(before, after, changed_columns):
+    patches = {}
+    for column in changed_columns:
+        positions = changed_positions(before[column], after[column])
+        patches[column] = (positions, before[column].iloc[positions], after[column].iloc[positions],
+                           before[column].dtype, after[column].dtype)
+    return CellPatch(patches)
+
+
+class History:
+    """Undo/redo stacks of deltas kept under a memory budget.
+
+    When the deltas held in memory exceed ``budget_bytes`` the oldest ones are
+    spilled to temporary files (``spill=True``) or dropped.
+    """
+
+    def __init__(self, budget_bytes=DEFAULT_BUDGET_BYTES, spill=True, spill_dir=None):
+        self.budget_bytes = budget_bytes
+        self.spill = spill
+        self.spill_dir = spill_dir
+        self.undo_stack = []
+        self.redo_stack = []
+
+    @property
+    def can_undo(self):
+        return bool(self.undo_stack)
+
+    @property
+    def can_redo(self):
+        return bool(self.redo_stack)
+
+    @property
+    def memory_bytes(self):
+        return sum(delta.nbytes for delta in self.undo_stack + self.redo_stack if not delta.spilled)
+
+    def record(self, before, after, changed_columns=None):
+        delta = make_delta(before, after, changed_columns)
+        self.record_delta(delta)
+        return delta
+
+    def record_delta(self, delta):
+        self.undo_stack.append(delta)
+        self._clear(self.redo_stack)
+        self._enforce_budget()
+
+    def make_room(self, nbytes):
+        """Spills (or drops) old deltas now so that `nbytes` more fit in the budget.
+
+        Lets a worker thread do the disk writes that recording a delta of that
+        size would otherwise do in record_delta().
+        """
+        self._enforce_budget(nbytes)
+
+    def undo(self, current):
+        delta = self.undo_stack.pop()
+        previous = delta.undo(current)
+        self.redo_stack.append(delta)
+        self._enforce_budget()
+        return previous
+
+    def redo(self, current):
+        delta = self.redo_stack.pop()
+        following = delta.redo(current)
+        self.undo_stack.append(delta)
+        self._enforce_budget()
+        return following
+
+    def clear(self):
+        self._clear(self.undo_stack)
+        self._clear(self.redo_stack)
+
+    def _clear(self, stack):
+        for delta in stack:
+            delta.discard()
+        stack.clear()
+
+    def _enforce_budget(self, extra=0):
+        # Oldest first: the bottom of the undo stack, then the far end of the redo stack.
+        while self.memory_bytes + extra > self.budget_bytes:
+            candidates = [d for d in self.undo_stack + self.redo_stack if not d.spilled and d.nbytes]
+            if not candidates:
+                break
+            oldest = candidates[0]
+            if self.spill:
+                oldest.spill(self.spill_dir)
+            elif oldest in self.undo_stack:
+                self.undo_stack.remove(oldest)
+                oldest.discard()
+            else:
+                self.redo_stack.remove(oldest)
+                oldest.discard()
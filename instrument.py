@@ -0,0 +1,182 @@
+# instrument.py
+
+import cProfile
+import datetime
+import io
+import json
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+import pandas as pd
+from jobs import JobCancelled
+
+PROFILE_TOP = 15
+
+def default_trace_dir():
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "data_wrangler", "traces")
+
+def current_rss():
+    """Returns this process's resident memory in bytes, or None where it can't be read."""
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except ImportError:
+        pass
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+def rows_of(value):
+    """Returns the row count of a frame, or of the first frame in a tuple result."""
+    if isinstance(value, pd.DataFrame):
+        return len(value)
+    if isinstance(value, tuple):
+        for item in value:
+            if isinstance(item, pd.DataFrame):
+                return len(item)
+    return None
+
+
+class RssSampler:
+    """Polls resident memory on a daemon thread to catch the peak reached inside a block."""
+
+    def __init__(self, interval=0.01):
+        self.interval = interval
+        self.start = self.peak = self.end = None
+        self._stop = threading.Event()
+
+    def __enter__(self):
+        self.start = self.peak = current_rss()
+        if self.start is not None:
+            self._thread = threading.Thread(target=self._sample, daemon=True)
+            self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        if self.start is not None:
+            self._stop.set()
+            self._thread.join()
+            self.end = current_rss()
+            self.peak = max(self.peak, self.end)
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            self.peak = max(self.peak, current_rss())
+
+
+class ActionMetrics:
+    """Measurements for one action. `seconds`/`cpu_seconds` cover the data work on
+    the worker thread; `render_seconds` the Treeview update on the Tk thread."""
+
+    def __init__(self, action):
+        self.action = action
+        self.started = datetime.datetime.now().isoformat(timespec="milliseconds")
+        self.status = "ok"
+        self.error = None
+        self.seconds = None
+        self.cpu_seconds = None
+        self.render_seconds = 0.0
+        self.rows_in = None
+        self.rows_out = None
+        self.memory_delta_mb = None
+        self.memory_peak_mb = None
+        self.profile = None
+
+    def to_dict(self):
+        return dict(vars(self))
+
+    def summary(self):
+        parts = [f"pandas {self.seconds:.3f}s (cpu {self.cpu_seconds:.3f}s)", f"render {self.render_seconds:.3f}s"]
+        if self.rows_in is not None or self.rows_out is not None:
+            show = lambda rows: "-" if rows is None else f"{rows:,}"
+            parts.append(f"rows {show(self.rows_in)} -> {show(self.rows_out)}")
+        if self.memory_delta_mb is not None:
+            parts.append(f"mem {self.memory_delta_mb:+.1f} MB, peak +{self.memory_peak_mb:.1f} MB")
+        return " | ".join(parts)
+
+
+class Instrument:
+    """Measures actions and appends them to a JSON-lines trace for the session.
+
+    Timings and memory are always recorded; with profile=True the action also
+    runs under cProfile and tracemalloc, and the report is saved next to the trace.
+    """
+
+    def __init__(self, trace_dir=None):
+        self.trace_dir = trace_dir or default_trace_dir()
+        session = datetime.datetime.now().strftime("%Y%m%d-%H%M%S")
+        self.trace_path = os.path.join(self.trace_dir, f"session-{session}-{os.getpid()}.jsonl")
+        self._lock = threading.Lock()
+        self._profiles = 0
+
+    def run(self, metrics, fn, *args, profile=False):
+        """Returns fn(*args), filling in metrics. Meant to run on the worker thread."""
+        profiler = cProfile.Profile() if profile else None
+        if profile:
+            tracemalloc.start()
+        started, cpu_started = time.perf_counter(), time.thread_time()
+        try:
+            with RssSampler() as rss:
+                if profiler is not None:
+                    profiler.enable()
+                try:
+                    result = fn(*args)
+                finally:
+                    if profiler is not None:
+                        profiler.disable()
+        except JobCancelled:
+            metrics.status = "cancelled"
+            raise
+        except Exception as e:
+            metrics.status, metrics.error = "error", str(e)
+            raise
+        finally:
+            metrics.seconds = time.perf_counter() - started
+            metrics.cpu_seconds = time.thread_time() - cpu_started
+            if rss.start is not None:
+                metrics.memory_delta_mb = (rss.end - rss.start) / 1024 ** 2
+                metrics.memory_peak_mb = (rss.peak - rss.start) / 1024 ** 2
+            if profile:
+                metrics.profile = self._save_profile(metrics, profiler)
+            if metrics.status == "cancelled":
+                self.write(metrics)
+        metrics.rows_out = rows_of(result)
+        return result
+
+    def write(self, metrics):
+        """Appends one action to the session trace. Tracing never fails an action."""
+        line = json.dumps(metrics.to_dict(), default=str)
+        with self._lock:
+            try:
+                os.makedirs(self.trace_dir, exist_ok=True)
+                with open(self.trace_path, "a") as f:
+                    f.write(line + "\n")
+            except OSError:
+                pass
+
+    def _save_profile(self, metrics, profiler):
+        snapshot = tracemalloc.take_snapshot()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        stream = io.StringIO()
+        stream.write(f"{metrics.action}: traced peak {peak / 1024 ** 2:.1f} MB\n\nTop allocations:\n")
+        for stat in snapshot.statistics("lineno")[:PROFILE_TOP]:
+            stream.write(f"  {stat}\n")
+        stream.write("\n")
+        pstats.Stats(profiler, stream=stream).sort_stats("cumulative").print_stats(PROFILE_TOP)
+        with self._lock:
+            self._profiles += 1
+            base = os.path.splitext(self.trace_path)[0] + f"-profile{self._profiles}"
+        try:
+            os.makedirs(self.trace_dir, exist_ok=True)
+            profiler.dump_stats(base + ".prof")
+            with open(base + ".txt", "w") as f:
+                f.write(stream.getvalue())
+        except OSError:
+            return None
+        return base + ".txt"
@@ -0,0 +1,163 @@
+# jobs.py
+
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+class JobCancelled(Exception):
+    """Raised by a job that noticed it was cancelled."""
+
+
+class Job:
+    """A unit of data work run off the Tk thread.
+
+    ``work`` is called on the worker thread with the job itself, so long
+    operations can call ``report()`` to publish progress, ``check_cancelled()``
+    to stop early and ``post()`` to hand intermediate results to the UI.
+    Exactly one of on_success, on_error or on_cancelled is called for every job.
+    """
+
+    def __init__(self, runner, description, work, on_success=None, on_error=None, on_cancelled=None):
+        self.runner = runner
+        self.description = description
+        self.work = work
+        self.on_success = on_success
+        self.on_error = on_error
+        self.on_cancelled = on_cancelled
+        self.progress = ""
+        self.started_at = None
+        self.finished_at = None
+        self._cancel_event = threading.Event()
+
+    @property
+    def cancelled(self):
+        return self._cancel_event.is_set()
+
+    @property
+    def elapsed(self):
+        if self.started_at is None:
+            return 0.0
+        return (self.finished_at or time.perf_counter()) - self.started_at
+
+    def cancel(self):
+        self._cancel_event.set()
+
+    def check_cancelled(self):
+        if self.cancelled:
+            raise JobCancelled(self.description)
+
+    def report(self, progress):
+        self.progress = progress
+
+    def post(self, callback, *args):
+        """Schedules callback(*args) on the Tk thread."""
+        self.runner.post(callback, *args)
+
+
+class JobRunner:
+    """Runs jobs in submission order on a single worker thread.
+
+    Results are delivered back on the Tk thread by polling with ``after()``,
+    and the next job only starts once the previous job's callbacks have run,
+    so a queued job always sees the state left by the one before it.
+    """
+
+    def __init__(self, widget, on_status=None, poll_ms=100):
+        self.widget = widget
+        self.on_status = on_status
+        self.poll_ms = poll_ms
+        self.pending = deque()
+        self.current = None
+        self.last = None
+        self._future = None
+        self._posted = queue.SimpleQueue()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="data-wrangler-job")
+
+    @property
+    def busy(self):
+        return self.current is not None
+
+    def submit(self, description, work, on_success=None, on_error=None, on_cancelled=None):
+        job = Job(self, description, work, on_success, on_error, on_cancelled)
+        self.pending.append(job)
+        if not self.busy:
+            self._start_next()
+        else:
+            self._notify()
+        return job
+
+    def post(self, callback, *args):
+        self._posted.put((callback, args))
+
+    def cancel_all(self):
+        for job in self.pending:
+            job.cancel()
+            self._cancelled(job)
+        self.pending.clear()
+        if self.current is not None:
+            self.current.cancel()
+        self._notify()
+
+    def shutdown(self):
+        self.cancel_all()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _start_next(self):
+        self.current = None
+        while self.pending:
+            job = self.pending.popleft()
+            if job.cancelled:
+                self._cancelled(job)
+                continue
+            self.current = job
+            job.started_at = time.perf_counter()
+            self._future = self._executor.submit(job.work, job)
+            self.widget.after(self.poll_ms, self._poll)
+            break
+        self._notify()
+
+    def _poll(self):
+        self._run_posted()
+        job = self.current
+        if not self._future.done():
+            self._notify()
+            self.widget.after(self.poll_ms, self._poll)
+            return
+
+        job.finished_at = time.perf_counter()
+        try:
+            result = self._future.result()
+        except JobCancelled:
+            self._cancelled(job)
+        except Exception as e:
+            if job.cancelled:
+                self._cancelled(job)
+            elif job.on_error is not None:
+                job.on_error(e)
+        else:
+            # A cancelled job may still run to completion; its result is discarded.
+            if job.cancelled:
+                self._cancelled(job)
+            elif job.on_success is not None:
+                job.on_success(result)
+        finally:
+            self.last = job
+            self._start_next()
+
+    def _cancelled(self, job):
+        if job.on_cancelled is not None:
+            job.on_cancelled()
+
+    def _run_posted(self):
+        while True:
+            try:
+                callback, args = self._posted.get_nowait()
+            except queue.Empty:
+                return
+            callback(*args)
+
+    def _notify(self):
+        if self.on_status is not None:
+            self.on_status(self.current, len(self.pending))
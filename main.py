@@ -1,23 +1,79 @@
 # Data Wrangler's Toolkit - Now with Descriptive Statistics
 # Dependencies: ttkbootstrap, pandas, numpy, matplotlib, openpyxl
-import data_logic
+from jobs import JobRunner
+from source_cache import SourceCache
 import ttkbootstrap as ttk
 from ttkbootstrap.constants import *
-from tkinter import filedialog, messagebox
-import pandas as pd
-import numpy as np
-from matplotlib.figure import Figure
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+from tkinter import Listbox, TclError, filedialog, messagebox
 import datetime
+import time
 import os
 
+# pandas, numpy and everything built on them take most of the startup time, so they
+# are imported by import_data_stack() once the window is up, and matplotlib by
+# import_plotting() when the first plot is prepared.
+pd = np = data_logic = dedupe = streaming = recipe = export = None
+VirtualGrid = History = Snapshot = RowDelta = CellPatch = CompositeDelta = make_delta = None
+ColumnIndexes = StatsEngine = PlotEngine = Instrument = ActionMetrics = rows_of = None
+Figure = FigureCanvasTkAgg = None
+
+def import_data_stack():
+    """Imports the data modules into this module's globals. Safe to call from any
+    thread and more than once: a second caller waits on the import lock."""
+    global pd, np, data_logic, dedupe, streaming, recipe, export
+    global VirtualGrid, History, Snapshot, RowDelta, CellPatch, CompositeDelta, StatsEngine, PlotEngine, Instrument, ActionMetrics, rows_of
+    global ColumnIndexes, make_delta
+    import pandas as pd
+    import numpy as np
+    import data_logic
+    import dedupe
+    import streaming
+    import recipe
+    import export
+    from grid_view import VirtualGrid
+    from history import History, Snapshot, RowDelta, CellPatch, CompositeDelta, make_delta
+    from column_index import ColumnIndexes
+    from stats_engine import StatsEngine
+    from plotting import PlotEngine
+    from instrument import Instrument, ActionMetrics, rows_of
+
+def import_plotting():
+    global Figure, FigureCanvasTkAgg
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+
+# Memory the undo/redo history may hold before spilling its oldest entries to disk.
+HISTORY_BUDGET_BYTES = 512 * 1024 ** 2
+SOURCE_CACHE_BYTES = 4 * 1024 ** 3
+# Memory the filter indexes may hold; the least recently used are evicted past it.
+INDEX_BUDGET_BYTES = 512 * 1024 ** 2
+# Remove Duplicates dialog labels for dedupe.KEEP_POLICIES.
+DEDUPE_KEEP = {"First": "first", "Last": "last", "Highest (latest) by": "max", "Lowest (earliest) by": "min"}
+
 class App(ttk.Window):
     def __init__(self):
         super().__init__(themename="superhero")
 
         self.df = None
-        self.undo_stack = []
-        self.redo_stack = []
+        # Set in lazy and out-of-core modes, where self.df only holds a preview of the
+        # source's plan; out-of-core sources are never collected into memory in full.
+        self.source = None
+        self.out_of_core = False
+        # Created by finish_startup() once the data modules are imported.
+        self.data_ready = False
+        self.out_of_core_threshold = None
+        self.history = None
+        self.column_cache = None
+        self.column_indexes = None
+        self.recipe = None
+        self.stats = None
+        self.plots = None
+        self.instrument = None
+        self.source_cache = SourceCache(max_bytes=SOURCE_CACHE_BYTES)
+        # Data work runs on a worker thread; results come back through after() callbacks.
+        self.jobs = JobRunner(self, on_status=self.update_job_status)
+        self.render_seconds = 0.0
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
 
         self.title("Data Wrangler's Toolkit")
         self.geometry("1200x850")
@@ -30,12 +86,23 @@ class App(ttk.Window):
         # ... (Top frame widgets are the same)
         self.load_button = ttk.Button(top_frame, text="Load CSV/Excel", command=self.load_file, bootstyle="primary")
         self.load_button.pack(side=LEFT, padx=(0, 10))
-        self.export_button = ttk.Button(top_frame, text="Export to CSV", command=self.export_to_csv, bootstyle="success")
+        self.export_button = ttk.Button(top_frame, text="Export", command=self.export_data, bootstyle="success")
         self.export_button.pack(side=LEFT, padx=(0,10))
         self.undo_button = ttk.Button(top_frame, text="Undo", command=self.undo_action, state="disabled")
         self.undo_button.pack(side=LEFT, padx=(0, 5))
         self.redo_button = ttk.Button(top_frame, text="Redo", command=self.redo_action, state="disabled")
         self.redo_button.pack(side=LEFT)
+        self.save_recipe_button = ttk.Button(top_frame, text="Save Recipe", command=self.save_recipe, bootstyle="secondary")
+        self.save_recipe_button.pack(side=LEFT, padx=(10, 0))
+        self.profile_next = ttk.BooleanVar(value=False)
+        self.profile_check = ttk.Checkbutton(top_frame, text="Profile next action", variable=self.profile_next, bootstyle="round-toggle")
+        self.profile_check.pack(side=LEFT, padx=(10, 0))
+        self.lazy_mode = ttk.BooleanVar(value=False)
+        self.lazy_check = ttk.Checkbutton(top_frame, text="Lazy mode", variable=self.lazy_mode, bootstyle="round-toggle")
+        self.lazy_check.pack(side=LEFT, padx=(10, 0))
+        self.optimize_dtypes = ttk.BooleanVar(value=False)
+        self.optimize_check = ttk.Checkbutton(top_frame, text="Optimize dtypes", variable=self.optimize_dtypes, bootstyle="round-toggle")
+        self.optimize_check.pack(side=LEFT, padx=(10, 0))
         self.file_label = ttk.Label(top_frame, text="No file loaded.")
         self.file_label.pack(side=LEFT, padx=10)
         
@@ -55,16 +122,28 @@ class App(ttk.Window):
         self.custom_value_entry.pack(side=LEFT, padx=(0, 5))
         self.apply_action_button = ttk.Button(action_frame, text="Apply", command=self.handle_missing_values, bootstyle="info")
         self.apply_action_button.pack(side=LEFT)
+        self.batch_action_button = ttk.Button(action_frame, text="Batch...", command=self.open_missing_values_batch, bootstyle="info-outline")
+        self.batch_action_button.pack(side=LEFT, padx=(5, 0))
         ttk.Separator(action_frame, orient='vertical').pack(side=LEFT, padx=15, fill='y')
         ttk.Label(action_frame, text="Analysis:").pack(side=LEFT)
         self.plot_type_selector = ttk.Combobox(action_frame, state="readonly", width=20,
-                                               values=["Histogram (Numeric)", "Bar Chart (Categorical)"])
+                                               values=["Histogram (Numeric)", "Bar Chart (Categorical)",
+                                                       "Scatter (vs Y)", "Time Series (Y over time)"])
         self.plot_type_selector.pack(side=LEFT, padx=5)
+        ttk.Label(action_frame, text="Y:").pack(side=LEFT)
+        self.plot_y_selector = ttk.Combobox(action_frame, state="readonly", width=12)
+        self.plot_y_selector.pack(side=LEFT, padx=(2, 5))
+        ttk.Label(action_frame, text="Bins:").pack(side=LEFT)
+        self.plot_bins = ttk.IntVar(value=30)
+        ttk.Spinbox(action_frame, from_=2, to=500, width=4, textvariable=self.plot_bins).pack(side=LEFT, padx=(2, 5))
         self.plot_button = ttk.Button(action_frame, text="Generate Plot", command=self.generate_plot, bootstyle="info")
         self.plot_button.pack(side=LEFT, padx=(0,5))
         # --- NEW: Statistics Button ---
         self.stats_button = ttk.Button(action_frame, text="Show Statistics", command=self.show_statistics, bootstyle="info")
         self.stats_button.pack(side=LEFT)
+        # Sketches for statistics and sampled counts for plots of huge columns.
+        self.approximate = ttk.BooleanVar(value=False)
+        ttk.Checkbutton(action_frame, text="Approximate", variable=self.approximate).pack(side=LEFT, padx=(5, 0))
         
         filter_frame = ttk.LabelFrame(main_frame, text="Filter Data", padding="10")
         filter_frame.pack(fill=X, pady=(5, 10))
@@ -73,15 +152,37 @@ class App(ttk.Window):
         self.filter_column_selector = ttk.Combobox(filter_frame, state="readonly", width=15)
         self.filter_column_selector.pack(side=LEFT, padx=(0, 10))
         ttk.Label(filter_frame, text="Operator:").pack(side=LEFT, padx=(0, 5))
-        self.operator_selector = ttk.Combobox(filter_frame, state="readonly", width=10,
-                                              values=["==", "!=", ">", "<", ">=", "<=", "contains", "is null", "is not null"])
+        # The operators are filled in by finish_startup().
+        self.operator_selector = ttk.Combobox(filter_frame, state="readonly", width=10)
         self.operator_selector.pack(side=LEFT, padx=(0, 10))
         self.operator_selector.bind("<<ComboboxSelected>>", self.toggle_filter_value_entry)
         ttk.Label(filter_frame, text="Value:").pack(side=LEFT, padx=(0, 5))
         self.filter_value_entry = ttk.Entry(filter_frame, width=20)
         self.filter_value_entry.pack(side=LEFT, padx=(0, 10))
+        self.filter_not_var = ttk.BooleanVar(value=False)
+        ttk.Checkbutton(filter_frame, text="NOT", variable=self.filter_not_var).pack(side=LEFT, padx=(0, 10))
+        self.index_filters = ttk.BooleanVar(value=True)
+        ttk.Checkbutton(filter_frame, text="Index", variable=self.index_filters, command=self.toggle_filter_indexes).pack(side=LEFT, padx=(0, 10))
+        self.add_clause_button = ttk.Button(filter_frame, text="Add Clause", command=self.add_filter_clause, bootstyle="secondary-outline")
+        self.add_clause_button.pack(side=LEFT, padx=(0, 5))
+        self.clause_joiner = ttk.Combobox(filter_frame, state="readonly", width=5, values=["AND", "OR"])
+        self.clause_joiner.set("AND")
+        self.clause_joiner.bind("<<ComboboxSelected>>", lambda event: self.update_clauses_label())
+        self.clause_joiner.pack(side=LEFT, padx=(0, 10))
         self.apply_filter_button = ttk.Button(filter_frame, text="Apply Filter", command=self.apply_filter, bootstyle="primary")
         self.apply_filter_button.pack(side=LEFT)
+        self.clear_clauses_button = ttk.Button(filter_frame, text="Clear", command=self.clear_filter_clauses, bootstyle="secondary-outline")
+        self.clear_clauses_button.pack(side=LEFT, padx=(5, 10))
+        self.clauses_label = ttk.Label(filter_frame, text="")
+        self.clauses_label.pack(side=LEFT)
+        self.filter_clauses = []
+
+        status_frame = ttk.Frame(main_frame)
+        status_frame.pack(side=BOTTOM, fill=X, pady=(5, 0))
+        self.status_label = ttk.Label(status_frame, text="Ready.")
+        self.status_label.pack(side=LEFT)
+        self.cancel_button = ttk.Button(status_frame, text="Cancel", command=self.cancel_jobs, bootstyle="secondary-outline", state="disabled")
+        self.cancel_button.pack(side=RIGHT)
 
         bottom_pane = ttk.PanedWindow(main_frame, orient=HORIZONTAL)
         bottom_pane.pack(fill=BOTH, expand=True)
@@ -89,9 +190,9 @@ class App(ttk.Window):
         tree_frame = ttk.Frame(bottom_pane, padding=5)
         self.tree = ttk.Treeview(tree_frame, show='headings', bootstyle="primary")
         self.tree.pack(side=LEFT, fill=BOTH, expand=True)
-        vsb = ttk.Scrollbar(tree_frame, orient="vertical", command=self.tree.yview, bootstyle="round")
-        vsb.pack(side='right', fill='y')
-        self.tree.configure(yscrollcommand=vsb.set)
+        self.tree_scrollbar = ttk.Scrollbar(tree_frame, orient="vertical", bootstyle="round")
+        self.tree_scrollbar.pack(side='right', fill='y')
+        self.grid_view = None
         hsb = ttk.Scrollbar(tree_frame, orient="horizontal", command=self.tree.xview, bootstyle="round")
         hsb.pack(side='bottom', fill='x')
         self.tree.configure(xscrollcommand=hsb.set)
@@ -104,19 +205,71 @@ class App(ttk.Window):
         self.history_text.config(yscrollcommand=history_sb.set)
         bottom_pane.add(history_frame, weight=1)
 
+        # The window is complete; pandas and numpy load on the worker while the user picks a file.
+        self.jobs.submit("Loading data libraries", lambda job: import_data_stack(), lambda result: self.finish_startup())
+
+    def finish_startup(self):
+        """Creates the parts of the app that need the data modules. Runs once."""
+        if self.data_ready:
+            return
+        self.out_of_core_threshold = streaming.default_out_of_core_threshold()
+        self.history = History(budget_bytes=HISTORY_BUDGET_BYTES)
+        # Coerced copies of columns reused across filters until the column changes,
+        # and per-column indexes that answer repeated filters without a scan.
+        self.column_indexes = ColumnIndexes(max_bytes=INDEX_BUDGET_BYTES)
+        self.column_cache = data_logic.ColumnCache(indexes=self.column_indexes if self.index_filters.get() else None)
+        self.recipe = recipe.Recipe()
+        self.stats = StatsEngine(self.column_cache)
+        self.plots = PlotEngine(self.column_cache)
+        # Every job is timed and written to a JSON-lines trace for the session.
+        self.instrument = Instrument()
+        # Only the rows in view are materialized; the grid drives the vertical scrollbar itself.
+        self.grid_view = VirtualGrid(self.tree, self.tree_scrollbar)
+        self.operator_selector.config(values=data_logic.FILTER_OPERATORS)
+        self.data_ready = True
+
+    def ensure_data_ready(self):
+        """For actions started before the background import finished: waits for it."""
+        if not self.data_ready:
+            import_data_stack()
+            self.finish_startup()
+
     # --- NEW: Statistics Function ---
     def show_statistics(self):
         if self.df is None:
             messagebox.showwarning("Warning", "No data loaded.")
             return
-        
+
+        # Exact quartiles and distinct counts keep every value in memory, which an
+        # out-of-core source by definition doesn't fit in: those are always sketched.
+        approximate = self.approximate.get() or self.out_of_core
+        if approximate and not self.approximate.get():
+            self.log_action("Statistics of an out-of-core file are approximate (quartiles and distinct counts are sketched).")
+
+        def compute(job):
+            # Get statistics for all columns (numeric and object)
+            if self.source is not None:
+                # Lazy and out-of-core sources are summarized in one streaming pass.
+                return self.stats.describe_chunks(self.source.iter_chunks(job), approximate)
+            return self.stats.describe(self.df, approximate)
+
+        self.run_job("Computing statistics", compute, self.display_statistics, error_prefix="Could not generate statistics")
+
+    def result_frame(self, job=None, columns=None):
+        """Returns the data an analysis should run on, executing the lazy plan if there is one.
+
+        Out-of-core sources are too big to collect, so analyses use their preview.
+        """
+        if self.source is not None and not self.out_of_core:
+            return self.source.collect(job, columns)
+        return self.df if columns is None else self.df[columns]
+
+    def display_statistics(self, stats_df):
         try:
             stats_window = ttk.Toplevel(self)
             stats_window.title("Descriptive Statistics")
             stats_window.geometry("800x400")
 
-            # Get statistics for all columns (numeric and object)
-            stats_df = self.df.describe(include='all').round(2)
             stats_df.insert(0, 'Statistic', stats_df.index)
             
             # Create a Treeview in the new window
@@ -138,183 +291,657 @@ class App(ttk.Window):
         except Exception as e:
             messagebox.showerror("Error", f"Could not generate statistics: {e}")
             
+    def display_memory_report(self, report):
+        before_mb = report["Before (KB)"].sum() / 1024
+        after_mb = report["After (KB)"].sum() / 1024
+        report_window = ttk.Toplevel(self)
+        report_window.title("Memory Footprint")
+        report_window.geometry("700x400")
+        ttk.Label(report_window, text=f"Total: {before_mb:,.1f} MB -> {after_mb:,.1f} MB").pack(anchor=W, padx=10, pady=(10, 0))
+
+        report_tree = ttk.Treeview(report_window, show='headings', bootstyle="primary")
+        report_tree.pack(fill=BOTH, expand=True, padx=10, pady=10)
+        report_tree["column"] = list(report.columns)
+        for column in report_tree["column"]:
+            report_tree.heading(column, text=column)
+            report_tree.column(column, width=100, anchor=CENTER)
+        for row in report.itertuples(index=False, name=None):
+            report_tree.insert("", "end", values=list(row))
+
+        self.log_action(f"Optimized dtypes: {before_mb:,.1f} MB -> {after_mb:,.1f} MB.")
+
     # ... (All other functions from previous step remain here unchanged) ...
-    def push_to_undo(self):
-        if self.df is not None:
-            self.undo_stack.append(self.df.copy())
-            self.update_button_states()
+    def run_job(self, description, work, on_success, error_title="Error", error_prefix=None, on_error=None,
+                on_cancelled=None):
+        """Runs work(job) off the Tk thread and on_success(result) back on it once it finishes.
+
+        The work is instrumented (see instrument.py) and the Treeview updates made by
+        on_success are timed separately; the numbers are logged under the action.
+        """
+        def show_error(e):
+            messagebox.showerror(error_title, f"{error_prefix}: {e}" if error_prefix else str(e))
+
+        self.ensure_data_ready()
+        metrics = ActionMetrics(description)
+        profile = self.profile_next.get()
+        self.profile_next.set(False)
+
+        def measured(job):
+            metrics.rows_in = rows_of(self.df)
+            return self.instrument.run(metrics, work, job, profile=profile)
+
+        def succeeded(result):
+            self.render_seconds = 0.0
+            on_success(result)
+            metrics.render_seconds = self.render_seconds
+            self.finish_action(metrics)
+
+        def failed(e):
+            (on_error or show_error)(e)
+            self.finish_action(metrics)
+
+        def cancelled():
+            # Work stopped at a cancellation check was traced by instrument.run() already;
+            # work that ran to the end anyway, or never started, is traced here.
+            if metrics.status != "cancelled":
+                metrics.status = "cancelled"
+                self.instrument.write(metrics)
+            if on_cancelled is not None:
+                on_cancelled()
+
+        return self.jobs.submit(description, measured, succeeded, failed, cancelled)
+
+    def finish_action(self, metrics):
+        self.instrument.write(metrics)
+        self.log_detail(metrics.summary())
+        if metrics.profile is not None:
+            self.log_detail(f"profile saved to {metrics.profile}")
+
+    def update_job_status(self, job, queued):
+        if job is not None:
+            text = f"{job.description}... {job.elapsed:.1f}s"
+            if job.progress:
+                text += f" ({job.progress})"
+            if queued:
+                text += f" | {queued} queued"
+        elif self.jobs.last is not None:
+            last = self.jobs.last
+            outcome = "cancelled" if last.cancelled else f"finished in {last.elapsed:.1f}s"
+            text = f"{last.description} {outcome}."
+        else:
+            text = "Ready."
+        self.status_label.config(text=text)
+        self.cancel_button.config(state="normal" if job is not None else "disabled")
+        self.update_button_states()
+
+    def cancel_jobs(self):
+        self.jobs.cancel_all()
+        self.log_action("Cancelled running and queued actions.")
+
+    def on_close(self):
+        self.jobs.shutdown()
+        self.destroy()
+
+    def staged(self, work, changed_columns=None):
+        """Wraps an action's work(job) so that what commit_action() needs from the old
+        and new frame is worked out on the worker too, not on the Tk thread.
+
+        The wrapped work returns (new frame, undo delta, plot counts, index
+        tracking); nothing outside the history's spill files changes until
+        commit_action() applies them. changed_columns=None means the action only
+        removed rows.
+        """
+        def run(job):
+            before = self.df
+            after = work(job)
+            delta = make_delta(before, after, changed_columns)
+            # Whatever has to be spilled to fit the delta is written now, off the Tk thread.
+            self.history.make_room(delta.nbytes)
+            counts = {}
+            if isinstance(delta, RowDelta):
+                # Cached plot counts are updated from the removed rows instead of recounted.
+                counts = self.plots.removed_counts(before, after, delta.payload[0])
+            return after, delta, counts, self.index_tracking(delta, after)
+        return run
+
+    def commit_action(self, staged, message, step):
+        """Records a staged() result as one undoable step and shows the new frame.
+
+        `step` is the action's recipe step.
+        """
+        new_df, delta, counts, tracking = staged
+        self.history.record_delta(delta)
+        self.recipe.record(step)
+        self.df = new_df
+        self.plots.put_counts(new_df, counts)
+        self.column_indexes.apply_tracking(tracking)
+        self.log_action(message)
+        self.update_treeview(self.df)
+        self.update_button_states()
+
+    def index_tracking(self, delta, df):
+        """Works out how the filter indexes follow `df`, the frame after `delta` was applied
+        either way; column_indexes.apply_tracking() applies it once `df` is shown.
+
+        Row changes keep every index usable through the remaining rows' positions;
+        changed values drop the indexes of the columns they were in.
+        """
+        if isinstance(delta, (CellPatch, CompositeDelta)):
+            return self.column_indexes.tracking(df, delta.columns)
+        return self.column_indexes.tracking(df, () if isinstance(delta, RowDelta) else None)
+
+    def toggle_filter_indexes(self):
+        if self.column_cache is None:
+            return
+        if self.index_filters.get():
+            self.column_cache.indexes = self.column_indexes
+        else:
+            # Off also frees them.
+            self.column_cache.indexes = None
+            self.column_indexes.clear()
 
     def update_button_states(self):
-        self.undo_button.config(state="normal" if self.undo_stack else "disabled")
-        self.redo_button.config(state="normal" if self.redo_stack else "disabled")
+        # Undo/redo would race with a running job, so they wait until the queue is empty.
+        idle = not self.jobs.busy and self.history is not None
+        self.undo_button.config(state="normal" if idle and self.history.can_undo else "disabled")
+        self.redo_button.config(state="normal" if idle and self.history.can_redo else "disabled")
 
     def undo_action(self):
-        if self.undo_stack:
-            self.redo_stack.append(self.df.copy())
-            self.df = self.undo_stack.pop()
-            self.update_treeview(self.df)
-            self.log_action("Performed UNDO.")
-            self.update_button_states()
+        if self.history.can_undo and not self.jobs.busy:
+            if self.source is not None:
+                self.recipe.undo()
+                self.source = self.history.undo(self.source)
+                self.refresh_source_preview("Performed UNDO.")
+                return
+            self.move_history(self.history.undo_stack[-1], self.history.undo, self.recipe.undo, "UNDO")
 
     def redo_action(self):
-        if self.redo_stack:
-            self.undo_stack.append(self.df.copy())
-            self.df = self.redo_stack.pop()
+        if self.history.can_redo and not self.jobs.busy:
+            if self.source is not None:
+                self.recipe.redo()
+                self.source = self.history.redo(self.source)
+                self.refresh_source_preview("Performed REDO.")
+                return
+            self.move_history(self.history.redo_stack[-1], self.history.redo, self.recipe.redo, "REDO")
+
+    def move_history(self, delta, move, move_recipe, name):
+        """Undoes or redoes `delta` on the worker: `move` is history.undo or history.redo.
+
+        Once the history has moved the new frame is shown even if the job was
+        cancelled meanwhile, so the frame and the history always agree.
+        """
+        moved = []
+
+        def work(job):
+            df = move(self.df)
+            moved.append((df, self.index_tracking(delta, df)))
+            return moved[0]
+
+        def shown(result):
+            df, tracking = result
+            move_recipe()
+            self.df = df
+            self.column_indexes.apply_tracking(tracking)
             self.update_treeview(self.df)
-            self.log_action("Performed REDO.")
+            self.log_action(f"Performed {name}.")
             self.update_button_states()
 
+        def cancelled():
+            if moved:
+                shown(moved[0])
+
+        self.run_job(f"{name.title()}", work, shown, error_prefix=f"Could not {name.lower()}", on_cancelled=cancelled)
+
     def load_file(self):
         filepath = filedialog.askopenfilename(filetypes=[("CSV files", "*.csv"), ("Excel files", "*.xlsx *.xls")])
         if not filepath: return
-        try:
-            self.df = pd.read_csv(filepath) if filepath.endswith('.csv') else pd.read_excel(filepath)
-            self.undo_stack.clear()
-            self.redo_stack.clear()
+        name = os.path.basename(filepath)
+        self.ensure_data_ready()
+        optimize = self.optimize_dtypes.get()
+
+        def csv_source(job):
+            # With Optimize dtypes on, text columns are parsed straight into Arrow strings.
+            return streaming.ChunkedSource(filepath, dtype=streaming.csv_dtype_plan(filepath) if optimize else None)
+
+        if filepath.endswith('.csv') and os.path.getsize(filepath) > self.out_of_core_threshold:
+            size_gb = os.path.getsize(filepath) / 1024 ** 3
+            if messagebox.askyesno("Large File", f"{name} is {size_gb:.1f} GB. Open it out-of-core?\n\n"
+                                   "Cleaning, filtering and export will then run chunk by chunk "
+                                   "against the file instead of loading it into memory."):
+                self.open_source(csv_source, name, out_of_core=True)
+                return
+
+        if self.lazy_mode.get():
+            if filepath.endswith('.csv'):
+                self.open_source(csv_source, name)
+            else:
+                self.open_source(lambda job: streaming.ChunkedSource(
+                    frame=self.source_cache.read(filepath, lambda: pd.read_excel(filepath), job)), name)
+            return
+
+        previous_label = self.file_label.cget("text")
+        previewed = False
+
+        def show_preview(chunk):
+            nonlocal previewed
+            previewed = True
+            self.show_preview(chunk, name)
+
+        def parse(job):
+            if filepath.endswith('.csv'):
+                # Show the first chunk right away while the rest keeps loading.
+                return streaming.stream_csv(filepath, job, on_preview=lambda chunk: job.post(show_preview, chunk))
+            return pd.read_excel(filepath)
+
+        def read(job):
+            # Reopened files come from the columnar cache instead of being parsed again.
+            df = self.source_cache.read(filepath, lambda: parse(job), job)
+            if not optimize:
+                return df, None
+            job.report("optimizing dtypes")
+            return data_logic.optimize_dtypes_logic(df)
+
+        def loaded(result):
+            df, report = result
+            self.source = None
+            self.out_of_core = False
+            self.column_cache.clear()
+            self.df = df
+            self.history.clear()
+            self.recipe.clear()
             self.update_treeview(self.df)
             self.file_label.config(text=os.path.basename(filepath))
             self.clear_history()
             self.log_action(f"Loaded {self.df.shape[0]} rows from {os.path.basename(filepath)}.")
+            if report is not None:
+                self.display_memory_report(report)
             self.update_button_states()
-        except Exception as e:
+
+        def restore():
+            # The preview was never committed: show the loaded frame (if any) again.
+            if previewed:
+                self.restore_view(previous_label)
+
+        def failed(e):
+            restore()
             messagebox.showerror("Error", f"Failed to read file: {e}")
 
+        self.run_job(f"Loading {name}", read, loaded, on_error=failed, on_cancelled=restore)
+
+    def show_preview(self, chunk, name):
+        self.update_treeview(chunk)
+        self.file_label.config(text=f"{name} (loading...)")
+
+    def restore_view(self, label):
+        """Puts the grid, column selectors and file label back to the committed state."""
+        if self.df is not None:
+            self.update_treeview(self.df)
+        else:
+            self.grid_view.clear()
+            for selector in (self.column_selector, self.filter_column_selector, self.plot_y_selector):
+                selector['values'] = []
+                selector.set('')
+        self.file_label.config(text=label)
+
+    def open_source(self, make_source, name, out_of_core=False):
+        """Opens a lazy source: actions are recorded as a plan and only the preview is computed."""
+        def open_preview(job):
+            source = make_source(job)
+            return source, source.head(job=job)
+
+        def opened(result):
+            self.source, self.df = result
+            self.out_of_core = out_of_core
+            self.history.clear()
+            self.recipe.clear()
+            self.update_treeview(self.df)
+            mode = "out-of-core" if out_of_core else "lazy"
+            self.file_label.config(text=f"{name} ({mode})")
+            self.clear_history()
+            self.log_action(f"Opened {name} in {mode} mode; showing the first {len(self.df):,} rows.")
+            self.update_button_states()
+
+        self.run_job(f"Opening {name}", open_preview, opened, error_prefix="Failed to read file")
+
+    def apply_source_step(self, description, make_step, message, step, **error_options):
+        """Lazy version of commit_action: records a step on the source's plan and
+        refreshes the preview, which only runs the plan as far as the first rows."""
+        def work(job):
+            new_source = self.source.with_step(make_step(job))
+            return new_source, new_source.head(job=job)
+
+        def applied(result):
+            new_source, preview = result
+            self.history.record_delta(Snapshot(self.source))
+            self.recipe.record(step)
+            self.source = new_source
+            self.df = preview
+            self.log_action(message)
+            self.update_treeview(self.df)
+            self.update_button_states()
+
+        self.run_job(description, work, applied, **error_options)
+
+    def refresh_source_preview(self, message):
+        def refreshed(preview):
+            self.df = preview
+            self.update_treeview(self.df)
+            self.log_action(message)
+            self.update_button_states()
+
+        self.run_job("Refreshing preview", lambda job: self.source.head(job=job), refreshed,
+                     error_prefix="Failed to read file")
+
     def update_treeview(self, df):
-        self.tree.delete(*self.tree.get_children())
-        self.tree["column"] = list(df.columns)
-        self.tree["show"] = "headings"
-        for column in self.tree["column"]:
-            self.tree.heading(column, text=column)
-            self.tree.column(column, width=100)
-        df_display = df.replace(np.nan, 'NULL')
-        for index, row in df_display.iterrows():
-            self.tree.insert("", "end", values=list(row))
+        started = time.perf_counter()
+        self.grid_view.set_frame(df)
         self.column_selector['values'] = list(df.columns)
         self.column_selector.set('')
         self.filter_column_selector['values'] = list(df.columns)
         self.filter_column_selector.set('')
+        self.plot_y_selector['values'] = list(df.columns)
+        self.plot_y_selector.set('')
+        self.update_idletasks()
+        self.render_seconds += time.perf_counter() - started
 
     def remove_duplicates(self):
+        """Opens the dedupe options: key columns, which row to keep, and duplicate statistics."""
         if self.df is None:
             messagebox.showwarning("Warning", "No data loaded.")
             return
 
-        original_rows = len(self.df)
+        columns = list(self.df.columns)
+        dialog = ttk.Toplevel(self)
+        dialog.title("Remove Duplicates")
+        dialog.geometry("420x450")
+        ttk.Label(dialog, text="Key columns (none selected: whole rows):").pack(anchor=W, padx=10, pady=(10, 0))
+        key_list = Listbox(dialog, selectmode="multiple", exportselection=False, height=10)
+        key_list.pack(fill=BOTH, expand=True, padx=10, pady=5)
+        for column in columns:
+            key_list.insert(END, column)
 
-        # Call the separated logic function
-        cleaned_df = data_logic.remove_duplicates_logic(self.df)
+        keep_frame = ttk.Frame(dialog)
+        keep_frame.pack(fill=X, padx=10, pady=5)
+        ttk.Label(keep_frame, text="Keep:").pack(side=LEFT)
+        keep_selector = ttk.Combobox(keep_frame, state="readonly", width=16, values=list(DEDUPE_KEEP))
+        keep_selector.set("First")
+        keep_selector.pack(side=LEFT, padx=5)
+        ttk.Label(keep_frame, text="by:").pack(side=LEFT)
+        order_selector = ttk.Combobox(keep_frame, state="readonly", width=14, values=columns)
+        order_selector.pack(side=LEFT, padx=5)
+        verify = ttk.BooleanVar(value=True)
+        if self.source is not None:
+            # Streamed dedupe matches rows by a 64-bit hash; checking matches value by value
+            # keeps one row per distinct key in memory, which only the user can trade away.
+            ttk.Checkbutton(dialog, text="Verify hash matches (holds each distinct key in memory)",
+                            variable=verify).pack(anchor=W, padx=10, pady=5)
 
-        rows_removed = original_rows - len(cleaned_df)
+        def options():
+            keys = [columns[i] for i in key_list.curselection()] or None
+            keep = DEDUPE_KEEP[keep_selector.get()]
+            order_by = order_selector.get() or None
+            if keep in ("max", "min") and order_by is None:
+                messagebox.showwarning("Input Error", "Please select the column to order rows by.", parent=dialog)
+                return None
+            return keys, keep, order_by, verify.get()
 
-        if rows_removed > 0:
-            self.push_to_undo()
-            self.df = cleaned_df
-            self.redo_stack.clear()
-            messagebox.showinfo("Success", f"Removed {rows_removed} duplicate row(s).")
-            self.log_action(f"Removed {rows_removed} duplicate row(s).")
-            self.update_treeview(self.df)
-            self.update_button_states()
-        else:
-            messagebox.showinfo("Info", "No duplicate rows found.")
+        def remove():
+            chosen = options()
+            if chosen is not None:
+                dialog.destroy()
+                self.apply_remove_duplicates(*chosen)
 
-    def remove_duplicates(self):
-        if self.df is None:
-            messagebox.showwarning("Warning", "No data loaded.")
+        def stats():
+            chosen = options()
+            if chosen is not None:
+                self.show_duplicate_stats(chosen[0])
+
+        button_frame = ttk.Frame(dialog)
+        button_frame.pack(fill=X, padx=10, pady=(5, 10))
+        ttk.Button(button_frame, text="Remove", command=remove, bootstyle="danger").pack(side=RIGHT)
+        ttk.Button(button_frame, text="Duplicate Stats", command=stats, bootstyle="info-outline").pack(side=RIGHT, padx=5)
+
+    def apply_remove_duplicates(self, columns, keep, order_by, verify=True):
+        what = "duplicate row(s)" if columns is None else f"row(s) with duplicate {', '.join(columns)}"
+        step = recipe.remove_duplicates_step(columns, keep, order_by)
+        if self.source is not None:
+            if not verify:
+                self.log_action("Duplicates are matched by hash only; a hash collision could drop a distinct row.")
+            self.apply_source_step("Removing duplicates",
+                                   lambda job: streaming.DropDuplicatesStep.create(self.source, columns, keep, order_by, verify, job),
+                                   f"Removed {what} (deferred).", step, error_prefix="An error occurred")
             return
 
-        original_rows = len(self.df)
+        def removed(staged):
+            rows_removed = len(self.df) - len(staged[0])
+            if rows_removed > 0:
+                self.commit_action(staged, f"Removed {rows_removed} {what}.", step)
+                messagebox.showinfo("Success", f"Removed {rows_removed} {what}.")
+            else:
+                messagebox.showinfo("Info", "No duplicate rows found.")
 
         # Call the separated logic function
-        cleaned_df = data_logic.remove_duplicates_logic(self.df)
+        self.run_job("Removing duplicates",
+                     self.staged(lambda job: data_logic.remove_duplicates_logic(self.df, columns, keep, order_by)),
+                     removed, error_prefix="An error occurred")
 
-        rows_removed = original_rows - len(cleaned_df)
+    def show_duplicate_stats(self, columns):
+        def compute(job):
+            # Lazy and out-of-core sources are counted in one streaming pass.
+            chunks = self.source.iter_chunks(job, columns) if self.source is not None else [self.df]
+            return dedupe.duplicate_stats(chunks, columns, job=job)
 
-        if rows_removed > 0:
-            self.push_to_undo()
-            self.df = cleaned_df
-            self.redo_stack.clear()
-            messagebox.showinfo("Success", f"Removed {rows_removed} duplicate row(s).")
-            self.log_action(f"Removed {rows_removed} duplicate row(s).")
-            self.update_treeview(self.df)
-            self.update_button_states()
-        else:
-            messagebox.showinfo("Info", "No duplicate rows found.")
+        self.run_job("Counting duplicates", compute, lambda stats: self.display_duplicate_stats(stats, columns),
+                     error_prefix="Could not count duplicates")
+
+    def display_duplicate_stats(self, stats, columns):
+        what = "rows" if columns is None else ", ".join(columns)
+        summary = (f"{stats['rows']:,} rows, {stats['distinct']:,} distinct by {what}: "
+                   f"{stats['duplicate_rows']:,} duplicate rows in {stats['duplicate_groups']:,} groups "
+                   f"(largest {stats['largest_group']:,}).")
+        stats_window = ttk.Toplevel(self)
+        stats_window.title("Duplicate Statistics")
+        stats_window.geometry("800x400")
+        ttk.Label(stats_window, text=summary, wraplength=760).pack(anchor=W, padx=10, pady=(10, 0))
+        sizes = ", ".join(f"{size}: {groups:,}" for size, groups in stats["group_sizes"].head(10).items())
+        if sizes:
+            ttk.Label(stats_window, text=f"Groups by size: {sizes}").pack(anchor=W, padx=10)
+
+        top = stats["top"]
+        top_tree = ttk.Treeview(stats_window, show='headings', bootstyle="primary")
+        top_tree.pack(fill=BOTH, expand=True, padx=10, pady=10)
+        top_tree["column"] = [str(column) for column in top.columns]
+        for column in top_tree["column"]:
+            top_tree.heading(column, text=column)
+            top_tree.column(column, width=100, anchor=CENTER)
+        for row in top.astype(object).where(top.notna(), "---").itertuples(index=False, name=None):
+            top_tree.insert("", "end", values=list(row))
+
+        self.log_action(f"Counted duplicates by {what}: {stats['duplicate_rows']:,} duplicate rows.")
 
-    
     def handle_missing_values(self):
         if self.df is None: return
         column = self.column_selector.get()
         action = self.action_selector.get()
         if not column or not action: return
 
-        try:
-            self.push_to_undo()
-            custom_val = self.custom_value_entry.get() if action == "Fill with Value:" else None
+        custom_val = self.custom_value_entry.get() if action == "Fill with Value:" else None
+
+        if self.source is not None:
+            self.apply_source_step(f"Applying '{action}' to '{column}'",
+                                   lambda job: streaming.MissingValuesStep.create(self.source, column, action, custom_val, job),
+                                   f"Applied '{action}' to column '{column}' (deferred).",
+                                   recipe.missing_values_step(column, action, custom_val), error_prefix="An error occurred")
+            return
 
-            # Call the separated logic function
-            modified_df = data_logic.handle_missing_values_logic(self.df, column, action, custom_val)
+        # Dropping rows is stored as a row mask, fills as a patch of the one column.
+        changed_columns = None if action == "Drop Rows" else [column]
 
-            self.df = modified_df
-            self.redo_stack.clear()
+        def handled(staged):
+            self.commit_action(staged, f"Applied '{action}' to column '{column}'.",
+                               recipe.missing_values_step(column, action, custom_val))
             messagebox.showinfo("Success", f"Action '{action}' applied to column '{column}'.")
-            self.log_action(f"Applied '{action}' to column '{column}'.")
-            self.update_treeview(self.df)
-            self.update_button_states()
-        except TypeError as e:
-            messagebox.showerror("Type Error", str(e))
-            self.undo_stack.pop() # Revert the undo push
-            self.update_button_states()
-        except Exception as e:
-            messagebox.showerror("Error", f"An error occurred: {e}")
-            self.undo_stack.pop()
-            self.update_button_states()
+
+        def failed(e):
+            if isinstance(e, TypeError):
+                messagebox.showerror("Type Error", str(e))
+            else:
+                messagebox.showerror("Error", f"An error occurred: {e}")
+
+        # Call the separated logic function
+        self.run_job(f"Applying '{action}' to '{column}'",
+                     self.staged(lambda job: data_logic.handle_missing_values_logic(self.df, column, action, custom_val),
+                                 changed_columns),
+                     handled, on_error=failed)
             
-    def apply_filter(self):
-        if self.df is None: return
+    def open_missing_values_batch(self):
+        """Opens the batch editor: pick a strategy per column, then apply them all as one action."""
+        if self.df is None:
+            messagebox.showwarning("Warning", "No data loaded.")
+            return
+        self.ensure_data_ready()
+
+        columns = list(self.df.columns)
+        missing = self.df.isna().sum()
+        strategies = {}
+        dialog = ttk.Toplevel(self)
+        dialog.title("Handle Missing Values (Batch)")
+        dialog.geometry("640x480")
+        scope = " (in the preview)" if self.source is not None else ""
+        ttk.Label(dialog, text=f"Select columns, set their strategy, then Apply. Missing counts{scope}:").pack(anchor=W, padx=10, pady=(10, 0))
+
+        tree = ttk.Treeview(dialog, columns=("column", "missing", "strategy"), show='headings', bootstyle="primary")
+        for name, width in [("column", 180), ("missing", 80), ("strategy", 320)]:
+            tree.heading(name, text=name.capitalize())
+            tree.column(name, width=width, anchor=W)
+        for i, column in enumerate(columns):
+            tree.insert("", "end", iid=str(i), values=(column, f"{missing[column]:,}", ""))
+        tree.pack(fill=BOTH, expand=True, padx=10, pady=5)
+
+        controls = ttk.Frame(dialog)
+        controls.pack(fill=X, padx=10, pady=5)
+        action_selector = ttk.Combobox(controls, state="readonly", width=18, values=["(none)"] + data_logic.MISSING_VALUE_ACTIONS)
+        action_selector.pack(side=LEFT)
+        ttk.Label(controls, text="Value:").pack(side=LEFT, padx=(10, 2))
+        value_entry = ttk.Entry(controls, width=10)
+        value_entry.pack(side=LEFT)
+        ttk.Label(controls, text="per group of:").pack(side=LEFT, padx=(10, 2))
+        group_selector = ttk.Combobox(controls, state="readonly", width=14, values=[""] + columns)
+        group_selector.pack(side=LEFT)
+
+        def set_strategy():
+            action = action_selector.get()
+            group_by = group_selector.get() or None
+            if not action or not tree.selection():
+                return
+            if group_by is not None and action not in data_logic.GROUPED_ACTIONS:
+                messagebox.showwarning("Input Error", f"{action} can't be applied per group.", parent=dialog)
+                return
+            value = value_entry.get() if action == "Fill with Value:" else None
+            for item in tree.selection():
+                column = columns[int(item)]
+                if action == "(none)":
+                    strategies.pop(column, None)
+                    description = ""
+                else:
+                    strategies[column] = data_logic.missing_value_strategy(action, value, group_by)
+                    description = action + (f" {value}" if value is not None else "") + (f" by {group_by}" if group_by else "")
+                tree.set(item, "strategy", description)
+
+        def apply():
+            if strategies:
+                dialog.destroy()
+                self.handle_missing_values_batch(dict(strategies))
+
+        ttk.Button(controls, text="Set", command=set_strategy, bootstyle="secondary").pack(side=LEFT, padx=(10, 0))
+        ttk.Button(controls, text="Apply", command=apply, bootstyle="info").pack(side=RIGHT)
+
+    def handle_missing_values_batch(self, strategies):
+        step = recipe.missing_values_batch_step(strategies)
+        message = f"Handled missing values in {len(strategies)} column(s): " + \
+                  ", ".join(f"{column} ({strategy['action']})" for column, strategy in strategies.items())
+
+        if self.source is not None:
+            self.apply_source_step("Handling missing values",
+                                   lambda job: streaming.MissingValuesBatchStep.create(self.source, strategies, job),
+                                   message + " (deferred).", step, error_prefix="An error occurred")
+            return
+
+        fills = [column for column, strategy in strategies.items() if strategy["action"] != "Drop Rows"]
+
+        def handled(staged):
+            # One history entry for the whole batch: a row mask for the dropped rows,
+            # a patch of the filled cells, or both together.
+            self.commit_action(staged, message + ".", step)
+
+        def failed(e):
+            if isinstance(e, TypeError):
+                messagebox.showerror("Type Error", str(e))
+            else:
+                messagebox.showerror("Error", f"An error occurred: {e}")
+
+        self.run_job("Handling missing values",
+                     self.staged(lambda job: data_logic.handle_missing_values_batch_logic(self.df, strategies), fills or None),
+                     handled, on_error=failed)
+
+    def current_filter_condition(self):
+        """Builds a Condition from the filter widgets, or warns and returns None."""
         column = self.filter_column_selector.get()
         operator = self.operator_selector.get()
         value = self.filter_value_entry.get()
         if not column or not operator:
             messagebox.showwarning("Input Error", "Please select a column and an operator.")
-            return
-        if operator not in ["is null", "is not null"] and not value:
+            return None
+        if operator not in data_logic.UNARY_OPERATORS and not value:
             messagebox.showwarning("Input Error", "Please provide a value for the filter.")
+            return None
+        condition = data_logic.Condition(column, operator, value)
+        return data_logic.Not(condition) if self.filter_not_var.get() else condition
+
+    def add_filter_clause(self):
+        condition = self.current_filter_condition()
+        if condition is None: return
+        self.filter_clauses.append(condition)
+        self.filter_value_entry.delete(0, END)
+        self.filter_not_var.set(False)
+        self.update_clauses_label()
+
+    def clear_filter_clauses(self):
+        self.filter_clauses = []
+        self.update_clauses_label()
+
+    def update_clauses_label(self):
+        joiner = f" {self.clause_joiner.get()} "
+        self.clauses_label.config(text=joiner.join(str(clause) for clause in self.filter_clauses))
+
+    def apply_filter(self):
+        if self.df is None: return
+        if self.filter_clauses:
+            # All clauses are evaluated together as one mask over the frame.
+            combine = data_logic.And if self.clause_joiner.get() == "AND" else data_logic.Or
+            expression = combine(*self.filter_clauses)
+        else:
+            expression = self.current_filter_condition()
+            if expression is None: return
+        self.clear_filter_clauses()
+
+        if self.source is not None:
+            self.apply_source_step("Filtering", lambda job: streaming.FilterStep(expression),
+                                   f"Filtered where {expression} (deferred).", recipe.filter_step(expression),
+                                   error_title="Filter Error", error_prefix="An error occurred during filtering")
             return
-        self.push_to_undo()
-        try:
-            original_col = self.df[column]
-            filtered_df = None
-            if operator in [">", "<", ">=", "<="]:
-                value = pd.to_numeric(value)
-                col_numeric = pd.to_numeric(original_col, errors='coerce')
-                if operator == ">": filtered_df = self.df[col_numeric > value]
-                elif operator == "<": filtered_df = self.df[col_numeric < value]
-                elif operator == ">=": filtered_df = self.df[col_numeric >= value]
-                elif operator == "<=": filtered_df = self.df[col_numeric <= value]
-            elif operator == "contains":
-                filtered_df = self.df[original_col.astype(str).str.contains(value, case=False, na=False)]
-            elif operator == "is null":
-                filtered_df = self.df[original_col.isnull()]
-            elif operator == "is not null":
-                filtered_df = self.df[original_col.notnull()]
-            else:
-                try:
-                    converted_value = original_col.dtype.type(value)
-                    if operator == "==": filtered_df = self.df[original_col == converted_value]
-                    elif operator == "!=": filtered_df = self.df[original_col != converted_value]
-                except (ValueError, TypeError):
-                    if operator == "==": filtered_df = self.df[original_col.astype(str) == value]
-                    elif operator == "!=": filtered_df = self.df[original_col.astype(str) != value]
-            self.df = filtered_df
-            self.redo_stack.clear()
-            self.log_action(f"Filtered column '{column}' where {operator} '{value}'.")
-            self.update_treeview(self.df)
-            self.update_button_states()
-        except Exception as e:
-            messagebox.showerror("Filter Error", f"An error occurred during filtering: {e}")
-            self.undo_stack.pop()
-            self.update_button_states()
-            
+
+        def filtered(staged):
+            self.commit_action(staged, f"Filtered where {expression}.", recipe.filter_step(expression))
+            if self.column_cache.indexes is not None:
+                self.log_detail(self.column_indexes.summary())
+                for name, kind, rows, megabytes in self.column_indexes.report().itertuples(index=False, name=None):
+                    self.log_detail(f"  {name}: {kind} index over {rows:,} rows, {megabytes:.1f} MB")
+
+        # Call the separated logic function
+        self.run_job("Filtering", self.staged(lambda job: data_logic.filter_expression_logic(self.df, expression, self.column_cache)),
+                     filtered, error_title="Filter Error", error_prefix="An error occurred during filtering")
+
     def log_action(self, message):
         timestamp = datetime.datetime.now().strftime("%H:%M:%S")
         log_message = f"[{timestamp}] {message}"
@@ -323,6 +950,13 @@ class App(ttk.Window):
         self.history_text.see(END)
         self.history_text.config(state="disabled")
 
+    def log_detail(self, text):
+        """Adds an indented line under the latest history entry."""
+        self.history_text.config(state="normal")
+        self.history_text.insert(END, f"    {text}\n")
+        self.history_text.see(END)
+        self.history_text.config(state="disabled")
+
     def clear_history(self):
         self.history_text.config(state="normal")
         self.history_text.delete('1.0', END)
@@ -335,42 +969,132 @@ class App(ttk.Window):
             self.custom_value_entry.config(state="disabled")
 
     def toggle_filter_value_entry(self, event=None):
-        if self.operator_selector.get() in ["is null", "is not null"]:
+        if self.operator_selector.get() in data_logic.UNARY_OPERATORS:
             self.filter_value_entry.config(state="disabled")
         else:
             self.filter_value_entry.config(state="normal")
             
-    def export_to_csv(self):
+    def save_recipe(self):
+        if self.recipe is None or not self.recipe.steps:
+            messagebox.showwarning("Warning", "No actions to save yet.")
+            return
+        filepath = filedialog.asksaveasfilename(defaultextension=".json", filetypes=[("Recipe files", "*.json")])
+        if not filepath: return
+        try:
+            self.recipe.save(filepath)
+        except OSError as e:
+            messagebox.showerror("Error", f"Failed to save recipe: {e}")
+            return
+        self.log_action(f"Saved a recipe of {len(self.recipe.steps)} step(s) to {os.path.basename(filepath)}.")
+
+    def export_data(self):
         if self.df is None: return
+        filepath = filedialog.asksaveasfilename(defaultextension=".csv", filetypes=export.EXPORT_FILETYPES)
+        if not filepath: return
         try:
-            filepath = filedialog.asksaveasfilename(defaultextension=".csv", filetypes=[("CSV files", "*.csv")])
-            if not filepath: return
-            self.df.to_csv(filepath, index=False)
-            messagebox.showinfo("Success", f"Data successfully exported to:\n{filepath}")
-            self.log_action(f"Exported data to {os.path.basename(filepath)}.")
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to export file: {e}")
+            export.detect_format(filepath)
+        except ValueError as e:
+            messagebox.showerror("Error", str(e))
+            return
+
+        def exported(rows):
+            messagebox.showinfo("Success", f"{rows:,} rows exported to:\n{filepath}")
+            self.log_action(f"Exported {rows:,} rows to {os.path.basename(filepath)}.")
+
+        def write(job):
+            if self.source is not None:
+                # Lazy and out-of-core: stream the source through the recorded steps.
+                return export.export_chunks(self.source.iter_chunks(job), filepath, self.source.columns, job,
+                                            reread=lambda: self.source.iter_chunks(job))
+            # In memory: write row slices of the current (possibly filtered) frame, never a copy of it;
+            # the file's column types come from the whole frame, not the first slice.
+            return export.export_chunks(export.frame_chunks(self.df), filepath, list(self.df.columns), job, len(self.df),
+                                        schema_from=self.df)
+
+        self.run_job(f"Exporting {os.path.basename(filepath)}", write, exported, error_prefix="Failed to export file")
 
     def generate_plot(self):
         if self.df is None: return
         column = self.column_selector.get()
         plot_type = self.plot_type_selector.get()
+        y_column = self.plot_y_selector.get()
+        approximate = self.approximate.get()
         if not column or not plot_type: return
+        try:
+            bins = max(2, int(self.plot_bins.get()))
+        except (TclError, ValueError):
+            messagebox.showerror("Error", "Bins must be a whole number.")
+            return
+        needs_y = plot_type.startswith(("Scatter", "Time Series"))
+        if needs_y and not y_column:
+            messagebox.showwarning("Input Error", "Please select a Y column for this plot.")
+            return
+        numeric = [column] if plot_type.startswith(("Histogram", "Scatter")) else []
+        numeric += [y_column] if needs_y else []
+        for name in numeric:
+            if not pd.api.types.is_numeric_dtype(self.df[name]):
+                messagebox.showerror("Error", f"{plot_type} requires '{name}' to be numeric.")
+                return
+
+        # Bins and counts of an out-of-core file are streamed over the whole column;
+        # point plots need every point at once, so they are drawn from the preview rows.
+        preview_only = self.out_of_core and needs_y
+        note = f" (first {len(self.df):,} rows only)" if preview_only else ""
+        if preview_only:
+            self.log_action(f"Plotting '{y_column}' against '{column}' from the first {len(self.df):,} rows only; "
+                            "out-of-core files aren't loaded for point plots.")
+
+        def column_chunks(job):
+            return (chunk[column] for chunk in self.source.iter_chunks(job, [column]))
+
+        def plot_data(job):
+            # matplotlib is only imported for the first plot, here off the Tk thread.
+            import_plotting()
+            if self.out_of_core and plot_type.startswith("Histogram"):
+                return self.plots.histogram_chunks(lambda: column_chunks(job), bins)
+            if self.out_of_core and plot_type.startswith("Bar Chart"):
+                return self.plots.category_counts_chunks(column_chunks(job))
+            # Only the plotted columns are needed, so a lazy plan reads just those.
+            frame = self.result_frame(job, [column, y_column] if needs_y and y_column != column else [column])
+            if plot_type.startswith("Histogram"):
+                return self.plots.histogram(frame[column], bins, approximate)
+            if plot_type.startswith("Bar Chart"):
+                return self.plots.category_counts(frame[column], approximate=approximate)
+            if plot_type.startswith("Scatter"):
+                return self.plots.scatter(frame[column], frame[y_column])
+            return self.plots.time_series(frame[column], frame[y_column])
+
+        self.run_job(f"Preparing plot of '{column}'", plot_data,
+                     lambda data: self.draw_plot(data, column, plot_type, y_column, note),
+                     error_prefix="Could not generate plot")
+
+    def draw_plot(self, data, column, plot_type, y_column=None, note=""):
+        """Draws precomputed plot data: bins, counts or already thinned points."""
         plot_window = ttk.Toplevel(self)
         plot_window.title(f"Plot for {column}")
         plot_window.geometry("800x600")
         fig = Figure(figsize=(7, 5), dpi=100)
         ax = fig.add_subplot(111)
         try:
-            if plot_type == "Histogram (Numeric)":
-                if not pd.api.types.is_numeric_dtype(self.df[column]):
-                    messagebox.showerror("Error", "Histogram requires a numeric column.")
-                    plot_window.destroy()
-                    return
-                self.df[column].dropna().plot(kind='hist', ax=ax, bins=30, title=f'Histogram of {column}')
-            elif plot_type == "Bar Chart (Categorical)":
-                value_counts = self.df[column].value_counts().nlargest(20)
-                value_counts.plot(kind='bar', ax=ax, title=f'Bar Chart of {column}')
+            if plot_type.startswith("Histogram"):
+                counts, edges = data
+                ax.stairs(counts, edges, fill=True)
+                ax.set_title(f'Histogram of {column}')
+            elif plot_type.startswith("Bar Chart"):
+                ax.bar(range(len(data)), data.to_numpy())
+                ax.set_xticks(range(len(data)), [str(label) for label in data.index], rotation=90)
+                ax.set_title(f'Bar Chart of {column}')
+            else:
+                x, y, total = data
+                shown = f" ({len(x):,} of {total:,} points)" if len(x) < total else ""
+                if plot_type.startswith("Scatter"):
+                    ax.scatter(x, y, s=4, alpha=0.5)
+                    ax.set_title(f'{y_column} vs {column}{shown}{note}')
+                else:
+                    ax.plot(x, y, linewidth=0.8)
+                    ax.set_title(f'{y_column} over {column}{shown}{note}')
+                ax.set_xlabel(column)
+                ax.set_ylabel(y_column)
             fig.tight_layout()
             canvas = FigureCanvasTkAgg(fig, master=plot_window)
             canvas.draw()
@@ -379,7 +1103,6 @@ class App(ttk.Window):
             messagebox.showerror("Error", f"Could not generate plot: {e}")
             plot_window.destroy()
 
-
 if __name__ == "__main__":
     app = App()
     app.mainloop()
\ No newline at end of file
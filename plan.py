@@ -0,0 +1,100 @@
+# plan.py
+
+import numpy as np
+
+# Steps recorded on a ChunkedSource form a logical plan. Every step exposes:
+#   columns                 - the columns it reads (None means all of them)
+#   writes                  - the columns whose values it changes
+#   commutes_with_filters   - whether a row filter may run before it instead of after
+# and filters additionally expose mask(chunk). The functions below rewrite a
+# plan into a cheaper one that gives the same rows.
+
+def is_filter(step):
+    return hasattr(step, "mask")
+
+
+class FusedFilterStep:
+    """Consecutive filters evaluated as one combined mask, so each chunk is sliced once."""
+
+    commutes_with_filters = True
+    writes = frozenset()
+
+    def __init__(self, filters):
+        self.filters = tuple(filters)
+        self.columns = frozenset().union(*(f.columns for f in self.filters))
+        self.description = " AND ".join(f.description for f in self.filters)
+
+    def start(self):
+        return None
+
+    def mask(self, chunk):
+        combined = np.ones(len(chunk), dtype=bool)
+        for f in self.filters:
+            combined &= f.mask(chunk)
+        return combined
+
+    def apply(self, chunk, state):
+        return chunk[self.mask(chunk)]
+
+
+def push_down_filters(steps):
+    """Moves each filter as close to the reader as it can go, so later steps see fewer rows."""
+    steps = list(steps)
+    for i, step in enumerate(steps):
+        if not is_filter(step):
+            continue
+        j = i
+        while j > 0 and _can_move_before(steps[j - 1], step):
+            steps[j - 1], steps[j] = steps[j], steps[j - 1]
+            j -= 1
+    return steps
+
+def _can_move_before(previous, f):
+    if is_filter(previous):
+        # Filters keep their relative order; fuse_filters combines them anyway.
+        return False
+    return previous.commutes_with_filters and not (previous.writes & f.columns)
+
+def fuse_filters(steps):
+    """Replaces every run of consecutive filters with a single FusedFilterStep."""
+    fused, run = [], []
+    for step in list(steps) + [None]:
+        if step is not None and is_filter(step):
+            run.append(step)
+            continue
+        if len(run) > 1:
+            fused.append(FusedFilterStep(run))
+        else:
+            fused.extend(run)
+        run = []
+        if step is not None:
+            fused.append(step)
+    return fused
+
+def prune_steps(steps, columns):
+    """Drops steps that can't affect the requested columns and works out which
+    columns have to be read. Returns (steps, columns to read or None for all)."""
+    if columns is None:
+        return list(steps), None
+    needed = set(columns)
+    kept = []
+    for step in reversed(list(steps)):
+        if needed is not None and step.writes and not (step.writes & needed) and step.commutes_with_filters:
+            # e.g. a fill on a column nobody asked for: it doesn't change which rows survive.
+            continue
+        kept.append(step)
+        if needed is not None:
+            needed = None if step.columns is None else needed | set(step.columns)
+    return kept[::-1], needed
+
+def optimize(steps, columns=None):
+    """Returns (optimized steps, columns to read) for producing `columns` (None for all)."""
+    steps, read_columns = prune_steps(steps, columns)
+    return fuse_filters(push_down_filters(steps)), read_columns
+
+def explain(steps, columns=None):
+    """Returns a short, human-readable description of the optimized plan."""
+    optimized, read_columns = optimize(steps, columns)
+    lines = [f"Read {'all columns' if read_columns is None else ', '.join(sorted(map(str, read_columns)))}"]
+    lines += [step.description for step in optimized]
+    return lines
@@ -0,0 +1,187 @@
+# plotting.py
+
+import numpy as np
+import pandas as pd
+import data_logic
+
+# Histograms are first counted into FINE_BINS equal bins; any requested bin count
+# is then merged from those. 3600 divides evenly by most counts people pick
+# (10, 20, 25, 30, 40, 50, 60, 100, 120, 200, ...), which makes those exact.
+FINE_BINS = 3600
+# Scatter and time-series plots never hand matplotlib more points than this.
+MAX_POINTS = 20_000
+# Approximate mode only looks at a sample of this many rows.
+SAMPLE_ROWS = 1_000_000
+
+def _float_values(series):
+    return series.to_numpy(dtype="float64", na_value=np.nan)
+
+def _datetime_values(series):
+    if not pd.api.types.is_datetime64_any_dtype(series):
+        series = pd.to_datetime(series, errors="coerce")
+    return series.to_numpy(dtype="datetime64[ns]")
+
+def _sample_positions(n, size, seed=0):
+    return np.sort(np.random.default_rng(seed).choice(n, size, replace=False))
+
+def fine_histogram(values, fine_bins=FINE_BINS):
+    """Counts finite values into fine_bins equal bins. Returns (counts, low, high)."""
+    values = values[np.isfinite(values)]
+    if not len(values):
+        return np.zeros(fine_bins, dtype=np.int64), 0.0, 1.0
+    low, high = _value_range(float(values.min()), float(values.max()))
+    return _bin_counts(values, low, high, fine_bins), low, high
+
+def _value_range(low, high):
+    # A single distinct value still gets a bin of width one around it.
+    return (low - 0.5, high + 0.5) if low == high else (low, high)
+
+def _bin_counts(values, low, high, fine_bins):
+    """Counts finite values within [low, high] into fine_bins equal bins."""
+    positions = ((values - low) * (fine_bins / (high - low))).astype(np.int64)
+    np.clip(positions, 0, fine_bins - 1, out=positions)
+    return np.bincount(positions, minlength=fine_bins)
+
+def rebin(fine_counts, low, high, bins):
+    """Merges fine bins into `bins` equal bins by their centers. Returns (counts, edges).
+
+    Exact when len(fine_counts) is a multiple of bins; otherwise a value can be
+    off by at most one fine bin.
+    """
+    fine_bins = len(fine_counts)
+    target = ((2 * np.arange(fine_bins) + 1) * bins) // (2 * fine_bins)
+    counts = np.bincount(target, weights=fine_counts, minlength=bins)
+    return counts, np.linspace(low, high, bins + 1)
+
+def downsample_min_max(x, y, max_points=MAX_POINTS):
+    """Keeps the lowest and highest y of each of max_points / 2 buckets along x,
+    so spikes survive the downsampling. x must be sorted."""
+    n = len(x)
+    if n <= max_points:
+        return x, y
+    buckets = np.arange(n) * (max_points // 2) // n
+    # Sorted by bucket, then y: the first row of a bucket is its minimum, the last its maximum.
+    order = np.lexsort((y, buckets))
+    starts = np.flatnonzero(np.r_[True, buckets[order][1:] != buckets[order][:-1]])
+    ends = np.r_[starts[1:], n] - 1
+    keep = np.unique(np.concatenate([order[starts], order[ends]]))
+    return x[keep], y[keep]
+
+
+class PlotEngine:
+    """Computes what a plot draws (bins, counts, thinned points) instead of handing
+    matplotlib whole columns.
+
+    Histogram bins and category counts are cached per column version in a
+    data_logic.ColumnCache: changing the bin count re-bins the cached fine
+    histogram without reading the column, and removed_counts() updates cached
+    counts from just the rows a filter or drop took out.
+    """
+
+    def __init__(self, cache=None, max_points=MAX_POINTS, sample_rows=SAMPLE_ROWS):
+        self.cache = cache if cache is not None else data_logic.ColumnCache()
+        self.max_points = max_points
+        self.sample_rows = sample_rows
+
+    def _sampled(self, series, approximate):
+        """Returns (series or a sample of it, factor to scale counts back up by)."""
+        if not approximate or len(series) <= self.sample_rows:
+            return series, 1.0
+        return series.iloc[_sample_positions(len(series), self.sample_rows)], len(series) / self.sample_rows
+
+    def histogram(self, series, bins=30, approximate=False):
+        """Returns (counts, edges) for a numeric column."""
+        def compute(series):
+            sample, scale = self._sampled(series, approximate)
+            counts, low, high = fine_histogram(_float_values(sample))
+            return counts * scale, low, high
+        fine_counts, low, high = self.cache.get(series, ("fine_histogram", approximate), compute)
+        return rebin(fine_counts, low, high, bins)
+
+    def category_counts(self, series, top=20, approximate=False):
+        """Returns the `top` most frequent values of a column with their counts."""
+        def compute(series):
+            sample, scale = self._sampled(series, approximate)
+            counts = sample.value_counts()
+            counts = counts[counts > 0]
+            return counts if scale == 1.0 else (counts * scale).round().astype(np.int64)
+        return self.cache.get(series, ("value_counts", approximate), compute).nlargest(top)
+
+    def histogram_chunks(self, read_chunks, bins=30):
+        """histogram() for a column too big to hold, streamed as a sequence of Series.
+
+        read_chunks() is called twice: the first pass finds the value range and
+        the second counts into fine bins over it, so the bins are the ones
+        histogram() would give for the whole column.
+        """
+        low, high = np.inf, -np.inf
+        for series in read_chunks():
+            values = _float_values(series)
+            values = values[np.isfinite(values)]
+            if len(values):
+                low, high = min(low, float(values.min())), max(high, float(values.max()))
+        if low > high:
+            return rebin(np.zeros(FINE_BINS, dtype=np.int64), 0.0, 1.0, bins)
+        low, high = _value_range(low, high)
+        counts = np.zeros(FINE_BINS, dtype=np.int64)
+        for series in read_chunks():
+            values = _float_values(series)
+            counts += _bin_counts(values[np.isfinite(values)], low, high, FINE_BINS)
+        return rebin(counts, low, high, bins)
+
+    def category_counts_chunks(self, chunks, top=20):
+        """category_counts() for a column streamed as a sequence of Series; only the
+        running count per distinct value is kept."""
+        counts = None
+        for series in chunks:
+            chunk_counts = series.value_counts()
+            counts = chunk_counts if counts is None else counts.add(chunk_counts, fill_value=0)
+        if counts is None:
+            return pd.Series(dtype=np.int64)
+        return counts[counts > 0].astype(np.int64).nlargest(top)
+
+    def removed_counts(self, before, after, removed):
+        """Works out exact category counts for `after` = `before` minus the `removed` rows.
+
+        Subtracting the removed rows' counts is cheaper than recounting whenever
+        fewer rows were removed than kept; otherwise the counts are left to be
+        recomputed from `after` when next needed. Returns {column: counts} for
+        put_counts(), which stores them once `after` is the current frame.
+        """
+        if len(removed) >= len(after):
+            return {}
+        updated = {}
+        for column in after.columns:
+            counts = self.cache.peek(before[column], ("value_counts", False))
+            if counts is None:
+                continue
+            counts = counts.sub(removed[column].value_counts(), fill_value=0)
+            updated[column] = counts[counts > 0].astype(np.int64).sort_values(ascending=False, kind="stable")
+        return updated
+
+    def put_counts(self, df, counts):
+        for column, column_counts in counts.items():
+            self.cache.put(df[column], ("value_counts", False), column_counts)
+
+    def scatter(self, x, y):
+        """Returns (x values, y values, points before thinning) for two numeric columns."""
+        xs, ys = _float_values(x), _float_values(y)
+        valid = np.isfinite(xs) & np.isfinite(ys)
+        xs, ys = xs[valid], ys[valid]
+        total = len(xs)
+        if total > self.max_points:
+            keep = _sample_positions(total, self.max_points)
+            xs, ys = xs[keep], ys[keep]
+        return xs, ys, total
+
+    def time_series(self, x, y):
+        """Returns (times, values, points before thinning), sorted by time and thinned with
+        downsample_min_max(). x may be datetimes or text that parses as dates."""
+        times = self.cache.get(x, "datetimes", _datetime_values)
+        values = _float_values(y)
+        valid = ~np.isnat(times) & np.isfinite(values)
+        times, values = times[valid], values[valid]
+        order = np.argsort(times, kind="stable")
+        times, values = times[order], values[order]
+        thinned_times, thinned_values = downsample_min_max(times, values, self.max_points)
+        return thinned_times, thinned_values, len(times)
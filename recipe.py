@@ -0,0 +1,104 @@
+# recipe.py
+
+import json
+import data_logic
+import streaming
+
+RECIPE_VERSION = 1
+
+# A recipe step is a plain dict naming a data_logic operation and its arguments:
+#   {"op": "remove_duplicates", "columns": [...] or None, "keep": ..., "order_by": ...}
+#   {"op": "handle_missing_values", "column": ..., "action": ..., "custom_value": ...}
+#   {"op": "handle_missing_values_batch", "strategies": {column: data_logic.missing_value_strategy(...)}}
+#   {"op": "filter", "expression": <Condition/And/Or/Not as to_dict()>}
+
+def remove_duplicates_step(columns=None, keep="first", order_by=None):
+    return {"op": "remove_duplicates", "columns": columns, "keep": keep, "order_by": order_by}
+
+def missing_values_step(column, action, custom_value=None):
+    return {"op": "handle_missing_values", "column": column, "action": action, "custom_value": custom_value}
+
+def missing_values_batch_step(strategies):
+    return {"op": "handle_missing_values_batch", "strategies": strategies}
+
+def filter_step(expression):
+    return {"op": "filter", "expression": expression.to_dict()}
+
+
+class Recipe:
+    """The cleaning actions applied to a frame, as a serializable list of steps.
+
+    The App records a step for every action it commits and keeps the list in
+    line with undo/redo, so a saved recipe reproduces the frame on screen. A
+    recipe can be replayed in memory (apply) or streamed over a file (source).
+    """
+
+    def __init__(self, steps=()):
+        self.steps = list(steps)
+        self._undone = []
+
+    def record(self, step):
+        self.steps.append(step)
+        self._undone.clear()
+
+    def undo(self):
+        self._undone.append(self.steps.pop())
+
+    def redo(self):
+        self.steps.append(self._undone.pop())
+
+    def clear(self):
+        self.steps.clear()
+        self._undone.clear()
+
+    def to_json(self):
+        return json.dumps({"version": RECIPE_VERSION, "steps": self.steps}, indent=2)
+
+    @classmethod
+    def from_json(cls, text):
+        data = json.loads(text)
+        if data.get("version") != RECIPE_VERSION:
+            raise ValueError(f"Unsupported recipe version: {data.get('version')}")
+        for step in data["steps"]:
+            if step.get("op") not in ("remove_duplicates", "handle_missing_values", "handle_missing_values_batch", "filter"):
+                raise ValueError(f"Unknown recipe step: {step.get('op')}")
+        return cls(data["steps"])
+
+    def save(self, filepath):
+        with open(filepath, "w") as f:
+            f.write(self.to_json())
+
+    @classmethod
+    def load(cls, filepath):
+        with open(filepath) as f:
+            return cls.from_json(f.read())
+
+    def apply(self, df, cache=None):
+        """Replays the steps on an in-memory frame with the data_logic functions."""
+        for step in self.steps:
+            if step["op"] == "remove_duplicates":
+                df = data_logic.remove_duplicates_logic(df, step.get("columns"), step.get("keep", "first"),
+                                                        step.get("order_by"))
+            elif step["op"] == "handle_missing_values":
+                df = data_logic.handle_missing_values_logic(df, step["column"], step["action"], step.get("custom_value"))
+            elif step["op"] == "handle_missing_values_batch":
+                df = data_logic.handle_missing_values_batch_logic(df, step["strategies"])
+            else:
+                df = data_logic.filter_expression_logic(df, data_logic.expression_from_dict(step["expression"]), cache)
+        return df
+
+    def source(self, source, job=None):
+        """Returns `source` (a streaming.ChunkedSource) with the steps added to its plan."""
+        for step in self.steps:
+            if step["op"] == "remove_duplicates":
+                plan_step = streaming.DropDuplicatesStep.create(source, step.get("columns"), step.get("keep", "first"),
+                                                                step.get("order_by"), job=job)
+            elif step["op"] == "handle_missing_values":
+                plan_step = streaming.MissingValuesStep.create(source, step["column"], step["action"],
+                                                               step.get("custom_value"), job)
+            elif step["op"] == "handle_missing_values_batch":
+                plan_step = streaming.MissingValuesBatchStep.create(source, step["strategies"], job)
+            else:
+                plan_step = streaming.FilterStep(data_logic.expression_from_dict(step["expression"]))
+            source = source.with_step(plan_step)
+        return source
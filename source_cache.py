@@ -0,0 +1,196 @@
+# source_cache.py
+
+import hashlib
+import json
+import os
+import tempfile
+import time
+
+DEFAULT_MAX_BYTES = 4 * 1024 ** 3
+SAMPLE_BLOCKS = 16
+SAMPLE_BLOCK_BYTES = 64 * 1024
+INDEX_NAME = "index.json"
+
+def default_cache_dir():
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "data_wrangler")
+
+def content_digest(filepath, size=None):
+    """Hashes the size and evenly spaced blocks of a file.
+
+    Reading samples rather than the whole file keeps the check fast on
+    multi-gigabyte sources; together with size and mtime it catches files
+    rewritten in place or copied over with their timestamps preserved.
+    """
+    size = os.path.getsize(filepath) if size is None else size
+    digest = hashlib.blake2b(str(size).encode(), digest_size=16)
+    with open(filepath, "rb") as f:
+        if size <= SAMPLE_BLOCKS * SAMPLE_BLOCK_BYTES:
+            digest.update(f.read())
+        else:
+            step = (size - SAMPLE_BLOCK_BYTES) // (SAMPLE_BLOCKS - 1)
+            for i in range(SAMPLE_BLOCKS):
+                f.seek(i * step)
+                digest.update(f.read(SAMPLE_BLOCK_BYTES))
+    return digest.hexdigest()
+
+
+class SourceCache:
+    """Parsed CSV/Excel sources stored as uncompressed Feather files.
+
+    Entries are keyed by the source's absolute path and validated against its
+    size, mtime and content_digest(), so a changed file is parsed again. Hits
+    are read memory-mapped: numeric columns are backed by the page cache
+    rather than copied. When the cache grows past ``max_bytes`` the least
+    recently used entries are removed. Without pyarrow the cache is a no-op.
+
+    A file that is still memory-mapped can't be deleted or replaced on
+    Windows; its entry is removed anyway and the file is deleted by a later
+    eviction or clear() once nothing maps it.
+    """
+
+    def __init__(self, directory=None, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = directory or default_cache_dir()
+        self.max_bytes = max_bytes
+        self._index = None
+
+    @property
+    def available(self):
+        try:
+            import pyarrow.feather  # noqa: F401
+        except ImportError:
+            return False
+        return True
+
+    @property
+    def size_bytes(self):
+        return sum(entry["bytes"] for entry in self.index.values())
+
+    @property
+    def index(self):
+        if self._index is None:
+            try:
+                with open(os.path.join(self.directory, INDEX_NAME)) as f:
+                    self._index = json.load(f)
+            except (OSError, ValueError):
+                self._index = {}
+        return self._index
+
+    def read(self, filepath, parse, job=None):
+        """Returns the cached frame for filepath, or parse() it and cache the result."""
+        df = self.load(filepath)
+        if df is not None:
+            if job is not None:
+                job.report("loaded from cache")
+            return df
+        df = parse()
+        if job is not None:
+            job.check_cancelled()
+            job.report("caching")
+        self.store(filepath, df)
+        return df
+
+    def load(self, filepath):
+        """Returns the cached DataFrame for filepath, or None if there is no valid entry."""
+        if not self.available:
+            return None
+        key = os.path.abspath(filepath)
+        entry = self.index.get(key)
+        if entry is None:
+            return None
+        stat = os.stat(filepath)
+        if (entry["size"], entry["mtime_ns"]) != (stat.st_size, stat.st_mtime_ns) \
+                or entry["digest"] != content_digest(filepath, stat.st_size):
+            self._remove(key)
+            self._save_index()
+            return None
+        from pyarrow import feather
+        try:
+            table = feather.read_table(os.path.join(self.directory, entry["file"]), memory_map=True)
+        except (OSError, ValueError):
+            self._remove(key)
+            self._save_index()
+            return None
+        entry["last_used"] = time.time()
+        self._save_index()
+        return table.to_pandas(split_blocks=True)
+
+    def store(self, filepath, df):
+        """Caches df as the parsed contents of filepath. Returns False if it can't be stored."""
+        if not self.available:
+            return False
+        from pyarrow import feather
+        import pyarrow as pa
+        key = os.path.abspath(filepath)
+        stat = os.stat(filepath)
+        digest = content_digest(filepath, stat.st_size)
+        name = hashlib.blake2b(f"{key}|{stat.st_size}|{stat.st_mtime_ns}|{digest}".encode(),
+                               digest_size=16).hexdigest() + ".feather"
+        os.makedirs(self.directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(prefix="dw_cache_", suffix=".tmp", dir=self.directory)
+        os.close(fd)
+        try:
+            # Uncompressed, so hits can be memory-mapped instead of decompressed.
+            feather.write_feather(df, tmp_path, compression="uncompressed")
+        except (pa.ArrowException, ValueError, TypeError, OSError):
+            # e.g. non-string column names, columns mixing numbers and text, or a full disk.
+            os.remove(tmp_path)
+            return False
+        try:
+            os.replace(tmp_path, os.path.join(self.directory, name))
+        except OSError:
+            # The target is in use (memory-mapped on Windows). Its name is derived from the
+            # same content, so the file already there is just as good.
+            os.remove(tmp_path)
+            if not os.path.exists(os.path.join(self.directory, name)):
+                return False
+        if key in self.index and self.index[key]["file"] != name:
+            self._remove(key)
+        self.index[key] = {"file": name, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "digest": digest,
+                           "bytes": os.path.getsize(os.path.join(self.directory, name)), "last_used": time.time()}
+        self._evict()
+        self._save_index()
+        return key in self.index
+
+    def clear(self):
+        for key in list(self.index):
+            self._remove(key)
+        self._sweep()
+        self._save_index()
+
+    def _evict(self):
+        self._sweep()
+        # Least recently used first, until the cache fits its budget.
+        for key in sorted(self.index, key=lambda k: self.index[k]["last_used"]):
+            if self.size_bytes <= self.max_bytes:
+                break
+            self._remove(key)
+
+    def _remove(self, key):
+        entry = self.index.pop(key)
+        try:
+            os.remove(os.path.join(self.directory, entry["file"]))
+        except OSError:
+            # Gone already, or still mapped (PermissionError on Windows): _sweep() retries.
+            pass
+
+    def _sweep(self):
+        """Deletes cache files no entry refers to any more, skipping those still in use."""
+        referenced = {entry["file"] for entry in self.index.values()}
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return
+        for name in names:
+            if name.endswith(".feather") and name not in referenced:
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                except OSError:
+                    pass
+
+    def _save_index(self):
+        os.makedirs(self.directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(prefix="dw_index_", suffix=".tmp", dir=self.directory)
+        with os.fdopen(fd, "w") as f:
+            json.dump(self.index, f)
+        os.replace(tmp_path, os.path.join(self.directory, INDEX_NAME))
@@ -0,0 +1,229 @@
+# stats_engine.py
+
+import math
+import numpy as np
+import pandas as pd
+import data_logic
+
+STAT_ROWS = ["count", "unique", "top", "freq", "mean", "std", "min", "25%", "50%", "75%", "max"]
+QUARTILES = [0.25, 0.5, 0.75]
+TOP_K = 1024
+
+def is_numeric_column(series):
+    return pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series)
+
+
+class QuantileSketch:
+    """Mergeable quantile sketch (a simplified KLL).
+
+    Level h holds items that each stand for 2**h original values. When a level
+    grows past `k` items it is sorted and every other item (from a random
+    offset) is promoted to the next level, so memory stays O(k log n) and rank
+    error stays around 1/k however many values are added.
+    """
+
+    def __init__(self, k=2048, seed=None):
+        self.k = k
+        self.levels = [np.empty(0)]
+        self.rng = np.random.default_rng(seed)
+
+    def update(self, values):
+        self.levels[0] = np.concatenate([self.levels[0], np.asarray(values, dtype="float64")])
+        self._compact()
+
+    def merge(self, other):
+        for h, items in enumerate(other.levels):
+            if h == len(self.levels):
+                self.levels.append(np.empty(0))
+            self.levels[h] = np.concatenate([self.levels[h], items])
+        self._compact()
+
+    def _compact(self):
+        h = 0
+        while h < len(self.levels):
+            items = self.levels[h]
+            if len(items) > self.k:
+                items = np.sort(items)
+                odd = len(items) % 2
+                self.levels[h] = items[:odd]
+                if h + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+                promoted = items[odd:][self.rng.integers(2)::2]
+                self.levels[h + 1] = np.concatenate([self.levels[h + 1], promoted])
+            h += 1
+
+    def quantiles(self, qs):
+        items = np.concatenate(self.levels)
+        if not len(items):
+            return [np.nan] * len(qs)
+        weights = np.concatenate([np.full(len(level), 2.0 ** h) for h, level in enumerate(self.levels)])
+        order = np.argsort(items)
+        cumulative = np.cumsum(weights[order])
+        positions = np.searchsorted(cumulative, [q * cumulative[-1] for q in qs])
+        return [float(items[order][min(p, len(items) - 1)]) for p in positions]
+
+
+class DistinctSketch:
+    """HyperLogLog distinct-value counter over 64-bit value hashes (about 1% error at p=14)."""
+
+    def __init__(self, p=14):
+        self.p = p
+        self.registers = np.zeros(1 << p, dtype=np.uint8)
+
+    def update(self, series):
+        hashes = pd.util.hash_pandas_object(series, index=False).to_numpy()
+        bits = 64 - self.p
+        buckets = (hashes >> np.uint64(bits)).astype(np.int64)
+        rest = (hashes & np.uint64((1 << bits) - 1)).astype("float64")
+        # Rank = position of the leading 1-bit among the remaining bits (exact: bits < 53).
+        with np.errstate(divide="ignore"):
+            ranks = np.where(rest == 0, bits + 1, bits - np.floor(np.log2(rest)))
+        np.maximum.at(self.registers, buckets, ranks.astype(np.uint8))
+
+    def merge(self, other):
+        np.maximum(self.registers, other.registers, out=self.registers)
+
+    def estimate(self):
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / np.sum(2.0 ** -self.registers.astype("float64"))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if estimate <= 2.5 * m and zeros:
+            estimate = m * math.log(m / zeros)
+        return int(round(estimate))
+
+
+class ColumnSummary:
+    """One-pass, mergeable summary of a column, built chunk by chunk if needed.
+
+    Numeric columns keep count/mean/M2/min/max (merged with Chan's formula) plus
+    either their values (exact quartiles) or a QuantileSketch. Other columns keep
+    value counts (exact) or the top TOP_K counts and a DistinctSketch (approximate).
+    """
+
+    def __init__(self, numeric, approximate=False):
+        self.numeric = numeric
+        self.approximate = approximate
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = np.nan
+        self.max = np.nan
+        self.values = []
+        self.sketch = QuantileSketch() if numeric and approximate else None
+        self.counts = None
+        self.distinct = DistinctSketch() if approximate and not numeric else None
+
+    @classmethod
+    def of(cls, series, approximate=False):
+        summary = cls(is_numeric_column(series), approximate)
+        summary.update(series)
+        return summary
+
+    def update(self, series):
+        values = series.dropna()
+        if not len(values):
+            return
+        if self.numeric:
+            if not pd.api.types.is_numeric_dtype(values):
+                # A later chunk parsed differently; keep the values that are numbers.
+                values = pd.to_numeric(values, errors="coerce").dropna()
+            data = values.to_numpy(dtype="float64")
+            mean = data.mean()
+            self._merge_moments(len(data), mean, float(((data - mean) ** 2).sum()), data.min(), data.max())
+            if self.sketch is not None:
+                self.sketch.update(data)
+            else:
+                self.values.append(data)
+        else:
+            self.count += len(values)
+            counts = values.value_counts()
+            # Categoricals also count the categories that no longer occur.
+            self._merge_counts(counts[counts > 0])
+            if self.distinct is not None:
+                self.distinct.update(values)
+
+    def merge(self, other):
+        if self.numeric:
+            if other.count:
+                self._merge_moments(other.count, other.mean, other.m2, other.min, other.max)
+            if self.sketch is not None:
+                self.sketch.merge(other.sketch)
+            else:
+                self.values.extend(other.values)
+        else:
+            self.count += other.count
+            if other.counts is not None:
+                self._merge_counts(other.counts)
+            if self.distinct is not None:
+                self.distinct.merge(other.distinct)
+
+    def _merge_moments(self, n, mean, m2, low, high):
+        total = self.count + n
+        delta = mean - self.mean
+        self.mean += delta * n / total
+        self.m2 += m2 + delta * delta * self.count * n / total
+        self.count = total
+        self.min = np.fmin(self.min, low)
+        self.max = np.fmax(self.max, high)
+
+    def _merge_counts(self, counts):
+        self.counts = counts if self.counts is None else self.counts.add(counts, fill_value=0)
+        if self.approximate:
+            self.counts = self.counts.nlargest(TOP_K)
+
+    def result(self):
+        """Returns this column's describe()-style statistics as a dict."""
+        if self.numeric:
+            if self.sketch is not None:
+                quartiles = self.sketch.quantiles(QUARTILES)
+            elif self.values:
+                quartiles = list(np.percentile(np.concatenate(self.values), [q * 100 for q in QUARTILES]))
+            else:
+                quartiles = [np.nan] * len(QUARTILES)
+            std = math.sqrt(self.m2 / (self.count - 1)) if self.count > 1 else np.nan
+            mean = self.mean if self.count else np.nan
+            return dict(zip(["count", "mean", "std", "min", "25%", "50%", "75%", "max"],
+                            [self.count, mean, std, self.min, *quartiles, self.max]))
+        result = {"count": self.count}
+        if self.counts is not None and len(self.counts):
+            result["unique"] = self.distinct.estimate() if self.distinct is not None else len(self.counts)
+            result["top"] = self.counts.idxmax()
+            result["freq"] = int(self.counts.max())
+        return result
+
+
+def summaries_frame(results, decimals=2):
+    """Builds a describe(include='all')-style frame from per-column result dicts."""
+    stats_df = pd.DataFrame({column: pd.Series(result, dtype=object) for column, result in results.items()},
+                            index=STAT_ROWS, dtype=object)
+    stats_df = stats_df.dropna(how="all")
+    return stats_df.map(lambda value: round(value, decimals) if isinstance(value, float) else value)
+
+
+class StatsEngine:
+    """Describes frames from per-column summaries cached by column version.
+
+    Summaries are kept in a data_logic.ColumnCache, so after an action only the
+    columns whose data changed are summarized again.
+    """
+
+    def __init__(self, cache=None):
+        self.cache = cache if cache is not None else data_logic.ColumnCache()
+
+    def describe(self, df, approximate=False):
+        self.cache.sync(df)
+        kind = ("summary", approximate)
+        results = {column: self.cache.get(df[column], kind, lambda series: ColumnSummary.of(series, approximate).result())
+                   for column in df.columns}
+        return summaries_frame(results)
+
+    def describe_chunks(self, chunks, approximate=False):
+        """Describes a stream of chunks in a single pass by merging per-chunk summaries."""
+        summaries = {}
+        for chunk in chunks:
+            for column in chunk.columns:
+                if column not in summaries:
+                    summaries[column] = ColumnSummary(is_numeric_column(chunk[column]), approximate)
+                summaries[column].update(chunk[column])
+        return summaries_frame({column: summary.result() for column, summary in summaries.items()})
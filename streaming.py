@@ -0,0 +1,437 @@
+# streaming.py
+
+import os
+import numpy as np
+import pandas as pd
+import data_logic
+import dedupe
+import plan
+
+PREVIEW_ROWS = 10_000
+DEFAULT_CHUNK_ROWS = 250_000
+FALLBACK_OUT_OF_CORE_BYTES = 1024 ** 3
+
+def default_out_of_core_threshold():
+    """Files above this size are offered out-of-core mode: a quarter of physical RAM,
+    since a parsed CSV usually takes several times its size on disk."""
+    try:
+        return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES") // 4
+    except (AttributeError, ValueError, OSError):
+        return FALLBACK_OUT_OF_CORE_BYTES
+
+def stream_csv(filepath, job=None, on_preview=None, preview_rows=PREVIEW_ROWS, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """Reads a CSV in chunks and returns the whole DataFrame.
+
+    The first, smaller chunk is handed to on_preview(chunk) as soon as it is
+    parsed so it can be shown while the rest of the file is still loading.
+    """
+    chunks = []
+    rows = 0
+    with pd.read_csv(filepath, chunksize=chunk_rows) as reader:
+        size = preview_rows
+        while True:
+            if job is not None:
+                job.check_cancelled()
+            try:
+                chunk = reader.get_chunk(size)
+            except StopIteration:
+                break
+            if not chunks and on_preview is not None:
+                on_preview(chunk)
+            chunks.append(chunk)
+            rows += len(chunk)
+            if job is not None:
+                job.report(f"{rows:,} rows read")
+            size = chunk_rows
+    if not chunks:
+        return pd.read_csv(filepath)
+    return pd.concat(chunks, ignore_index=True)
+
+
+# Steps are the nodes of the source's logical plan; see plan.py for the
+# columns / writes / commutes_with_filters attributes the optimizer relies on.
+
+class DropDuplicatesStep:
+    """Drops rows whose key (all columns, or the key `columns`) was already seen,
+    keeping one row per key by the `keep` policy (see dedupe.py).
+
+    Keeping the first row only needs the keys seen so far. For the other
+    policies, create() scans the source once and the step keeps the winning
+    row numbers, so it must not be reordered with filters.
+    """
+
+    writes = frozenset()
+
+    def __init__(self, columns=None, keep="first", order_by=None, winners=None, verify=True):
+        self.key_columns = None if columns is None else list(columns)
+        self.keep = keep
+        self.order_by = order_by
+        self.winners = winners
+        self.verify = verify
+        read = None if columns is None else set(columns) | ({order_by} if order_by else set())
+        self.columns = None if read is None else frozenset(read)
+        # Identical rows pass or fail a filter together, so filtering first is equivalent;
+        # with key columns, a filter on another column changes which row is kept.
+        self.commutes_with_filters = columns is None and winners is None
+        if columns is None:
+            self.description = "Removed duplicate rows"
+        else:
+            self.description = f"Removed rows with duplicate {', '.join(map(str, columns))}"
+        if keep != "first":
+            self.description += f", keeping the {keep}" + (f" {order_by}" if order_by else "")
+
+    @classmethod
+    def create(cls, source, columns=None, keep="first", order_by=None, verify=True, job=None):
+        if keep == "first":
+            return cls(columns, keep, order_by, verify=verify)
+        read = None if columns is None else list(dict.fromkeys(list(columns) + ([order_by] if order_by else [])))
+        winners = dedupe.winning_rows(source.iter_chunks(job, read), columns, keep, order_by, verify, job)
+        return cls(columns, keep, order_by, winners, verify)
+
+    def start(self):
+        if self.winners is None:
+            return dedupe.KeyTable(self.verify)
+        return {"offset": 0}
+
+    def apply(self, chunk, state):
+        if self.winners is None:
+            return chunk[state.first_rows(dedupe.key_frame(chunk, self.key_columns))]
+        rows = state["offset"] + np.arange(len(chunk))
+        state["offset"] += len(chunk)
+        positions = np.minimum(np.searchsorted(self.winners, rows), max(len(self.winners) - 1, 0))
+        keep = self.winners[positions] == rows if len(self.winners) else np.zeros(len(chunk), dtype=bool)
+        return chunk[keep]
+
+
+class MissingValuesStep:
+    """Fills missing values in one column. Fill values are computed once, over the
+    whole source, when the step is created, so the step itself is a constant fill."""
+
+    commutes_with_filters = True
+
+    def __init__(self, column, action, fill_value=None):
+        self.column = column
+        self.action = action
+        self.fill_value = fill_value
+        self.columns = frozenset([column])
+        self.writes = frozenset([column])
+        self.description = f"Applied '{action}' to column '{column}'"
+
+    @classmethod
+    def create(cls, source, column, action, custom_value=None, job=None):
+        if action == "Drop Rows":
+            # Dropping rows is just a filter, which lets the optimizer fuse and push it down.
+            return FilterStep.where(column, "is not null")
+        if action == "Fill with Value:":
+            return cls(column, action, custom_value)
+        return cls(column, action, chunked_fill_value(source.iter_chunks(job), column, action))
+
+    def start(self):
+        return None
+
+    def apply(self, chunk, state):
+        return data_logic.handle_missing_values_logic(chunk, self.column, "Fill with Value:", self.fill_value)
+
+
+class FilterStep:
+    """Keeps the rows of each chunk that match a filter expression (see data_logic)."""
+
+    commutes_with_filters = True
+    writes = frozenset()
+
+    def __init__(self, expression):
+        self.compiled = data_logic.compile_filter(expression)
+        self.columns = self.compiled.columns
+        self.description = f"Filtered where {self.compiled}"
+
+    @classmethod
+    def where(cls, column, operator, value=None):
+        return cls(data_logic.Condition(column, operator, value))
+
+    def start(self):
+        return None
+
+    def mask(self, chunk):
+        return self.compiled.mask(chunk)
+
+    def apply(self, chunk, state):
+        return chunk[self.mask(chunk)]
+
+
+class MissingValuesBatchStep:
+    """Handles missing values in several columns at once, like
+    data_logic.handle_missing_values_batch_logic. Every statistic, including the
+    per-group ones, is computed in one pass over the source when the step is
+    created; applying it is then a constant or per-group lookup per column.
+    Forward fill carries each column's last value over to the next chunk.
+    """
+
+    def __init__(self, drop=(), constants=None, group_fills=None, forward=()):
+        self.drop = list(drop)
+        self.constants = constants or {}
+        # column -> (group column, Series of fill values indexed by group)
+        self.group_fills = group_fills or {}
+        self.forward = list(forward)
+        self.writes = frozenset(self.constants) | frozenset(self.group_fills) | frozenset(self.forward)
+        self.columns = self.writes | frozenset(self.drop) | frozenset(g for g, _ in self.group_fills.values())
+        # A forward fill takes values from earlier rows, which a filter run first could remove.
+        # Dropped rows aren't in `writes`, so a step that drops rows is also kept in place,
+        # which stops prune_steps from removing it when no filled column is requested.
+        self.commutes_with_filters = not self.forward and not self.drop
+        self.description = f"Handled missing values in {len(self.columns)} column(s)"
+
+    @classmethod
+    def create(cls, source, strategies, job=None):
+        strategies = {column: data_logic.normalize_strategy(spec) for column, spec in strategies.items()}
+        drop, constants, forward, specs = [], {}, [], {}
+        for column, strategy in strategies.items():
+            action = strategy["action"]
+            if action in ["Backward Fill", "Interpolate"]:
+                raise ValueError(f"{action} needs the rows after each gap, so it isn't available in lazy or out-of-core mode.")
+            if action == "Drop Rows":
+                drop.append(column)
+            elif action == "Fill with Value:":
+                constants[column] = strategy["custom_value"]
+            elif action == "Forward Fill":
+                forward.append(column)
+            else:
+                specs[column] = (action, strategy["group_by"])
+        group_fills = {}
+        if specs:
+            columns = set(specs) | set(drop) | {group for _, group in specs.values() if group is not None}
+            chunks = (chunk.dropna(subset=drop) for chunk in source.iter_chunks(job, [c for c in source.columns if c in columns]))
+            for column, value in chunked_fill_values(chunks, specs).items():
+                group_by = specs[column][1]
+                if value is None:
+                    continue
+                if group_by is None:
+                    constants[column] = value
+                else:
+                    group_fills[column] = (group_by, value)
+        return cls(drop, constants, group_fills, forward)
+
+    def start(self):
+        # The last non-missing value of each forward-filled column so far.
+        return {}
+
+    def apply(self, chunk, state):
+        if self.drop:
+            chunk = chunk.dropna(subset=self.drop)
+        result = chunk.copy(deep=False)
+        for column, value in self.constants.items():
+            result[column] = data_logic.fill_column(chunk[column], value)
+        for column, (group_by, values) in self.group_fills.items():
+            result[column] = data_logic.fill_from(chunk[column], chunk[group_by].map(values).to_numpy())
+        for column in self.forward:
+            filled = chunk[column].ffill()
+            if column in state:
+                filled = data_logic.fill_column(filled, state[column])
+            # After a forward fill the last row holds the latest value, if there is one yet.
+            if len(filled) and pd.notna(filled.iloc[-1]):
+                state[column] = filled.iloc[-1]
+            result[column] = filled
+        return result
+
+
+def chunked_fill_value(chunks, column, action):
+    """Computes the mean, median or mode of a column across chunks in one pass."""
+    value = chunked_fill_values(chunks, {column: (action, None)})[column]
+    if value is None:
+        raise ValueError(f"Column '{column}' has no values to compute '{action}' from.")
+    return value
+
+def chunked_fill_values(chunks, specs):
+    """Computes the fill statistics of several columns across chunks in one pass.
+
+    `specs` maps column -> (action, group column or None), action being one of
+    Fill with Mean/Median/Mode. Means are kept as running sums and counts; the
+    median and mode are taken from merged value counts, so memory grows with
+    the number of distinct values (per group) rather than the number of rows.
+    Returns column -> fill value, or a Series of fill values indexed by group,
+    or None when the column has no values.
+    """
+    totals = {}
+    for chunk in chunks:
+        for column, (action, group_by) in specs.items():
+            values = chunk[column]
+            if action in ["Fill with Mean", "Fill with Median"] and not pd.api.types.is_numeric_dtype(values):
+                raise TypeError(f"{action} can only be used on numeric columns.")
+            if action == "Fill with Mean":
+                if group_by is None:
+                    part = pd.Series([values.sum(), values.count()], index=["sum", "count"])
+                else:
+                    part = values.groupby(chunk[group_by], observed=True).agg(["sum", "count"])
+            elif group_by is None:
+                part = values.value_counts()
+            else:
+                part = pd.DataFrame({"group": chunk[group_by], "value": values}) \
+                    .groupby(["group", "value"], observed=True).size()
+            totals[column] = part if column not in totals else totals[column].add(part, fill_value=0)
+
+    result = {}
+    for column, (action, group_by) in specs.items():
+        total = totals.get(column)
+        if action == "Fill with Mean":
+            if total is None:
+                result[column] = None
+            elif group_by is None:
+                result[column] = total["sum"] / total["count"] if total["count"] else None
+            else:
+                total = total[total["count"] > 0]
+                result[column] = total["sum"] / total["count"] if len(total) else None
+        elif total is None or total.empty:
+            result[column] = None
+        elif group_by is None:
+            result[column] = _median_from_counts(total) if action == "Fill with Median" else total.sort_index().idxmax()
+        elif action == "Fill with Median":
+            result[column] = _group_medians_from_counts(total)
+        else:
+            result[column] = data_logic.modes_from_counts(total.sort_index())
+    return result
+
+def _median_from_counts(counts):
+    """The middle value(s) of the sorted, count-weighted distinct values."""
+    counts = counts.sort_index()
+    cumulative = counts.cumsum().to_numpy()
+    n = cumulative[-1]
+    lower = counts.index[cumulative.searchsorted((n - 1) // 2, side="right")]
+    upper = counts.index[cumulative.searchsorted(n // 2, side="right")]
+    return (lower + upper) / 2
+
+def _group_medians_from_counts(counts):
+    """Per-group medians from (group, value)-indexed counts."""
+    frame = counts.sort_index().rename("n").reset_index()
+    group, value = frame.columns[0], frame.columns[1]
+    cumulative = frame.groupby(group, sort=False)["n"].cumsum()
+    n = frame.groupby(group, sort=False)["n"].transform("sum")
+    lower = frame[cumulative > (n - 1) // 2].groupby(group, sort=False)[value].first()
+    upper = frame[cumulative > n // 2].groupby(group, sort=False)[value].first()
+    return (lower + upper) / 2
+
+
+def csv_dtype_plan(filepath, sample_rows=PREVIEW_ROWS):
+    """Returns a {column: dtype} mapping that reads the CSV's text columns as
+    Arrow strings, judged from its first rows, or None if there is nothing to plan.
+
+    Numeric columns are left to the parser: a sample can't tell how wide later
+    values get or whether they go missing further down the file.
+    """
+    if not data_logic.has_arrow_strings():
+        return None
+    sample = pd.read_csv(filepath, nrows=sample_rows)
+    plan = {column: "string[pyarrow]" for column in sample.columns
+            if sample[column].dtype == object and pd.api.types.infer_dtype(sample[column], skipna=True) == "string"}
+    return plan or None
+
+class ChunkedSource:
+    """A CSV file (or an in-memory frame) processed chunk by chunk.
+
+    Cleaning steps are recorded as a logical plan rather than applied. The plan
+    is optimized (see plan.py) and run on each chunk as it streams past only
+    when rows are actually needed: for the preview, statistics, plots or export.
+    Only the columns the request needs are read, and filters run right after
+    parsing so discarded rows are never held. Sources are immutable: adding a
+    step returns a new source, so the undo history only keeps the previous object.
+    """
+
+    def __init__(self, filepath=None, steps=(), chunk_rows=DEFAULT_CHUNK_ROWS, frame=None, dtype=None):
+        self.filepath = filepath
+        self.frame = frame
+        self.steps = tuple(steps)
+        self.chunk_rows = chunk_rows
+        self.dtype = dtype
+        self._collected = None
+
+    def with_step(self, step):
+        return ChunkedSource(self.filepath, self.steps + (step,), self.chunk_rows, self.frame, self.dtype)
+
+    @property
+    def columns(self):
+        if self.frame is not None:
+            return list(self.frame.columns)
+        return list(pd.read_csv(self.filepath, nrows=0).columns)
+
+    def explain(self, columns=None):
+        return plan.explain(self.steps, columns)
+
+    def iter_chunks(self, job=None, columns=None, on_read=None):
+        """Yields the source's chunks with the optimized plan applied.
+
+        With `columns`, only those columns (plus any the plan reads) are parsed.
+        on_read(chunk), if given, sees each chunk as read, before any step runs.
+        """
+        steps, read_columns = plan.optimize(self.steps, columns)
+        usecols = None if read_columns is None else [c for c in self.columns if c in read_columns]
+        if usecols == []:
+            # Row counts still need one column to count rows of.
+            usecols = self.columns[:1]
+        states = [step.start() for step in steps]
+        for chunk in self._read(usecols):
+            if job is not None:
+                job.check_cancelled()
+            if on_read is not None:
+                on_read(chunk)
+            for step, state in zip(steps, states):
+                chunk = step.apply(chunk, state)
+            yield chunk if columns is None else chunk[list(columns)]
+
+    def _read(self, usecols):
+        if self.frame is not None:
+            frame = self.frame if usecols is None else self.frame[usecols]
+            for start in range(0, max(len(frame), 1), self.chunk_rows):
+                yield frame.iloc[start:start + self.chunk_rows]
+            return
+        dtype = self.dtype
+        if dtype is not None and usecols is not None:
+            dtype = {c: t for c, t in dtype.items() if c in usecols}
+        with pd.read_csv(self.filepath, chunksize=self.chunk_rows, usecols=usecols, dtype=dtype) as reader:
+            yield from reader
+
+    def collect(self, job=None, columns=None):
+        """Executes the plan and returns the resulting DataFrame (or just `columns` of it)."""
+        if columns is None and self._collected is not None:
+            return self._collected
+        if self.frame is not None and not self.steps:
+            return self.frame if columns is None else self.frame[list(columns)]
+        chunks = list(self.iter_chunks(job, columns))
+        if chunks:
+            result = pd.concat(chunks)
+        else:
+            result = pd.DataFrame(columns=self.columns if columns is None else list(columns))
+        if columns is None:
+            self._collected = result
+        return result
+
+    def head(self, n=PREVIEW_ROWS, job=None):
+        """Returns the first n rows after all steps, reading only as far as needed."""
+        chunks, rows = [], 0
+        for chunk in self.iter_chunks(job):
+            chunks.append(chunk)
+            rows += len(chunk)
+            if rows >= n:
+                break
+        if not chunks:
+            return pd.DataFrame(columns=self.columns)
+        return pd.concat(chunks).iloc[:n]
+
+    def count_rows(self, job=None):
+        rows = 0
+        for chunk in self.iter_chunks(job, columns=[]):
+            rows += len(chunk)
+            if job is not None:
+                job.report(f"{rows:,} rows counted")
+        return rows
+
+    def to_csv(self, filepath, job=None, on_read=None):
+        """Writes the processed rows to a CSV one chunk at a time. Returns the row count."""
+        rows = 0
+        header = True
+        for chunk in self.iter_chunks(job, on_read=on_read):
+            chunk.to_csv(filepath, index=False, mode="w" if header else "a", header=header)
+            header = False
+            rows += len(chunk)
+            if job is not None:
+                job.report(f"{rows:,} rows written")
+        if header:
+            pd.DataFrame(columns=self.columns).to_csv(filepath, index=False)
+        return rows
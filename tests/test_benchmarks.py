@@ -0,0 +1,27 @@
+# tests/test_benchmarks.py
+
+from benchmarks.datasets import make_frame
+from benchmarks.suite import compare, run
+
+def test_make_frame_ratios():
+    """Tests that the generator produces the requested rows, nulls and duplicates."""
+    # Act
+    test_df = make_frame(20_000, null_ratio=0.1, duplicate_ratio=0.2, cardinality=50)
+
+    # Assert
+    assert len(test_df) == 20_000
+    assert 0.08 < test_df['price'].isna().mean() < 0.12
+    assert 0.15 < test_df.duplicated().mean() < 0.25
+    assert test_df['name'].nunique() == 50
+
+def test_compare_flags_only_real_regressions():
+    """Tests that the check fails past the threshold and ignores tiny absolute changes."""
+    # Arrange
+    baseline = run(["1000"], repeat=1, only=["filter_numeric"])
+    slower = {"results": {"1000": {"filter_numeric": {"seconds": 10.0, "peak_mb": 0.0}}}}
+    noisy = {"results": {"1000": {"filter_numeric": {"seconds": baseline["results"]["1000"]["filter_numeric"]["seconds"] * 1.5,
+                                                      "peak_mb": 0.0}}}}
+
+    # Act & Assert
+    assert len(compare(baseline, slower, time_threshold=0.25)) == 1
+    assert compare(baseline, noisy, time_threshold=0.25) == []
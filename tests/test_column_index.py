@@ -0,0 +1,139 @@
+# tests/test_column_index.py
+
+import numpy as np
+import pandas as pd
+from column_index import ColumnIndexes, _column_nbytes
+from data_logic import ColumnCache, filter_mask_logic
+from history import History
+
+def make_df():
+    return pd.DataFrame({'price': [5.0, np.nan, 12.5, 3.0, 12.5, 40.0, np.nan, 7.0],
+                         'status': ['open', 'closed', None, 'open', 'pending', 'closed', 'open', None],
+                         'name': ['Alpha one', 'beta TWO', 'gamma', None, 'alphabet', 'Delta', 'omega', 'ALPHA'],
+                         'qty': [1, 2, 3, 4, 5, 6, 7, 8]})
+
+def test_indexed_filters_match_scans():
+    """Tests that every operator answered from an index gives the same rows as a scan."""
+    # Arrange
+    test_df = make_df()
+    indexes = ColumnIndexes(min_rows=0)
+    cache = ColumnCache(indexes=indexes)
+    conditions = [('price', '>', '7'), ('price', '<=', '12.5'), ('price', '>=', '40'), ('qty', '==', '4'),
+                  ('qty', '!=', '4'), ('status', '==', 'open'), ('status', '!=', 'open'), ('status', '==', 'None'),
+                  ('name', 'contains', 'alpha'), ('name', 'contains', 'ph'), ('name', 'contains', 'two')]
+
+    # Act
+    results = [(filter_mask_logic(test_df, *condition, cache=cache), filter_mask_logic(test_df, *condition))
+               for condition in conditions]
+
+    # Assert
+    for (indexed, scanned), condition in zip(results, conditions):
+        assert indexed.tolist() == scanned.tolist(), condition
+    assert set(indexes.report()['Index']) == {'sorted', 'values', 'ngrams'}
+
+def test_tracked_frames_reuse_the_index_after_filter_and_undo():
+    """Tests that frames filtered from or restored to the indexed rows answer from the same index."""
+    # Arrange
+    test_df = make_df()
+    indexes = ColumnIndexes(min_rows=0)
+    cache = ColumnCache(indexes=indexes)
+    history = History()
+    filter_mask_logic(test_df, 'status', '==', 'open', cache)
+    built = indexes.report()['Memory (MB)'].sum()
+    filtered = test_df[test_df['qty'] > 2]
+    history.record(test_df, filtered)
+
+    # Act
+    indexes.track(filtered)
+    on_filtered = filter_mask_logic(filtered, 'status', '==', 'open', cache)
+    restored = history.undo(filtered)
+    indexes.track(restored)
+    on_restored = filter_mask_logic(restored, 'status', '==', 'open', cache)
+
+    # Assert
+    assert on_filtered.tolist() == [False, True, False, False, True, False]
+    assert on_restored.tolist() == (restored['status'] == 'open').tolist()
+    assert len(indexes.report()) == 1 and indexes.report()['Memory (MB)'].sum() == built
+
+def test_index_memory_is_capped():
+    """Tests that the least recently used index is evicted to stay under the cap."""
+    # Arrange: room for about one sorted index of 1000 rows
+    test_df = pd.DataFrame({'a': np.arange(1000.0), 'b': np.arange(1000.0)[::-1]})
+    indexes = ColumnIndexes(max_bytes=15_000, min_rows=0)
+    cache = ColumnCache(indexes=indexes)
+
+    # Act
+    filter_mask_logic(test_df, 'a', '<', '10', cache)
+    filter_mask_logic(test_df, 'b', '<', '10', cache)
+
+    # Assert
+    assert indexes.report()['Column'].tolist() == ['b']
+    assert indexes.nbytes <= 15_000
+
+def test_contains_falls_back_to_scan_for_text_the_trigrams_cant_hold():
+    """Tests NUL and lone-surrogate needles and values, which the trigram index leaves to the scan."""
+    # Arrange
+    test_df = pd.DataFrame({'name': ['ab\x00cd', 'abcd', 'x\ud800yz', 'abc', 'zzabc']})
+    clean_df = pd.DataFrame({'name': ['abcd', 'abc', 'zzabc']})
+    cache = ColumnCache(indexes=ColumnIndexes(min_rows=0))
+    clean_cache = ColumnCache(indexes=ColumnIndexes(min_rows=0))
+
+    # Act
+    results = [(filter_mask_logic(test_df, 'name', 'contains', needle, cache),
+                filter_mask_logic(test_df, 'name', 'contains', needle)) for needle in ['abc', 'b\x00c', 'x\ud800y']]
+    clean = [filter_mask_logic(clean_df, 'name', 'contains', needle, clean_cache).tolist()
+             for needle in ['abc', 'b\x00c', '\ud800ab']]
+
+    # Assert
+    for indexed, scanned in results:
+        assert indexed.tolist() == scanned.tolist()
+    assert clean == [[True, True, True], [False, False, False], [False, False, False]]
+
+def test_pinned_column_versions_count_towards_the_cap():
+    """Tests that an indexed column kept alive for a filtered frame is reported and counted."""
+    # Arrange
+    test_df = pd.DataFrame({'a': np.arange(1000.0)})
+    indexes = ColumnIndexes(min_rows=0)
+    filter_mask_logic(test_df, 'a', '<', '10', ColumnCache(indexes=indexes))
+    before = indexes.nbytes
+
+    # Act
+    indexes.track(test_df[test_df['a'] > 500])
+
+    # Assert
+    assert indexes.pinned_nbytes == 8000
+    assert indexes.nbytes >= before + 8000
+    assert "earlier column versions" in indexes.summary()
+
+def test_tracking_changes_nothing_until_applied():
+    """Tests that a worked-out tracking leaves the indexes as they were until it is applied."""
+    # Arrange
+    test_df = pd.DataFrame({'a': np.arange(1000.0), 'b': np.arange(1000.0)})
+    indexes = ColumnIndexes(min_rows=0)
+    cache = ColumnCache(indexes=indexes)
+    filter_mask_logic(test_df, 'a', '<', '10', cache)
+    filter_mask_logic(test_df, 'b', '<', '10', cache)
+    filtered = test_df[test_df['a'] > 500]
+
+    # Act
+    plan = indexes.tracking(filtered, changed=['b'])
+    before = (indexes.pinned_nbytes, sorted(indexes.report()['Column']))
+    indexes.apply_tracking(plan)
+
+    # Assert
+    assert before == (0, ['a', 'b'])
+    assert indexes.pinned_nbytes == 8000
+    assert indexes.report()['Column'].tolist() == ['a']
+    assert filter_mask_logic(filtered, 'a', '<', '600', cache).tolist() == (filtered['a'] < 600).tolist()
+
+def test_object_column_memory_is_estimated_from_a_sample():
+    """Tests that the sampled size of a text column is close to measuring every value."""
+    # Arrange
+    words = pd.Series(['a' * (i % 50) for i in range(100_000)])
+
+    # Act
+    estimate = _column_nbytes(words, sample_rows=1000)
+
+    # Assert
+    exact = words.memory_usage(index=False, deep=True)
+    assert abs(estimate - exact) < exact * 0.02
@@ -3,7 +3,9 @@
 import pandas as pd
 import numpy as np
 import pytest
-from data_logic import remove_duplicates_logic, handle_missing_values_logic
+from data_logic import (remove_duplicates_logic, handle_missing_values_logic, filter_logic,
+                        filter_expression_logic, Condition, And, Or, Not, ColumnCache,
+                        optimize_dtypes_logic, handle_missing_values_batch_logic, missing_value_strategy)
 
 def test_remove_duplicates_logic():
     """Tests if the remove_duplicates_logic function works correctly."""
@@ -53,4 +55,136 @@ def test_handle_missing_values_raises_error_for_mean_on_text():
 
     # Act & Assert
     with pytest.raises(TypeError):
-        handle_missing_values_logic(test_df, column='colA', action='Fill with Mean')
\ No newline at end of file
+        handle_missing_values_logic(test_df, column='colA', action='Fill with Mean')
+
+def test_filter_logic_numeric_and_text():
+    """Tests numeric comparisons and case-insensitive contains filtering."""
+    # Arrange
+    data = {'colA': [5, 15, 25], 'colB': ['Apple', 'banana', 'Cherry']}
+    test_df = pd.DataFrame(data)
+
+    # Act
+    greater_df = filter_logic(test_df, column='colA', operator='>', value='10')
+    contains_df = filter_logic(test_df, column='colB', operator='contains', value='AN')
+
+    # Assert
+    assert list(greater_df['colA']) == [15, 25]
+    assert list(contains_df['colB']) == ['banana']
+
+def test_filter_expression_logic_compound():
+    """Tests that AND/OR/NOT expressions over several columns give the right rows."""
+    # Arrange
+    data = {'colA': [5, 15, 25, 35], 'colB': ['a.b', 'xyz', 'A.B', None]}
+    test_df = pd.DataFrame(data)
+    expression = Or(And(Condition('colA', '>', '10'), Not(Condition('colB', 'is null'))),
+                    Condition('colB', 'contains', 'a.'))
+
+    # Act
+    result_df = filter_expression_logic(test_df, expression)
+
+    # Assert: 'a.' is matched literally, not as a regex
+    assert list(result_df['colA']) == [5, 15, 25]
+
+def test_column_cache_reuses_until_column_changes():
+    """Tests that coerced columns are cached and recomputed after the column changes."""
+    # Arrange
+    cache = ColumnCache()
+    test_df = pd.DataFrame({'colA': ['1', '2', 'x']})
+    calls = []
+    def compute(series):
+        calls.append(series.name)
+        return pd.to_numeric(series, errors='coerce')
+
+    # Act
+    cache.get(test_df['colA'], 'numeric', compute)
+    cache.get(test_df['colA'], 'numeric', compute)
+    changed_df = test_df.assign(colA=test_df['colA'].replace('x', '3'))
+    cache.get(changed_df['colA'], 'numeric', compute)
+
+    # Assert
+    assert calls == ['colA', 'colA']
+
+def test_optimize_dtypes_logic_shrinks_columns():
+    """Tests downcasting, lossless float32 and categoricals, and the memory report."""
+    # Arrange
+    data = {'ints': [1, 2, 3, 4] * 25, 'halves': [0.5, 1.5, np.nan, 2.0] * 25,
+            'tenths': [0.1, 0.2, 0.3, 0.4] * 25, 'status': ['open', 'closed', None, 'open'] * 25}
+    test_df = pd.DataFrame(data)
+
+    # Act
+    optimized_df, report = optimize_dtypes_logic(test_df, arrow_strings=False)
+
+    # Assert
+    assert str(optimized_df['ints'].dtype) == 'uint8'
+    assert str(optimized_df['halves'].dtype) == 'float32'
+    assert str(optimized_df['tenths'].dtype) == 'float64'  # float32 would change the values
+    assert str(optimized_df['status'].dtype) == 'category'
+    assert list(report['Column']) == list(test_df.columns)
+    assert (report['After (KB)'] <= report['Before (KB)']).all()
+    assert list(optimized_df['ints']) == list(test_df['ints'])
+    assert np.array_equal(optimized_df['halves'], test_df['halves'], equal_nan=True)
+
+def test_operations_on_optimized_dtypes():
+    """Tests that fills and filters give the same rows on categorical columns."""
+    # Arrange
+    test_df = pd.DataFrame({'status': ['Open', 'closed', None, 'open', 'open', 'Closed'] * 10})
+    optimized_df, _ = optimize_dtypes_logic(test_df, arrow_strings=False)
+    assert str(optimized_df['status'].dtype) == 'category'
+
+    # Act
+    mode_df = handle_missing_values_logic(optimized_df, 'status', 'Fill with Mode')
+    value_df = handle_missing_values_logic(optimized_df, 'status', 'Fill with Value:', 'unknown')
+    contains_df = filter_logic(optimized_df, 'status', 'contains', 'OPEN')
+    equals_df = filter_logic(optimized_df, 'status', '==', 'closed')
+
+    # Assert
+    assert list(mode_df['status'][:6]) == ['Open', 'closed', 'open', 'open', 'open', 'Closed']
+    assert value_df['status'].iloc[2] == 'unknown'
+    assert list(contains_df.index[:3]) == [0, 3, 4] and len(contains_df) == 30
+    assert len(equals_df) == 10
+
+def test_remove_duplicates_by_key_keeps_latest():
+    """Tests removing rows with a duplicate key, keeping the highest value of an ordering column."""
+    # Arrange
+    test_df = pd.DataFrame({'id': [1, 2, 1, 2, 3], 'updated': pd.to_datetime(
+        ['2024-01-05', '2024-02-01', '2024-03-01', '2024-01-01', '2024-01-01'])})
+
+    # Act
+    first_df = remove_duplicates_logic(test_df, ['id'])
+    latest_df = remove_duplicates_logic(test_df, ['id'], keep='max', order_by='updated')
+
+    # Assert
+    assert list(first_df.index) == [0, 1, 4]
+    assert list(latest_df.index) == [1, 2, 4]
+
+def test_handle_missing_values_batch_applies_each_strategy():
+    """Tests a per-column strategy map, including a group-wise median and interpolation."""
+    # Arrange
+    test_df = pd.DataFrame({'region': ['n', 'n', 's', 's', 's'], 'price': [1.0, np.nan, 3.0, np.nan, 7.0],
+                            'level': [np.nan, 2.0, np.nan, 6.0, np.nan], 'status': ['a', None, 'b', None, None],
+                            'id': [1, 2, 3, 4, 5]})
+    strategies = {'price': missing_value_strategy('Fill with Median', group_by='region'), 'level': 'Interpolate',
+                  'status': 'Forward Fill', 'id': 'Fill with Mean'}
+
+    # Act
+    result_df = handle_missing_values_batch_logic(test_df, strategies)
+
+    # Assert
+    assert list(result_df['price']) == [1.0, 1.0, 3.0, 5.0, 7.0]
+    assert list(result_df['level']) == [2.0, 2.0, 4.0, 6.0, 6.0]
+    assert list(result_df['status']) == ['a', 'a', 'b', 'b', 'b']
+    assert test_df['price'].isna().sum() == 2
+
+def test_handle_missing_values_batch_copies_only_filled_columns():
+    """Tests that columns without a strategy (or without missing values) share memory with the input."""
+    # Arrange
+    test_df = pd.DataFrame({'colA': [1.0, np.nan, 3.0], 'colB': [1.0, 2.0, 3.0], 'colC': ['x', 'y', 'z']})
+
+    # Act
+    result_df = handle_missing_values_batch_logic(test_df, {'colA': 'Fill with Mean', 'colB': 'Fill with Mean'})
+
+    # Assert
+    assert result_df['colA'].tolist() == [1.0, 2.0, 3.0]
+    assert np.shares_memory(result_df['colB'].to_numpy(), test_df['colB'].to_numpy())
+    assert np.shares_memory(result_df['colC'].to_numpy(), test_df['colC'].to_numpy())
+    assert not np.shares_memory(result_df['colA'].to_numpy(), test_df['colA'].to_numpy())
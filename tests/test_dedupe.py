@@ -0,0 +1,80 @@
+# tests/test_dedupe.py
+
+import numpy as np
+import pandas as pd
+import dedupe
+from dedupe import KeyTable, drop_duplicates, duplicate_stats
+from streaming import ChunkedSource, DropDuplicatesStep
+
+def test_key_table_finds_duplicates_across_chunks():
+    """Tests that first rows are kept across chunks, even when a column's dtype changes between chunks."""
+    # Arrange: colA is int64 in the first chunk and float64 (it has a NaN) in the second
+    first = pd.DataFrame({'colA': [1, 2, 2], 'colB': ['x', 'y', 'y']})
+    second = pd.DataFrame({'colA': [1.0, np.nan, 3.0, np.nan], 'colB': ['x', 'z', 'z', 'z']}, index=[3, 4, 5, 6])
+    table = KeyTable()
+
+    # Act
+    masks = [table.first_rows(first), table.first_rows(second)]
+
+    # Assert
+    assert [mask.tolist() for mask in masks] == [[True, True, False], [False, True, True, False]]
+    assert table.groups == 4
+
+def test_hash_collisions_are_verified(monkeypatch):
+    """Tests that rows with equal hashes but different values are not treated as duplicates."""
+    # Arrange: every row hashes the same
+    monkeypatch.setattr(dedupe, 'row_hashes', lambda keys: np.zeros(len(keys), dtype=np.uint64))
+    test_df = pd.DataFrame({'colA': [1, 2, 1, 3, 2, np.nan, np.nan], 'colB': ['x', 'y', 'x', 'z', 'y', None, None]})
+
+    # Act
+    result_df = drop_duplicates(test_df)
+
+    # Assert
+    assert list(result_df.index) == [0, 1, 3, 5]
+
+def test_keep_latest_by_key_matches_in_memory_and_streamed():
+    """Tests that keeping the latest row per key gives the same rows in memory and chunk by chunk."""
+    # Arrange
+    test_df = pd.DataFrame({'key': ['a', 'b', 'a', 'c', 'b', 'a', 'c'],
+                            'updated': ['2024-03', '2024-01', '2024-05', None, '2024-01', '2024-02', '2024-04'],
+                            'value': range(7)})
+    source = ChunkedSource(frame=test_df, chunk_rows=2)
+
+    # Act
+    in_memory_df = drop_duplicates(test_df, ['key'], 'max', 'updated')
+    streamed_df = source.with_step(DropDuplicatesStep.create(source, ['key'], 'max', 'updated')).collect()
+
+    # Assert: ties go to the later row and a missing timestamp never wins
+    assert list(in_memory_df['value']) == [2, 4, 6]
+    pd.testing.assert_frame_equal(streamed_df, in_memory_df)
+
+def test_duplicate_stats_counts_groups():
+    """Tests the duplicate group summary over several chunks."""
+    # Arrange
+    test_df = pd.DataFrame({'colA': ['x', 'y', 'x', 'x', 'z', 'y'], 'colB': range(6)})
+    chunks = [test_df.iloc[:4], test_df.iloc[4:]]
+
+    # Act
+    stats = duplicate_stats(chunks, ['colA'])
+
+    # Assert
+    assert (stats['rows'], stats['distinct'], stats['duplicate_rows'], stats['duplicate_groups']) == (6, 3, 3, 2)
+    assert stats['group_sizes'].to_dict() == {2: 1, 3: 1}
+    assert stats['top'].values.tolist() == [['x', 3], ['y', 2]]
+
+def test_large_integer_keys_hash_apart():
+    """Tests that int64 keys too large for float64 to tell apart are still distinct, even unverified."""
+    # Arrange: four distinct IDs that all round to the same float64
+    ids = [2 ** 60 + i for i in range(4)]
+    test_df = pd.DataFrame({'id': ids + ids[:1]})
+    second = pd.DataFrame({'id': [float(2 ** 60), np.nan]})
+    table = KeyTable()
+
+    # Act
+    unverified_df = drop_duplicates(test_df, verify=False)
+    first_rows = [table.first_rows(test_df), table.first_rows(second)]
+
+    # Assert: 2**60 as a float is the first ID; NaN is new
+    assert unverified_df['id'].tolist() == ids
+    assert len(set(dedupe.row_hashes(test_df.iloc[:4]))) == 4
+    assert [mask.tolist() for mask in first_rows] == [[True, True, True, True, False], [False, True]]
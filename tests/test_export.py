@@ -0,0 +1,67 @@
+# tests/test_export.py
+
+import os
+import pandas as pd
+import pytest
+from export import export_chunks, frame_chunks
+from jobs import Job, JobCancelled
+
+pytest.importorskip("pyarrow")
+
+def test_export_chunks_round_trips_each_format(tmp_path):
+    """Tests that chunked CSV, gzip CSV, Parquet and Feather exports read back unchanged."""
+    # Arrange
+    test_df = pd.DataFrame({'colA': range(10), 'colB': list('abcdefghij'), 'colC': [1.5, None] * 5})
+    readers = {'out.csv': pd.read_csv, 'out.csv.gz': pd.read_csv, 'out.parquet': pd.read_parquet,
+               'out.feather': pd.read_feather}
+
+    for name, read in readers.items():
+        # Act
+        rows = export_chunks(frame_chunks(test_df, chunk_rows=3), str(tmp_path / name), list(test_df.columns))
+
+        # Assert
+        assert rows == 10
+        pd.testing.assert_frame_equal(read(tmp_path / name), test_df)
+
+def test_cancelled_export_keeps_existing_file(tmp_path):
+    """Tests that a cancelled export leaves neither a temp file nor a partial target."""
+    # Arrange
+    target = tmp_path / "out.csv"
+    target.write_text("old\n")
+    test_df = pd.DataFrame({'colA': range(10)})
+    job = Job(None, "Exporting", None)
+    def chunks():
+        yield test_df.iloc[:5]
+        job.cancel()
+        yield test_df.iloc[5:]
+
+    # Act
+    with pytest.raises(JobCancelled):
+        export_chunks(chunks(), str(target), ['colA'], job)
+
+    # Assert
+    assert target.read_text() == "old\n"
+    assert os.listdir(tmp_path) == ["out.csv"]
+
+def test_columns_changing_type_between_chunks_are_unified(tmp_path):
+    """Tests that all-null, int-then-NaN and int-then-fractional columns export to Parquet and Feather."""
+    # Arrange: colA is all null and colB int64 in the first chunk; colC turns fractional in the last
+    first = pd.DataFrame({'colA': [None, None], 'colB': [1, 2], 'colC': [1, 2]})
+    second = pd.DataFrame({'colA': ['x', None], 'colB': [3.0, float('nan')], 'colC': [3, 4]})
+    third = pd.DataFrame({'colA': ['y', 'z'], 'colB': [5.0, 6.0], 'colC': [5.5, 6.0]})
+    chunks = lambda: iter([first, second, third])
+    whole = pd.concat([first, second, third], ignore_index=True)
+
+    for name, read in {'out.parquet': pd.read_parquet, 'out.feather': pd.read_feather}.items():
+        # Act
+        streamed = export_chunks(chunks(), str(tmp_path / name), list(first.columns), reread=chunks)
+        result_df = read(tmp_path / name)
+        in_memory = export_chunks(frame_chunks(whole, chunk_rows=2), str(tmp_path / name), list(whole.columns),
+                                  schema_from=whole)
+
+        # Assert
+        assert streamed == in_memory == 6
+        assert result_df['colA'].tolist() == [None, None, 'x', None, 'y', 'z']
+        assert result_df['colB'].tolist()[:2] == [1, 2] and pd.isna(result_df['colB'][3])
+        assert result_df['colC'].tolist() == [1, 2, 3, 4, 5.5, 6]
+        pd.testing.assert_frame_equal(read(tmp_path / name), whole)
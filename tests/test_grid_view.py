@@ -0,0 +1,22 @@
+# tests/test_grid_view.py
+
+import pandas as pd
+import numpy as np
+from grid_view import fetch_rows, clamp_offset
+
+def test_fetch_rows_formats_nulls_in_window_only():
+    """Tests that only the requested rows are returned, with NULLs formatted."""
+    # Arrange
+    test_df = pd.DataFrame({'colA': [1.0, np.nan, 3.0, 4.0], 'colB': ['x', None, 'z', 'w']})
+
+    # Act
+    rows = fetch_rows(test_df, 1, 3)
+
+    # Assert
+    assert rows == [['NULL', 'NULL'], [3.0, 'z']]
+
+def test_clamp_offset_keeps_last_page_full():
+    """Tests that scrolling past the end stops at the last full page."""
+    assert clamp_offset(95, 10, 100) == 90
+    assert clamp_offset(-5, 10, 100) == 0
+    assert clamp_offset(3, 10, 5) == 0
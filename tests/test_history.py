@@ -0,0 +1,92 @@
+# tests/test_history.py
+
+import pandas as pd
+import numpy as np
+from history import History, RowDelta, CellPatch, CompositeDelta, make_delta
+from data_logic import handle_missing_values_logic, handle_missing_values_batch_logic
+
+def test_filter_is_stored_as_row_delta_and_round_trips():
+    """Tests that undoing and redoing a filter restores the exact frames."""
+    # Arrange
+    history = History()
+    before = pd.DataFrame({'colA': [1, 2, 3, 4, 5], 'colB': list('abcde')})
+    after = before[before['colA'] % 2 == 1]
+
+    # Act
+    history.record(before, after)
+    undone = history.undo(after)
+    redone = history.redo(undone)
+
+    # Assert
+    assert isinstance(history.undo_stack[0], RowDelta)
+    pd.testing.assert_frame_equal(undone, before)
+    pd.testing.assert_frame_equal(redone, after)
+
+def test_fill_is_stored_as_cell_patch():
+    """Tests that a fill only keeps the changed cells and undoes correctly."""
+    # Arrange
+    history = History()
+    before = pd.DataFrame({'colA': [10, 20, np.nan], 'colB': ['x', 'y', 'z']})
+    after = handle_missing_values_logic(before, column='colA', action='Fill with Mean')
+
+    # Act
+    history.record(before, after, changed_columns=['colA'])
+    delta = history.undo_stack[0]
+    undone = history.undo(after)
+
+    # Assert
+    assert isinstance(delta, CellPatch)
+    assert list(delta.payload['colA'][0]) == [2]
+    pd.testing.assert_frame_equal(undone, before)
+
+def test_budget_spills_oldest_delta(tmp_path):
+    """Tests that going over the memory budget spills the oldest delta to disk."""
+    # Arrange
+    history = History(budget_bytes=1, spill_dir=tmp_path)
+    before = pd.DataFrame({'colA': range(100)})
+    after = before[before['colA'] < 50]
+
+    # Act
+    history.record(before, after)
+
+    # Assert
+    assert history.undo_stack[0].spilled
+    assert history.memory_bytes == 0
+    pd.testing.assert_frame_equal(history.undo(after), before)
+
+def test_make_room_spills_before_the_delta_is_recorded(tmp_path):
+    """Tests that make_room() does the spilling up front, so recording the delta writes nothing."""
+    # Arrange
+    before = pd.DataFrame({'colA': range(100)})
+    first, second = before[before['colA'] < 50], before[before['colA'] < 25]
+    history = History(spill_dir=tmp_path)
+    history.record(before, first)
+    history.budget_bytes = history.memory_bytes + 1
+    delta = make_delta(first, second)
+
+    # Act
+    history.make_room(delta.nbytes)
+    spilled_before_record = history.undo_stack[0].spilled
+    history.record_delta(delta)
+
+    # Assert
+    assert spilled_before_record and not delta.spilled
+    pd.testing.assert_frame_equal(history.undo(second), first)
+
+def test_batch_that_drops_and_fills_is_one_composite_delta():
+    """Tests that dropping rows and filling a column in one batch records a row delta plus a cell patch."""
+    # Arrange
+    history = History()
+    before = pd.DataFrame({'colA': [1.0, np.nan, 3.0, np.nan], 'colB': ['x', None, 'y', 'z']})
+    after = handle_missing_values_batch_logic(before, {'colB': 'Drop Rows', 'colA': 'Fill with Mean'})
+
+    # Act
+    delta = history.record(before, after, ['colA'])
+    undone = history.undo(after)
+    redone = history.redo(undone)
+
+    # Assert
+    assert isinstance(delta, CompositeDelta) and delta.columns == ['colA']
+    assert [type(part) for part in delta.payload] == [RowDelta, CellPatch]
+    pd.testing.assert_frame_equal(undone, before)
+    pd.testing.assert_frame_equal(redone, after)
@@ -0,0 +1,46 @@
+# tests/test_instrument.py
+
+import json
+import pandas as pd
+import pytest
+from instrument import Instrument, ActionMetrics
+from jobs import JobCancelled
+
+def test_instrument_records_rows_time_and_trace(tmp_path):
+    """Tests that a measured call fills in its metrics and is appended to the session trace."""
+    # Arrange
+    instrument = Instrument(trace_dir=str(tmp_path))
+    metrics = ActionMetrics("Filtering")
+    metrics.rows_in = 4
+    test_df = pd.DataFrame({'colA': [1, 2, 3, 4]})
+
+    # Act
+    result = instrument.run(metrics, lambda df: df[df['colA'] > 2], test_df)
+    instrument.write(metrics)
+
+    # Assert
+    assert len(result) == 2
+    assert metrics.rows_out == 2 and metrics.seconds >= 0 and metrics.cpu_seconds >= 0
+    with open(instrument.trace_path) as f:
+        records = [json.loads(line) for line in f]
+    assert records[0]['action'] == 'Filtering' and records[0]['rows_out'] == 2
+    assert 'rows 4 -> 2' in metrics.summary()
+
+def test_instrument_profiles_and_traces_cancelled_actions(tmp_path):
+    """Tests the opt-in profile report and that cancelled actions still reach the trace."""
+    # Arrange
+    instrument = Instrument(trace_dir=str(tmp_path))
+    profiled, cancelled = ActionMetrics("Describe"), ActionMetrics("Export")
+    def cancel():
+        raise JobCancelled("Export")
+
+    # Act
+    instrument.run(profiled, lambda: pd.DataFrame({'colA': range(1000)}).describe(), profile=True)
+    with pytest.raises(JobCancelled):
+        instrument.run(cancelled, cancel)
+
+    # Assert
+    with open(profiled.profile) as f:
+        assert 'Top allocations' in f.read()
+    with open(instrument.trace_path) as f:
+        assert json.loads(f.readline())['status'] == 'cancelled'
@@ -0,0 +1,98 @@
+# tests/test_jobs.py
+
+import time
+from jobs import JobRunner
+
+class FakeWidget:
+    """Stands in for a Tk widget: after() callbacks run when pump() is called."""
+
+    def __init__(self):
+        self.callbacks = []
+
+    def after(self, ms, callback):
+        self.callbacks.append(callback)
+
+    def pump(self, timeout=5):
+        deadline = time.monotonic() + timeout
+        while self.callbacks and time.monotonic() < deadline:
+            self.callbacks.pop(0)()
+            time.sleep(0.001)
+
+def test_jobs_run_in_order_and_see_previous_results():
+    """Tests that a queued job starts only after the previous job's callback ran."""
+    # Arrange
+    widget = FakeWidget()
+    runner = JobRunner(widget, poll_ms=1)
+    state = {'value': 1}
+
+    def double(result):
+        state['value'] = result
+
+    # Act
+    runner.submit("first", lambda job: state['value'] * 2, double)
+    runner.submit("second", lambda job: state['value'] * 2, double)
+    widget.pump()
+
+    # Assert
+    assert state['value'] == 4
+    assert not runner.busy
+    assert runner.last.description == "second"
+
+def test_cancelled_job_does_not_commit():
+    """Tests that cancelling discards the running job's result and the queued jobs."""
+    # Arrange
+    widget = FakeWidget()
+    runner = JobRunner(widget, poll_ms=1)
+    results = []
+
+    # Act
+    runner.submit("slow", lambda job: time.sleep(0.05) or "slow", results.append)
+    runner.submit("queued", lambda job: "queued", results.append)
+    runner.cancel_all()
+    widget.pump()
+
+    # Assert
+    assert results == []
+    assert runner.last.cancelled
+
+def test_errors_are_reported_and_queue_continues():
+    """Tests that a failing job calls on_error and the next job still runs."""
+    # Arrange
+    widget = FakeWidget()
+    runner = JobRunner(widget, poll_ms=1)
+    errors, results = [], []
+
+    # Act
+    runner.submit("bad", lambda job: 1 / 0, results.append, errors.append)
+    runner.submit("good", lambda job: "ok", results.append, errors.append)
+    widget.pump()
+
+    # Assert
+    assert isinstance(errors[0], ZeroDivisionError)
+    assert results == ["ok"]
+
+def test_cancelled_jobs_call_on_cancelled():
+    """Tests that running, finished-anyway and queued jobs all report their cancellation."""
+    # Arrange
+    widget = FakeWidget()
+    runner = JobRunner(widget, poll_ms=1)
+    cancelled, results = [], []
+
+    def stops(job):
+        while not job.cancelled:
+            time.sleep(0.001)
+        job.check_cancelled()
+
+    # Act
+    runner.submit("stops", stops, results.append, results.append, lambda: cancelled.append("stops"))
+    runner.current.cancel()
+    widget.pump()
+    runner.submit("finishes", lambda job: time.sleep(0.05) or "done", results.append, results.append,
+                  lambda: cancelled.append("finishes"))
+    runner.submit("queued", lambda job: "done", results.append, results.append, lambda: cancelled.append("queued"))
+    runner.cancel_all()
+    widget.pump()
+
+    # Assert
+    assert results == []
+    assert sorted(cancelled) == ["finishes", "queued", "stops"]
@@ -0,0 +1,55 @@
+# tests/test_plan.py
+
+import pandas as pd
+import numpy as np
+from plan import optimize, FusedFilterStep
+from streaming import ChunkedSource, DropDuplicatesStep, MissingValuesStep, FilterStep
+
+def test_filters_are_pushed_down_and_fused():
+    """Tests that filters move ahead of fills on other columns and get fused."""
+    # Arrange
+    steps = [FilterStep.where('colA', '>', '1'), MissingValuesStep('colB', 'Fill with Value:', 'x'),
+             DropDuplicatesStep(), FilterStep.where('colC', '==', 'y')]
+
+    # Act
+    optimized, read_columns = optimize(steps)
+
+    # Assert
+    assert isinstance(optimized[0], FusedFilterStep)
+    assert len(optimized[0].filters) == 2
+    assert read_columns is None
+
+def test_unneeded_fills_are_pruned_with_columns():
+    """Tests that asking for one column drops fills on others and prunes the read."""
+    # Arrange
+    steps = [MissingValuesStep('colB', 'Fill with Value:', 'x'), FilterStep.where('colA', 'is not null')]
+
+    # Act
+    optimized, read_columns = optimize(steps, columns=['colC'])
+
+    # Assert
+    assert [type(step) for step in optimized] == [FilterStep]
+    assert read_columns == {'colA', 'colC'}
+
+def test_lazy_source_matches_eager_result(tmp_path):
+    """Tests that the optimized plan returns the same rows as running the steps eagerly."""
+    # Arrange
+    test_df = pd.DataFrame({'colA': [1, 5, 5, np.nan, 9, 3], 'colB': ['a', 'b', 'b', None, 'c', 'd'],
+                            'colC': [1, 2, 2, 3, 4, 5]})
+    filepath = tmp_path / "data.csv"
+    test_df.to_csv(filepath, index=False)
+    source = ChunkedSource(str(filepath), chunk_rows=2)
+
+    # Act
+    source = source.with_step(MissingValuesStep.create(source, 'colB', 'Fill with Value:', 'zz'))
+    source = source.with_step(DropDuplicatesStep())
+    source = source.with_step(FilterStep.where('colA', '>', '2'))
+    source = source.with_step(FilterStep.where('colC', '<', '5'))
+    result_df = source.collect()
+
+    # Assert
+    expected = test_df.assign(colB=test_df['colB'].fillna('zz')).drop_duplicates()
+    expected = expected[(expected['colA'] > 2) & (expected['colC'] < 5)]
+    pd.testing.assert_frame_equal(result_df, expected)
+    assert source.count_rows() == len(expected)
+    assert list(source.collect(columns=['colC'])['colC']) == list(expected['colC'])
@@ -0,0 +1,75 @@
+# tests/test_plotting.py
+
+import numpy as np
+import pandas as pd
+from data_logic import filter_logic
+from history import make_delta
+from plotting import PlotEngine, downsample_min_max
+
+def test_histogram_matches_numpy_and_rebins_from_cache():
+    """Tests that cached fine bins give numpy's histogram for any divisor bin count."""
+    # Arrange
+    engine = PlotEngine()
+    values = pd.Series(np.random.default_rng(0).normal(size=10_000), name='colA')
+
+    for bins in [10, 30, 50]:
+        # Act
+        counts, edges = engine.histogram(values, bins)
+        expected_counts, expected_edges = np.histogram(values, bins)
+
+        # Assert
+        assert np.array_equal(counts, expected_counts)
+        assert np.allclose(edges, expected_edges)
+
+def test_category_counts_follow_row_removal():
+    """Tests that counts updated from removed rows match a fresh recount."""
+    # Arrange
+    engine = PlotEngine()
+    test_df = pd.DataFrame({'colA': list('aabbbcd') * 10, 'colB': range(70)})
+    engine.category_counts(test_df['colA'])
+    filtered_df = filter_logic(test_df, 'colB', '>', '20')
+    removed = make_delta(test_df, filtered_df).payload[0]
+
+    # Act
+    engine.put_counts(filtered_df, engine.removed_counts(test_df, filtered_df, removed))
+    cached = engine.cache.peek(filtered_df['colA'], ('value_counts', False))
+
+    # Assert
+    assert cached.to_dict() == filtered_df['colA'].value_counts().to_dict()
+
+def test_streamed_histogram_and_counts_match_the_whole_column():
+    """Tests that counting chunk by chunk gives the same bins and counts as the whole column."""
+    # Arrange
+    engine = PlotEngine()
+    values = pd.Series(np.random.default_rng(1).normal(size=10_000))
+    values[::7] = np.nan
+    labels = pd.Series(list('aabbbcdeff') * 1000)
+
+    def chunks(series):
+        return [series.iloc[start:start + 999] for start in range(0, len(series), 999)]
+
+    # Act
+    counts, edges = engine.histogram_chunks(lambda: chunks(values), 30)
+    categories = engine.category_counts_chunks(chunks(labels), top=3)
+
+    # Assert
+    expected_counts, expected_edges = engine.histogram(values, 30)
+    assert np.array_equal(counts, expected_counts)
+    assert np.allclose(edges, expected_edges)
+    assert categories.to_dict() == labels.value_counts().nlargest(3).to_dict()
+
+def test_downsample_min_max_keeps_spikes():
+    """Tests that thinning a long series keeps its extremes and stays under the point limit."""
+    # Arrange
+    x = np.arange(100_000)
+    y = np.sin(x / 500.0)
+    y[12_345] = 40.0
+    y[54_321] = -40.0
+
+    # Act
+    thin_x, thin_y = downsample_min_max(x, y, max_points=1_000)
+
+    # Assert
+    assert len(thin_x) <= 1_000
+    assert thin_y.max() == 40.0 and thin_y.min() == -40.0
+    assert np.all(np.diff(thin_x) > 0)
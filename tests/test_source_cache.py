@@ -0,0 +1,94 @@
+# tests/test_source_cache.py
+
+import os
+import pandas as pd
+import pytest
+from source_cache import SourceCache
+
+pytest.importorskip("pyarrow")
+
+def write_csv(path, df):
+    df.to_csv(path, index=False)
+    return str(path)
+
+def test_source_cache_reads_back_parsed_frame(tmp_path):
+    """Tests that a stored source is returned from the cache instead of parsed again."""
+    # Arrange
+    cache = SourceCache(directory=str(tmp_path / "cache"))
+    test_df = pd.DataFrame({'colA': [1, 2, None], 'colB': ['x', 'y', 'z']})
+    filepath = write_csv(tmp_path / "data.csv", test_df)
+    parses = []
+    def parse():
+        parses.append(filepath)
+        return pd.read_csv(filepath)
+
+    # Act
+    first_df = cache.read(filepath, parse)
+    second_df = SourceCache(directory=str(tmp_path / "cache")).read(filepath, parse)
+
+    # Assert
+    assert len(parses) == 1
+    pd.testing.assert_frame_equal(second_df, first_df)
+
+def test_source_cache_invalidates_changed_file(tmp_path):
+    """Tests that rewriting a file, even with its old mtime, misses the cache."""
+    # Arrange
+    cache = SourceCache(directory=str(tmp_path / "cache"))
+    filepath = write_csv(tmp_path / "data.csv", pd.DataFrame({'colA': [1, 2, 3]}))
+    cache.store(filepath, pd.read_csv(filepath))
+    stat = os.stat(filepath)
+
+    # Act
+    write_csv(filepath, pd.DataFrame({'colA': [7, 8, 9]}))
+    os.utime(filepath, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+
+    # Assert
+    assert cache.load(filepath) is None
+    assert cache.size_bytes == 0
+
+def test_source_cache_evicts_least_recently_used(tmp_path):
+    """Tests that entries are evicted oldest-use first once over the size limit."""
+    # Arrange
+    test_df = pd.DataFrame({'colA': range(1000)})
+    paths = [write_csv(tmp_path / f"data{i}.csv", test_df) for i in range(3)]
+    cache = SourceCache(directory=str(tmp_path / "cache"))
+    cache.store(paths[0], test_df)
+    entry_bytes = cache.size_bytes
+    cache.max_bytes = 2 * entry_bytes
+
+    # Act
+    cache.store(paths[1], test_df)
+    cache.load(paths[0])
+    cache.store(paths[2], test_df)
+
+    # Assert
+    assert cache.load(paths[1]) is None
+    assert cache.load(paths[0]) is not None
+    assert cache.load(paths[2]) is not None
+
+def test_source_cache_skips_files_in_use_and_removes_them_later(tmp_path, monkeypatch):
+    """Tests that a cache file that can't be deleted (memory-mapped on Windows) doesn't fail eviction."""
+    # Arrange
+    test_df = pd.DataFrame({'colA': range(1000)})
+    paths = [write_csv(tmp_path / f"data{i}.csv", test_df) for i in range(3)]
+    cache = SourceCache(directory=str(tmp_path / "cache"))
+    cache.store(paths[0], test_df)
+    cache.max_bytes = cache.size_bytes
+    locked = os.path.join(cache.directory, cache.index[os.path.abspath(paths[0])]["file"])
+    remove = os.remove
+    def refuse_locked(path):
+        if path == locked:
+            raise PermissionError(path)
+        remove(path)
+    monkeypatch.setattr(os, "remove", refuse_locked)
+
+    # Act: storing the second source evicts the first, whose file is "mapped"
+    stored = cache.store(paths[1], test_df)
+    left_behind = os.path.exists(locked)
+    monkeypatch.setattr(os, "remove", remove)
+    cache.store(paths[2], test_df)
+
+    # Assert
+    assert stored and left_behind
+    assert not os.path.exists(locked)
+    assert cache.load(paths[2]) is not None
@@ -0,0 +1,73 @@
+# tests/test_stats_engine.py
+
+import pandas as pd
+import numpy as np
+from stats_engine import StatsEngine, ColumnSummary, QuantileSketch, DistinctSketch
+
+def make_frame(rows=10_000):
+    rng = np.random.default_rng(0)
+    return pd.DataFrame({'colA': rng.normal(size=rows), 'colB': rng.choice(['x', 'y', 'z'], rows),
+                         'colC': rng.integers(0, 1000, rows)})
+
+def test_exact_describe_matches_pandas():
+    """Tests that exact statistics agree with pandas describe()."""
+    # Arrange
+    test_df = make_frame()
+    test_df.loc[::5, 'colA'] = np.nan
+
+    # Act
+    stats_df = StatsEngine().describe(test_df)
+
+    # Assert
+    expected = test_df.describe(include='all').round(2)
+    for column in test_df.columns:
+        for stat in expected.index:
+            if pd.notna(expected.loc[stat, column]):
+                assert stats_df.loc[stat, column] == expected.loc[stat, column], (stat, column)
+
+def test_chunk_summaries_merge_to_full_summary():
+    """Tests that merging chunk summaries gives the same moments as one pass."""
+    # Arrange
+    test_df = make_frame()
+    chunks = [test_df.iloc[i:i + 999] for i in range(0, len(test_df), 999)]
+
+    # Act
+    merged = StatsEngine().describe_chunks(chunks)
+    full = StatsEngine().describe(test_df)
+
+    # Assert
+    pd.testing.assert_frame_equal(merged, full)
+
+def test_sketches_are_close():
+    """Tests the approximate quantile and distinct-count sketches."""
+    # Arrange
+    values = np.random.default_rng(1).uniform(0, 1, 200_000)
+    sketch, distinct = QuantileSketch(seed=0), DistinctSketch()
+
+    # Act
+    for part in np.array_split(values, 7):
+        sketch.update(part)
+        distinct.update(pd.Series(part))
+
+    # Assert
+    assert abs(sketch.quantiles([0.5])[0] - 0.5) < 0.01
+    assert abs(distinct.estimate() - len(values)) / len(values) < 0.03
+
+def test_only_changed_columns_are_recomputed(monkeypatch):
+    """Tests that after a fill only the filled column is summarized again."""
+    # Arrange
+    engine = StatsEngine()
+    test_df = make_frame(100)
+    engine.describe(test_df)
+    summarized = []
+    original_of = ColumnSummary.of.__func__
+    monkeypatch.setattr(ColumnSummary, "of", classmethod(lambda cls, series, approximate=False:
+                                                         summarized.append(series.name) or original_of(cls, series, approximate)))
+
+    # Act
+    changed_df = test_df.copy(deep=False)
+    changed_df['colC'] = test_df['colC'] + 1
+    engine.describe(changed_df)
+
+    # Assert
+    assert summarized == ['colC']
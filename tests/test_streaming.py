@@ -0,0 +1,102 @@
+# tests/test_streaming.py
+
+import pandas as pd
+import numpy as np
+from data_logic import handle_missing_values_batch_logic, missing_value_strategy, remove_duplicates_logic
+from streaming import (stream_csv, csv_dtype_plan, ChunkedSource, DropDuplicatesStep, MissingValuesStep, MissingValuesBatchStep,
+                       FilterStep)
+
+def write_csv(tmp_path, df):
+    filepath = tmp_path / "data.csv"
+    df.to_csv(filepath, index=False)
+    return str(filepath)
+
+def test_stream_csv_previews_first_chunk_and_reads_everything(tmp_path):
+    """Tests that the preview arrives first and the full frame is returned."""
+    # Arrange
+    test_df = pd.DataFrame({'colA': range(25), 'colB': ['x'] * 25})
+    filepath = write_csv(tmp_path, test_df)
+    previews = []
+
+    # Act
+    result_df = stream_csv(filepath, on_preview=previews.append, preview_rows=5, chunk_rows=7)
+
+    # Assert
+    assert len(previews[0]) == 5
+    pd.testing.assert_frame_equal(result_df, test_df)
+
+def test_chunked_source_matches_in_memory_cleaning(tmp_path):
+    """Tests that steps applied chunk by chunk give the same rows as in memory."""
+    # Arrange
+    test_df = pd.DataFrame({'colA': [1, 2, 2, np.nan, 5, 5, 7, np.nan],
+                            'colB': ['a', 'b', 'b', 'c', 'd', 'd', 'e', 'f']})
+    source = ChunkedSource(write_csv(tmp_path, test_df), chunk_rows=3)
+
+    # Act
+    source = source.with_step(DropDuplicatesStep())
+    source = source.with_step(MissingValuesStep.create(source, 'colA', 'Fill with Median'))
+    source = source.with_step(FilterStep.where('colA', '>', '1'))
+    output = tmp_path / "out.csv"
+    rows = source.to_csv(str(output))
+
+    # Assert
+    expected = test_df.drop_duplicates()
+    expected = expected.assign(colA=expected['colA'].fillna(expected['colA'].median()))
+    expected = expected[expected['colA'] > 1].reset_index(drop=True)
+    assert rows == len(expected)
+    pd.testing.assert_frame_equal(pd.read_csv(output), expected)
+
+def test_dtype_plan_reads_text_columns_as_arrow_strings(tmp_path):
+    """Tests that the planned text columns arrive as Arrow strings in every chunk and still filter."""
+    # Arrange
+    test_df = pd.DataFrame({'colA': [1, 2, 3, 4, 5], 'colB': ['a', None, 'c', 'a', 'e']})
+    filepath = write_csv(tmp_path, test_df)
+
+    # Act
+    plan = csv_dtype_plan(filepath)
+    source = ChunkedSource(filepath, chunk_rows=2, dtype=plan).with_step(FilterStep.where('colB', '==', 'a'))
+    chunks = list(source.iter_chunks())
+
+    # Assert
+    assert plan == {'colB': 'string[pyarrow]'}
+    assert all(chunk['colB'].dtype == 'string[pyarrow]' for chunk in chunks)
+    assert pd.concat(chunks)['colA'].tolist() == [1, 4]
+
+def test_missing_values_batch_step_matches_in_memory(tmp_path):
+    """Tests that batch fills computed in one pass over the chunks match the in-memory batch."""
+    # Arrange
+    test_df = pd.DataFrame({'group': ['a', 'b', 'a', 'b', 'a', 'b', 'a', None],
+                            'colA': [1.0, np.nan, np.nan, 4.0, 5.0, np.nan, np.nan, 8.0],
+                            'colB': [np.nan, 'x', np.nan, np.nan, 'y', np.nan, 'y', np.nan],
+                            'colC': [np.nan, 2.0, np.nan, np.nan, 3.0, 1.0, np.nan, 5.0]})
+    strategies = {'colA': missing_value_strategy('Fill with Median', group_by='group'),
+                  'colB': 'Forward Fill', 'colC': 'Fill with Mode', 'group': 'Drop Rows'}
+    source = ChunkedSource(write_csv(tmp_path, test_df), chunk_rows=3)
+
+    # Act
+    streamed_df = source.with_step(MissingValuesBatchStep.create(source, strategies)).collect()
+
+    # Assert: forward fill carries values across chunk boundaries
+    expected = handle_missing_values_batch_logic(test_df, strategies)
+    pd.testing.assert_frame_equal(streamed_df, expected)
+
+def test_batch_step_that_drops_rows_is_kept_for_other_columns(tmp_path):
+    """Tests that a batch dropping rows still drops them when only unrelated columns are read."""
+    # Arrange
+    test_df = pd.DataFrame({'a': [1.0, np.nan, 3.0, 4.0], 'b': [np.nan, 2.0, 2.0, 6.0], 'c': [1, 1, 2, 2]})
+    strategies = {'a': 'Drop Rows', 'b': 'Fill with Mean'}
+    source = ChunkedSource(write_csv(tmp_path, test_df), chunk_rows=2)
+    source = source.with_step(MissingValuesBatchStep.create(source, strategies))
+    expected = handle_missing_values_batch_logic(test_df, strategies)
+
+    # Act
+    subset = source.collect(columns=['c'])
+    rows = source.count_rows()
+    deduped = source.with_step(DropDuplicatesStep.create(source, ['c'], keep='max', order_by='b')).collect()
+
+    # Assert
+    assert subset['c'].tolist() == expected['c'].tolist()
+    assert rows == len(expected) == 3
+    eager = remove_duplicates_logic(expected, ['c'], keep='max', order_by='b')
+    assert sorted(deduped['b'].tolist()) == sorted(eager['b'].tolist())
+    assert len(deduped) == 2